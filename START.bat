@@ -76,11 +76,6 @@ echo.
 echo OpenMP cakismasi icin environment variable ayarlaniyor...
 call conda env config vars set KMP_DUPLICATE_LIB_OK=TRUE -n vision_conda
 
-echo.
-echo CMake ve dlib icin gerekli paketler kuruluyor...
-echo Bu islem uzun surebilir, lutfen bekleyin...
-call conda install -c conda-forge cmake -y
-call conda install -c conda-forge dlib -y
 
 echo.
 echo Mediapipe ve diger vision kutuphaneleri kuruluyor...
@@ -0,0 +1,33 @@
+"""Execution backends for EyeNet gaze inference.
+
+Every backend exposes ``run_eyenet(eyes, ow=160, oh=96) -> List[EyePrediction]``.
+Backend modules are imported lazily, so the ONNX Runtime backend never
+imports torch. The ``remote`` backend sends the crops to an
+``eyenet_server.py`` process and needs neither.
+"""
+
+BACKENDS = ('torch', 'onnx', 'remote')
+# Socket of eyenet_server.py. Defined here so the command line tools do not
+# import backends.eyenet_socket, which needs Unix domain sockets.
+DEFAULT_SOCKET_PATH = '/tmp/eyenet.sock'
+
+
+def create_backend(name, model_path, **kwargs):
+    """Create an EyeNet backend by name.
+
+    Args:
+        name: ``'torch'``, ``'onnx'`` or ``'remote'``.
+        model_path: model file for the backend (``checkpoint.pt`` / TorchScript
+            for torch, ``.onnx`` for onnx, the server socket for remote).
+        **kwargs: backend specific options, see the backend classes.
+    """
+    if name == 'torch':
+        from backends.torch_backend import TorchBackend
+        return TorchBackend(model_path, **kwargs)
+    if name == 'onnx':
+        from backends.onnx_backend import OnnxBackend
+        return OnnxBackend(model_path, **kwargs)
+    if name == 'remote':
+        from backends.eyenet_socket import RemoteBackend
+        return RemoteBackend(model_path, **kwargs)
+    raise ValueError(f'Unknown backend {name!r}, expected one of {BACKENDS}')
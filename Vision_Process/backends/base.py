@@ -0,0 +1,61 @@
+from typing import List
+
+import numpy as np
+
+from util.eye_prediction import EyePrediction
+from util.eye_sample import EyeSample
+
+
+class EyeNetBackend:
+    """Batches eye crops, runs the model and maps landmarks back to the frame.
+
+    Subclasses implement :meth:`infer` on a preallocated ``N x oh x ow``
+    float32 numpy batch.
+    """
+
+    def __init__(self):
+        self._batch = None
+
+    def infer(self, batch: np.ndarray):
+        """Return ``(landmarks, gaze)`` numpy arrays of shape ``N x 34 x 2`` and ``N x 2``."""
+        raise NotImplementedError
+
+    def _batch_buffer(self, n, oh, ow):
+        # Kapasite sadece büyür; değişen batch boyutları (ör. EyeNetBatcher) yeniden ayırma yapmaz
+        if self._batch is None or self._batch.shape[0] < n or self._batch.shape[1:] != (oh, ow):
+            self._batch = np.empty((n, oh, ow), dtype=np.float32)
+        return self._batch[:n]
+
+    def run_eyenet(self, eyes: List[EyeSample], ow=160, oh=96) -> List[EyePrediction]:
+        if not eyes:
+            return []
+
+        # Tüm göz kırpıntılarını tek bir (N, oh, ow) batch'e yerleştir
+        batch = self._batch_buffer(len(eyes), oh, ow)
+        for i, eye in enumerate(eyes):
+            batch[i] = eye.img
+
+        landmarks, gaze = self.infer(batch)
+        assert gaze.shape == (len(eyes), 2)
+        assert landmarks.shape == (len(eyes), 34, 2)
+
+        landmarks = project_landmarks(landmarks, eyes, ow, oh)
+        return [EyePrediction(eye_sample=eye, landmarks=landmarks[i], gaze=gaze[i])
+                for i, eye in enumerate(eyes)]
+
+
+def project_landmarks(landmarks, eyes: List[EyeSample], ow=160, oh=96):
+    """Map heatmap ``(y, x)`` landmarks of each eye crop to full-frame ``(x, y)`` coordinates."""
+    # Heatmap (y, x) koordinatlarından göz kırpıntısı (x, y, 1) koordinatlarına
+    landmarks = landmarks * np.array([oh/48, ow/80])
+    is_left = np.array([eye.is_left for eye in eyes])
+    points = np.empty(landmarks.shape[:2] + (3,))
+    points[..., 0] = np.where(is_left[:, None], ow - landmarks[..., 1], landmarks[..., 1])
+    points[..., 1] = landmarks[..., 0]
+    points[..., 2] = 1.0
+
+    # Kırpıntı koordinatlarından tam kare koordinatlarına geri dönüşüm (2x3 afin veya 3x3 matrisler)
+    transforms_inv = np.stack([np.asarray(eye.transform_inv)[:2] for eye in eyes])
+    landmarks = np.matmul(points, transforms_inv.transpose(0, 2, 1))
+    assert landmarks.shape == (len(eyes), 34, 2)
+    return landmarks
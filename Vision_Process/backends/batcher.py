@@ -0,0 +1,140 @@
+"""Shared EyeNet batching for several camera streams."""
+import queue
+import threading
+import time
+from typing import List
+
+from util.eye_prediction import EyePrediction
+from util.eye_sample import EyeSample
+
+
+class _Request:
+    __slots__ = ('eyes', 'ow', 'oh', 'done', 'result', 'error')
+
+    def __init__(self, eyes, ow, oh):
+        self.eyes = eyes
+        self.ow = ow
+        self.oh = oh
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class EyeNetBatcher:
+    """Runs the eye crops of many callers through one backend in shared batches.
+
+    :meth:`run_eyenet` has the backend signature and blocks until the
+    predictions of its eyes are ready. One inference thread takes the first
+    waiting request, then collects more for up to ``max_wait_ms`` or until
+    ``max_batch`` eyes are pending, and runs them as a single batch. The
+    model is loaded once and concurrent streams raise the batch size instead
+    of queueing up single inferences.
+
+    Args:
+        backend: any :class:`backends.base.EyeNetBackend`.
+        max_batch: maximum number of eye crops per inference.
+        max_wait_ms: how long the first request waits for others.
+    """
+
+    def __init__(self, backend, max_batch=16, max_wait_ms=2.0):
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._running = False
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.eyes_processed = 0
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='EyeNetBatcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def run_eyenet(self, eyes: List[EyeSample], ow=160, oh=96) -> List[EyePrediction]:
+        if not eyes:
+            return []
+        if not self._running:
+            raise RuntimeError('EyeNetBatcher is not running')
+        request = _Request(eyes, ow, oh)
+        self._queue.put(request)
+        while not request.done.wait(timeout=0.5):
+            if self._thread is None:
+                raise RuntimeError('EyeNetBatcher stopped')
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self, first):
+        requests = [first]
+        size = len(first.eyes)
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while size < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._running = False
+                break
+            requests.append(request)
+            size += len(request.eyes)
+        return requests
+
+    def _run(self):
+        while self._running:
+            first = self._queue.get()
+            if first is None:
+                break
+            requests = self._collect(first)
+            # Crop sizes are the same for every caller in practice; group defensively
+            groups = {}
+            for request in requests:
+                groups.setdefault((request.ow, request.oh), []).append(request)
+            for (ow, oh), group in groups.items():
+                eyes = [eye for request in group for eye in request.eyes]
+                try:
+                    predictions = self.backend.run_eyenet(eyes, ow=ow, oh=oh)
+                except Exception as e:  # hand the error to every waiting caller
+                    for request in group:
+                        request.error = e
+                        request.done.set()
+                    continue
+                start = 0
+                for request in group:
+                    request.result = predictions[start:start + len(request.eyes)]
+                    start += len(request.eyes)
+                    request.done.set()
+                with self._stats_lock:
+                    self.batches += 1
+                    self.eyes_processed += len(eyes)
+        # Release callers that are still waiting
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request.error = RuntimeError('EyeNetBatcher stopped')
+                request.done.set()
+
+    def stats(self):
+        with self._stats_lock:
+            batches, eyes = self.batches, self.eyes_processed
+        return {
+            'batches': batches,
+            'eyes': eyes,
+            'mean_batch_size': eyes / batches if batches else 0.0,
+        }
@@ -0,0 +1,256 @@
+"""EyeNet as a local service over a Unix domain socket.
+
+``eyenet_server.py`` loads the model once and serves any number of vision
+processes; :class:`RemoteBackend` is their ``run_eyenet``. Requests from all
+connections go through one :class:`backends.batcher.EyeNetBatcher`, so
+clients that send at the same time share an inference batch.
+
+Wire format (little endian), one request and one response per call:
+
+    request:  b'ENQ1', n (u32), ow (u16), oh (u16)
+              is_left (n x u8), transform_inv (n x 2 x 3 f8), crops (n x oh x ow u8)
+    response: b'ENR1', status (u32), n (u32)
+              status 0: landmarks (n x 34 x 2 f8), gaze (n x 2 f4)
+              status 1: message length (u32), utf-8 message
+"""
+import os
+import socket
+import socketserver
+import struct
+import threading
+from typing import List
+
+import numpy as np
+
+from backends import DEFAULT_SOCKET_PATH
+from util.eye_prediction import EyePrediction
+from util.eye_sample import EyeSample
+
+# Windows Python'da AF_UNIX yok: modül yine import edilir, sunucu ve istemci açıkça hata verir
+UNIX_SOCKETS_AVAILABLE = hasattr(socket, 'AF_UNIX') and hasattr(socketserver, 'UnixStreamServer')
+
+REQUEST_MAGIC = b'ENQ1'
+RESPONSE_MAGIC = b'ENR1'
+REQUEST_HEADER = struct.Struct('<4sIHH')
+RESPONSE_HEADER = struct.Struct('<4sII')
+ERROR_LENGTH = struct.Struct('<I')
+STATUS_OK = 0
+STATUS_ERROR = 1
+MAX_EYES_PER_REQUEST = 64
+# EyeNet giriş boyutu; başka boyutlar reddedilir (istemcinin verdiği boyutla tampon ayrılmaz)
+CROP_WIDTH, CROP_HEIGHT = 160, 96
+
+
+def require_unix_sockets():
+    """Raise RuntimeError on platforms without Unix domain sockets."""
+    if not UNIX_SOCKETS_AVAILABLE:
+        raise RuntimeError('The remote EyeNet backend needs Unix domain sockets, which this platform does not '
+                           'provide. Use the torch or onnx backend instead.')
+
+
+def _recv_exact(sock, size):
+    """Read exactly ``size`` bytes into a new buffer, ``None`` if the peer closed before the first byte."""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            if received == 0:
+                return None
+            raise ConnectionError('connection closed in the middle of a message')
+        received += count
+    return buffer
+
+
+def _recv_body(sock, size):
+    """Read the rest of a message whose header was already received."""
+    body = _recv_exact(sock, size)
+    if body is None:
+        raise ConnectionError('connection closed in the middle of a message')
+    return body
+
+
+def encode_request(eyes: List[EyeSample], ow=160, oh=96):
+    n = len(eyes)
+    crop_size = oh * ow
+    message = bytearray(REQUEST_HEADER.size + n + 48 * n + n * crop_size)
+    REQUEST_HEADER.pack_into(message, 0, REQUEST_MAGIC, n, ow, oh)
+    offset = REQUEST_HEADER.size
+    np.frombuffer(message, np.uint8, n, offset)[:] = [eye.is_left for eye in eyes]
+    offset += n
+    transforms = np.frombuffer(message, np.float64, 6 * n, offset).reshape(n, 2, 3)
+    crops = np.frombuffer(message, np.uint8, n * crop_size, offset + 48 * n).reshape(n, oh, ow)
+    for i, eye in enumerate(eyes):
+        transforms[i] = np.asarray(eye.transform_inv)[:2]
+        crops[i] = eye.img
+    return message
+
+
+def decode_request(sock):
+    """Read one request, returns ``(eyes, ow, oh)`` or ``None`` when the client disconnected."""
+    header = _recv_exact(sock, REQUEST_HEADER.size)
+    if header is None:
+        return None
+    magic, n, ow, oh = REQUEST_HEADER.unpack(header)
+    if magic != REQUEST_MAGIC or n > MAX_EYES_PER_REQUEST:
+        raise ValueError(f'invalid EyeNet request header {bytes(header)!r}')
+    if (ow, oh) != (CROP_WIDTH, CROP_HEIGHT):
+        raise ValueError(f'unsupported eye crop size {ow}x{oh}, expected {CROP_WIDTH}x{CROP_HEIGHT}')
+    body = _recv_body(sock, n + 48 * n + n * oh * ow)
+    is_left = np.frombuffer(body, np.uint8, n, 0)
+    transforms = np.frombuffer(body, np.float64, 6 * n, n).reshape(n, 2, 3)
+    crops = np.frombuffer(body, np.uint8, n * oh * ow, n + 48 * n).reshape(n, oh, ow)
+    eyes = [EyeSample(orig_img=None, img=crops[i], is_left=bool(is_left[i]), transform_inv=transforms[i],
+                      estimated_radius=None)
+            for i in range(n)]
+    return eyes, ow, oh
+
+
+def encode_response(predictions: List[EyePrediction]):
+    n = len(predictions)
+    message = bytearray(RESPONSE_HEADER.size + n * 34 * 2 * 8 + n * 2 * 4)
+    RESPONSE_HEADER.pack_into(message, 0, RESPONSE_MAGIC, STATUS_OK, n)
+    offset = RESPONSE_HEADER.size
+    landmarks = np.frombuffer(message, np.float64, n * 68, offset).reshape(n, 34, 2)
+    gaze = np.frombuffer(message, np.float32, n * 2, offset + n * 68 * 8).reshape(n, 2)
+    for i, prediction in enumerate(predictions):
+        landmarks[i] = prediction.landmarks
+        gaze[i] = prediction.gaze
+    return message
+
+
+def encode_error(message):
+    encoded = str(message).encode('utf-8')
+    return RESPONSE_HEADER.pack(RESPONSE_MAGIC, STATUS_ERROR, 0) + ERROR_LENGTH.pack(len(encoded)) + encoded
+
+
+def decode_response(sock, eyes: List[EyeSample]) -> List[EyePrediction]:
+    header = _recv_exact(sock, RESPONSE_HEADER.size)
+    if header is None:
+        raise ConnectionError('EyeNet server closed the connection')
+    magic, status, n = RESPONSE_HEADER.unpack(header)
+    if magic != RESPONSE_MAGIC:
+        raise ValueError(f'invalid EyeNet response header {bytes(header)!r}')
+    if status != STATUS_OK:
+        length, = ERROR_LENGTH.unpack(_recv_body(sock, ERROR_LENGTH.size))
+        raise RuntimeError(f'EyeNet server: {_recv_body(sock, length).decode("utf-8")}')
+    if n != len(eyes):
+        raise ValueError(f'EyeNet server returned {n} predictions for {len(eyes)} eyes')
+    body = _recv_body(sock, n * 68 * 8 + n * 2 * 4)
+    landmarks = np.frombuffer(body, np.float64, n * 68, 0).reshape(n, 34, 2)
+    gaze = np.frombuffer(body, np.float32, n * 2, n * 68 * 8).reshape(n, 2)
+    return [EyePrediction(eye_sample=eye, landmarks=landmarks[i], gaze=gaze[i]) for i, eye in enumerate(eyes)]
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        sock = self.request
+        run_eyenet = self.server.run_eyenet
+        while True:
+            try:
+                request = decode_request(sock)
+            except (ValueError, ConnectionError) as e:
+                # Bozuk mesajdan sonra akış senkronize değildir, bağlantı kapatılır
+                try:
+                    sock.sendall(encode_error(e))
+                except OSError:
+                    pass
+                return
+            if request is None:
+                return
+            eyes, ow, oh = request
+            try:
+                response = encode_response(run_eyenet(eyes, ow=ow, oh=oh))
+            except Exception as e:  # model hatası istemciye iletilir, bağlantı açık kalır
+                response = encode_error(e)
+            sock.sendall(response)
+
+
+class EyeNetSocketServer(socketserver.ThreadingMixIn,
+                         socketserver.UnixStreamServer if UNIX_SOCKETS_AVAILABLE else socketserver.BaseServer):
+    """Serves ``run_eyenet`` on a Unix domain socket, one thread per client connection.
+
+    Args:
+        socket_path: path of the socket file, an existing file is replaced.
+        run_eyenet: usually :meth:`backends.batcher.EyeNetBatcher.run_eyenet`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, run_eyenet):
+        require_unix_sockets()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.socket_path = socket_path
+        self.run_eyenet = run_eyenet
+        super().__init__(socket_path, _Handler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class RemoteBackend:
+    """``run_eyenet`` of an ``eyenet_server.py`` process.
+
+    The connection is opened on the first call and reopened once if the
+    server restarted. Calls from several threads are serialized on the one
+    connection.
+
+    Args:
+        model_path: socket path of the server (named like the other backends
+            for :func:`backends.create_backend`).
+        timeout: seconds to wait for a response.
+    """
+
+    def __init__(self, model_path=DEFAULT_SOCKET_PATH, timeout=5.0):
+        require_unix_sockets()
+        self.socket_path = model_path
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise ConnectionError(f'EyeNet server not reachable at {self.socket_path}, '
+                                  f'start it with eyenet_server.py ({e})') from e
+        return sock
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+    def run_eyenet(self, eyes: List[EyeSample], ow=160, oh=96) -> List[EyePrediction]:
+        if not eyes:
+            return []
+        message = encode_request(eyes, ow, oh)
+        with self._lock:
+            for attempt in range(2):
+                if self._sock is None:
+                    self._sock = self._connect()
+                try:
+                    self._sock.sendall(message)
+                    return decode_response(self._sock, eyes)
+                except RuntimeError:
+                    raise  # sunucu tarafı hata, bağlantı kullanılabilir durumda
+                except ConnectionError:
+                    # Sunucu yeniden başlamış olabilir: bir kez yeniden bağlan
+                    self._sock.close()
+                    self._sock = None
+                    if attempt == 1:
+                        raise
+                except (OSError, ValueError):
+                    # Zaman aşımı veya bozuk yanıt: akış senkronize değil
+                    self._sock.close()
+                    self._sock = None
+                    raise
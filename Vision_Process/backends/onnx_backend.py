@@ -0,0 +1,35 @@
+import os
+
+import onnxruntime as ort
+
+from backends.base import EyeNetBackend
+
+
+class OnnxBackend(EyeNetBackend):
+    """ONNX Runtime execution of an EyeNet exported with ``export_onnx.py``.
+
+    Does not import torch.
+
+    Args:
+        model_path: ``.onnx`` file with an ``imgs`` input and ``landmarks``/``gaze`` outputs.
+        threads: intra-op threads (``None`` lets ONNX Runtime decide).
+        providers: execution providers, defaults to CPU.
+    """
+
+    def __init__(self, model_path='eyenet.onnx', threads=None, providers=None):
+        super(OnnxBackend, self).__init__()
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f'{model_path} not found, create it with export_onnx.py')
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=providers or ['CPUExecutionProvider'])
+        self._input_name = self.session.get_inputs()[0].name
+
+    def infer(self, batch):
+        landmarks, gaze = self.session.run(['landmarks', 'gaze'], {self._input_name: batch})
+        return landmarks, gaze
@@ -0,0 +1,32 @@
+import torch
+
+from backends.base import EyeNetBackend
+from models.inference import load_inference_model
+
+
+class TorchBackend(EyeNetBackend):
+    """PyTorch execution of EyeNet.
+
+    Args:
+        model_path: ``checkpoint.pt`` or a TorchScript model, see
+            :func:`models.inference.load_inference_model`.
+        engine: ``'eager'``, ``'folded'`` or ``'int8'``.
+        device: torch device, defaults to CUDA when available.
+        threads: number of torch CPU threads (``None`` keeps the default).
+    """
+
+    def __init__(self, model_path='checkpoint.pt', engine='eager', device=None, threads=None):
+        super(TorchBackend, self).__init__()
+        torch.backends.cudnn.enabled = True
+        torch.backends.cudnn.benchmark = True
+        if threads:
+            torch.set_num_threads(threads)
+        if device is None:
+            device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+        self.device = torch.device(device)
+        self.model = load_inference_model(model_path, self.device, engine=engine)
+
+    def infer(self, batch):
+        with torch.inference_mode():
+            landmarks, gaze = self.model(torch.from_numpy(batch).to(self.device))
+            return landmarks.cpu().numpy(), gaze.cpu().numpy()
@@ -0,0 +1,56 @@
+"""Micro-benchmark of heatmap target generation.
+
+Compares the per-landmark ``gaussian_2d`` loop with the batched numpy and
+torch renderers of :mod:`util.heatmaps` on random landmarks, and checks
+that they agree.
+
+    python benchmark_heatmaps.py --batch-size 32
+"""
+import argparse
+
+import numpy as np
+import torch
+
+from util.benchmark import measure_latency
+from util.heatmaps import HEATMAP_H, HEATMAP_W, render_heatmaps, render_heatmaps_torch
+from util.preprocess import gaussian_2d
+
+
+def per_landmark(landmarks):
+    return np.array([[gaussian_2d(HEATMAP_W, HEATMAP_H, cx=x, cy=y, sigma=2.0) for (y, x) in sample]
+                     for sample in landmarks])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--iters', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    landmarks = (rng.random((args.batch_size, 34, 2)) * [HEATMAP_H, HEATMAP_W]).astype(np.float32)
+    candidates = [('gaussian_2d loop', per_landmark, landmarks),
+                  ('numpy batched', render_heatmaps, landmarks),
+                  ('torch cpu batched', render_heatmaps_torch, torch.from_numpy(landmarks))]
+    if torch.cuda.is_available():
+        def on_cuda(x):
+            out = render_heatmaps_torch(x)
+            torch.cuda.synchronize()
+            return out
+        candidates.append(('torch cuda batched', on_cuda, torch.from_numpy(landmarks).cuda()))
+
+    reference = per_landmark(landmarks)
+    baseline = None
+    print(f'batch {args.batch_size} x 34 landmarks, {HEATMAP_H}x{HEATMAP_W} heatmaps')
+    print(f'  {"":<20}{"mean ms":>10}{"p95 ms":>10}{"speedup":>10}{"max err":>10}')
+    for name, fn, x in candidates:
+        out = fn(x)
+        out = out.cpu().numpy() if isinstance(out, torch.Tensor) else out
+        latency = measure_latency(fn, x, warmup=3, iters=args.iters)
+        baseline = baseline or latency['mean_ms']
+        print(f'  {name:<20}{latency["mean_ms"]:>10.3f}{latency["p95_ms"]:>10.3f}'
+              f'{baseline / latency["mean_ms"]:>9.1f}x{np.abs(out - reference).max():>10.1e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Per-stage latency benchmark of the webcam attention pipeline on a recorded clip.
+
+Runs ``run_with_webcam.main`` headless over a frame source (processed as fast
+as possible, every frame in order). It prints a per-stage table and writes a
+JSON report. Run it once per backend/setting and compare the reports.
+
+    python benchmark_pipeline.py --source clip.mp4 --backend onnx --output bench_onnx.json
+    python benchmark_pipeline.py --source clip.mp4 --engine folded --output bench_folded.json
+"""
+import argparse
+import json
+import platform
+import time
+
+import run_with_webcam
+from backends import BACKENDS
+from util.frame_source import open_source
+from util.stage_timer import StageTimer, format_summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', required=True,
+                        help='video file, image directory or synthetic:<frames> (see util.frame_source)')
+    parser.add_argument('--backend', default='torch', choices=BACKENDS)
+    parser.add_argument('--model', default=None)
+    parser.add_argument('--engine', default='eager')
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--max-frames', type=int, default=None)
+    parser.add_argument('--fps', type=float, default=None, help='frame rate of the clip timestamps')
+    parser.add_argument('--output', default='pipeline_benchmark.json')
+    args = parser.parse_args()
+
+    # Keep every sample instead of a rolling window
+    timer = run_with_webcam.stage_timer = StageTimer(window=None)
+    source = open_source(args.source, realtime=False, fps=args.fps)
+
+    start = time.perf_counter()
+    run_with_webcam.main(headless=True, backend=args.backend, model_path=args.model, engine=args.engine,
+                         threads=args.threads, source=source, serve=False, max_frames=args.max_frames)
+    elapsed = time.perf_counter() - start
+
+    stages = timer.summary()
+    frames = stages.get(StageTimer.FRAME, {}).get('count', 0)
+    report = {
+        'source': args.source,
+        'backend': args.backend,
+        'model': args.model or run_with_webcam.DEFAULT_MODELS[args.backend],
+        'engine': args.engine,
+        'threads': args.threads,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'frames': frames,
+        'elapsed_sec': elapsed,
+        'throughput_fps': frames / elapsed if elapsed > 0 else 0.0,
+        'stages': stages,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f'{frames} frames in {elapsed:.1f}s ({report["throughput_fps"]:.1f} fps), '
+          f'backend {args.backend}, engine {args.engine}')
+    print(format_summary(stages))
+    print(f'Saved {args.output}')
+
+
+if __name__ == '__main__':
+    main()
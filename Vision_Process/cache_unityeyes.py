@@ -0,0 +1,30 @@
+"""Convert UnityEyes images into the sharded training cache.
+
+The JPEG decoding, json parsing and eye-centred cropping run once here.
+Training then reads :class:`datasets.unity_eyes.UnityEyesCache`, which
+only applies the random shift and blur per sample.
+
+    python cache_unityeyes.py --img-dir datasets/UnityEyes/imgs --output datasets/UnityEyes/cache
+"""
+import argparse
+import os
+import time
+
+from datasets.unity_eyes import build_unityeyes_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--img-dir', default='datasets/UnityEyes/imgs')
+    parser.add_argument('--output', default='datasets/UnityEyes/cache')
+    parser.add_argument('--shard-size', type=int, default=10000, help='samples per shard')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='shards converted in parallel')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n = build_unityeyes_cache(args.img_dir, args.output, shard_size=args.shard_size, workers=args.workers)
+    print(f'{n} samples written to {args.output} in {time.perf_counter() - start:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
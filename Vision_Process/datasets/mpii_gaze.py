@@ -6,37 +6,89 @@ import glob
 import os
 import cv2
 import scipy.io as sio
+from concurrent.futures import ProcessPoolExecutor
 import util.gaze
 
+# Önişlenmiş değerlendirme alt kümesi (bkz. build_mpii_cache)
+CACHE_INDEX_DTYPE = np.dtype([('person', 'U8'), ('day', 'U8'), ('img_name', 'U16'), ('side', 'U5')])
+
+
+def read_eval_entries(mpii_dir):
+    eval_files = sorted(glob.glob(f'{mpii_dir}/Evaluation Subset/sample list for eye image/*.txt'))
+
+    eval_entries = []
+    for ef in eval_files:
+        person = os.path.splitext(os.path.basename(ef))[0]
+        with open(ef) as f:
+            lines = f.readlines()
+            for line in lines:
+                line = line.strip()
+                if line != '':
+                    img_path, side = [x.strip() for x in line.split()]
+                    day, img = img_path.split('/')
+                    eval_entries.append({
+                        'day': day,
+                        'img_name': img,
+                        'person': person,
+                        'side': side
+                    })
+    return eval_entries
+
+
+def preprocess_eye(img, side):
+    """Normalized MPIIGaze eye image -> 96x160 uint8, histogram equalized, right eyes mirrored."""
+    img = cv2.resize(img, (160, 96))
+    img = cv2.equalizeHist(img)
+    if side == 'right':
+        img = np.fliplr(img)
+    return img
+
+
+def gaze_to_pitchyaw(gaze_vector):
+    (x, y, z) = gaze_vector
+    theta = np.arcsin(-y)
+    phi = np.arctan2(-x, -z)
+    return np.array([-theta, phi])
+
+
+def _as_str(value):
+    # .mat hücre dizileri iç içe (1,) dizilerdir
+    while isinstance(value, np.ndarray):
+        value = value.ravel()[0]
+    return str(value)
+
+
+def to_float_image(img):
+    return (img / 255.).astype(np.float32)
+
+
+def load_day(mpii_dir, person, day):
+    """Images and gaze vectors of one per-day ``.mat`` file, and a filename -> row lookup."""
+    mat_path = os.path.join(mpii_dir, 'Data/Normalized', person, day + '.mat')
+    mat = sio.loadmat(mat_path)
+    rows = {_as_str(name): row for row, name in enumerate(mat['filenames'])}
+    sides = {side: (mat['data'][side][0, 0]['image'][0, 0], mat['data'][side][0, 0]['gaze'][0, 0])
+             for side in ('left', 'right')}
+    return rows, sides
+
 
 class MPIIGaze(Dataset):
 
     def __init__(self, mpii_dir: str = 'datasets/MPIIGaze'):
 
         self.mpii_dir = mpii_dir
-
-        eval_files = glob.glob(f'{mpii_dir}/Evaluation Subset/sample list for eye image/*.txt')
-
-        self.eval_entries = []
-        for ef in eval_files:
-            person = os.path.splitext(os.path.basename(ef))[0]
-            with open(ef) as f:
-                lines = f.readlines()
-                for line in lines:
-                    line = line.strip()
-                    if line != '':
-                        img_path, side = [x.strip() for x in line.split()]
-                        day, img = img_path.split('/')
-                        self.eval_entries.append({
-                            'day': day,
-                            'img_name': img,
-                            'person': person,
-                            'side': side
-                        })
+        self.eval_entries = read_eval_entries(mpii_dir)
+        # Örnek listeleri gün gün sıralı: son açılan .mat dosyası tekrar kullanılır
+        self._day_key = None
+        self._day = None
 
     def __len__(self):
         return len(self.eval_entries)
 
+    @property
+    def persons(self):
+        return np.array([entry['person'] for entry in self.eval_entries])
+
     def __getitem__(self, idx):
         if torch.is_tensor(idx):
             idx = idx.tolist()
@@ -45,29 +97,115 @@ class MPIIGaze(Dataset):
 
     def _load_sample(self, i):
         entry = self.eval_entries[i]
-        mat_path = os.path.join(self.mpii_dir, 'Data/Normalized', entry['person'], entry['day'] + '.mat')
-        mat = sio.loadmat(mat_path)
+        day_key = (entry['person'], entry['day'])
+        if day_key != self._day_key:
+            self._day = load_day(self.mpii_dir, entry['person'], entry['day'])
+            self._day_key = day_key
+        rows, sides = self._day
 
-        filenames = mat['filenames']
-        row = np.argwhere(filenames == entry['img_name'])[0][0]
+        row = rows[entry['img_name']]
         side = entry['side']
+        images, gazes = sides[side]
 
-        img = mat['data'][side][0, 0]['image'][0, 0][row]
-        img = cv2.resize(img, (160, 96))
-        img = cv2.equalizeHist(img)
-        img = img / 255.
-        img = img.astype(np.float32)
-        if side == 'right':
-            img = np.fliplr(img)
-
-        (x, y, z) = mat['data'][side][0, 0]['gaze'][0, 0][row]
-
-        theta = np.arcsin(-y)
-        phi = np.arctan2(-x, -z)
-        gaze = np.array([-theta, phi])
+        img = np.ascontiguousarray(to_float_image(preprocess_eye(images[row], side)))
 
         return {
             'img': img,
-            'gaze': gaze,
+            'gaze': gaze_to_pitchyaw(gazes[row]),
             'side': side
         }
+
+
+def _preprocess_day(mpii_dir, person, day, entries):
+    rows, sides = load_day(mpii_dir, person, day)
+    indices = np.array([i for i, _, _ in entries])
+    imgs = np.empty((len(entries), 96, 160), dtype=np.uint8)
+    gaze = np.empty((len(entries), 2))
+    for j, (_, img_name, side) in enumerate(entries):
+        images, gazes = sides[side]
+        row = rows[img_name]
+        imgs[j] = preprocess_eye(images[row], side)
+        gaze[j] = gaze_to_pitchyaw(gazes[row])
+    return indices, imgs, gaze
+
+
+def build_mpii_cache(mpii_dir, cache_dir, workers=None, verbose=True):
+    """Preprocess the MPIIGaze evaluation subset once into memory-mappable ``.npy`` files.
+
+    ``images.npy`` (N x 96 x 160 uint8, equalized and mirrored like
+    :class:`MPIIGaze`), ``gaze.npy`` (N x 2 pitch/yaw) and ``index.npy``
+    (person, day, image name, side) are written in the sample order of
+    :class:`MPIIGaze`. Each per-day ``.mat`` file is read once, days are
+    processed in ``workers`` processes. ``index.npy`` is written last and
+    marks a complete cache.
+    """
+    entries = read_eval_entries(mpii_dir)
+    if not entries:
+        raise FileNotFoundError(f'no MPIIGaze evaluation subset found in {mpii_dir}')
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, 'index.npy')
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    days = {}
+    for i, entry in enumerate(entries):
+        days.setdefault((entry['person'], entry['day']), []).append((i, entry['img_name'], entry['side']))
+
+    n = len(entries)
+    images = np.lib.format.open_memmap(os.path.join(cache_dir, 'images.npy'), mode='w+', dtype=np.uint8,
+                                       shape=(n, 96, 160))
+    gaze = np.lib.format.open_memmap(os.path.join(cache_dir, 'gaze.npy'), mode='w+', dtype=np.float64,
+                                     shape=(n, 2))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_preprocess_day, mpii_dir, person, day, day_entries)
+                   for (person, day), day_entries in days.items()]
+        for done, future in enumerate(futures, 1):
+            indices, day_images, day_gaze = future.result()
+            images[indices] = day_images
+            gaze[indices] = day_gaze
+            if verbose and (done % 50 == 0 or done == len(futures)):
+                print(f'{done}/{len(futures)} days')
+    images.flush()
+    gaze.flush()
+    del images, gaze
+
+    index = np.array([(e['person'], e['day'], e['img_name'], e['side']) for e in entries], dtype=CACHE_INDEX_DTYPE)
+    np.save(index_path, index)
+    return n
+
+
+def is_mpii_cache(cache_dir):
+    return os.path.exists(os.path.join(cache_dir, 'index.npy'))
+
+
+class MPIIGazeCache(Dataset):
+    """The MPIIGaze evaluation subset from :func:`build_mpii_cache`, memory mapped.
+
+    Samples are the same as :class:`MPIIGaze`. ``images``, ``gaze`` and
+    ``index`` are the mapped arrays for batched access without a DataLoader.
+    """
+
+    def __init__(self, cache_dir: str = 'datasets/MPIIGaze_cache'):
+        if not is_mpii_cache(cache_dir):
+            raise FileNotFoundError(f'{cache_dir} is not an MPIIGaze cache, create it with build_mpii_cache')
+        self.cache_dir = cache_dir
+        self.index = np.load(os.path.join(cache_dir, 'index.npy'))
+        self.images = np.load(os.path.join(cache_dir, 'images.npy'), mmap_mode='r')
+        self.gaze = np.load(os.path.join(cache_dir, 'gaze.npy'), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def persons(self):
+        return self.index['person']
+
+    def __getitem__(self, idx):
+        if torch.is_tensor(idx):
+            idx = idx.tolist()
+
+        return {
+            'img': to_float_image(self.images[idx]),
+            'gaze': np.array(self.gaze[idx]),
+            'side': str(self.index['side'][idx])
+        }
@@ -10,7 +10,9 @@ import glob
 import os
 import cv2
 import json
-from util.preprocess import preprocess_unityeyes_image
+from concurrent.futures import ProcessPoolExecutor
+from util.preprocess import (MAX_SHIFT, preprocess_unityeyes_image, random_augmentation, shift_transform,
+                             training_sample, unityeyes_geometry)
 
 
 class UnityEyesDataset(Dataset):
@@ -41,4 +43,132 @@ class UnityEyesDataset(Dataset):
         eye_sample = preprocess_unityeyes_image(full_img, json_data)
         sample = {'full_img': full_img, 'json_data': json_data }
         sample.update(eye_sample)
-        return sample
\ No newline at end of file
+        return sample
+
+# Önbellekteki kırpıntılar rastgele kaydırma için her kenardan bu kadar geniş tutulur
+CACHE_PAD = MAX_SHIFT + 2
+CACHE_ARRAYS = ('crops', 'landmarks', 'transform', 'eye_middle', 'gaze')
+
+
+def _write_shard(shard_dir, img_paths, json_paths, ow=160, oh=96):
+    n = len(img_paths)
+    pad = CACHE_PAD
+    crops = np.empty((n, oh + 2 * pad, ow + 2 * pad), dtype=np.uint8)
+    landmarks = np.empty((n, 34, 2))
+    transforms = np.empty((n, 3, 3))
+    eye_middles = np.empty((n, 2))
+    gazes = np.empty((n, 2), dtype=np.float32)
+    for i, (img_path, json_path) in enumerate(zip(img_paths, json_paths)):
+        img = cv2.cvtColor(cv2.imread(img_path), cv2.COLOR_BGR2GRAY)
+        with open(json_path) as f:
+            json_data = json.load(f)
+        ih, iw = img.shape[:2]
+        transform, eye_middle, landmarks[i], gazes[i] = unityeyes_geometry(json_data, ih, iw, ow, oh)
+        crops[i] = cv2.warpAffine(img, shift_transform(transform, pad, pad)[:2], (ow + 2 * pad, oh + 2 * pad))
+        transforms[i] = transform
+        eye_middles[i] = eye_middle
+    os.makedirs(shard_dir, exist_ok=True)
+    for name, array in zip(CACHE_ARRAYS, (crops, landmarks, transforms, eye_middles, gazes)):
+        np.save(os.path.join(shard_dir, f'{name}.npy'), array)
+    return n
+
+
+def build_unityeyes_cache(img_dir, cache_dir, shard_size=10000, workers=None, verbose=True):
+    """Write the deterministic part of the UnityEyes preprocessing into memory-mappable shards.
+
+    Each ``shard_XXXXX`` directory holds up to ``shard_size`` samples:
+    grayscale eye-centred crops with a :data:`CACHE_PAD` border for the
+    random shift (uint8), landmarks in image coordinates, the unshifted
+    3x3 transforms, eye middles and gazes. Shards are converted in
+    ``workers`` processes, ``index.json`` is written last.
+    """
+    dataset = UnityEyesDataset(img_dir)
+    if len(dataset) == 0:
+        raise FileNotFoundError(f'no UnityEyes images found in {img_dir}')
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, 'index.json')
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    shards = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for start in range(0, len(dataset), shard_size):
+            name = f'shard_{start // shard_size:05d}'
+            shards.append(name)
+            futures.append(pool.submit(_write_shard, os.path.join(cache_dir, name),
+                                       dataset.img_paths[start:start + shard_size],
+                                       dataset.json_paths[start:start + shard_size]))
+        counts = []
+        for name, future in zip(shards, futures):
+            counts.append(future.result())
+            if verbose:
+                print(f'{name}: {counts[-1]} samples')
+
+    with open(index_path, 'w') as f:
+        json.dump({'shard_size': shard_size, 'pad': CACHE_PAD, 'ow': 160, 'oh': 96,
+                   'shards': [{'name': name, 'count': count} for name, count in zip(shards, counts)]}, f, indent=2)
+    return sum(counts)
+
+
+class UnityEyesCache(Dataset):
+    """Drop-in :class:`UnityEyesDataset` over a :func:`build_unityeyes_cache` directory.
+
+    Samples have the same training keys (``img``, ``transform``,
+    ``transform_inv``, ``eye_middle``, ``heatmaps``, ``landmarks``, ``gaze``)
+    but not ``full_img``/``json_data``. The random shift is applied to the
+    stored crop, so only a 160x96 warp, blur and equalization run per sample.
+
+    Args:
+        cache_dir: output of :func:`build_unityeyes_cache`.
+        augment: random shift and blur like the on-the-fly preprocessing,
+            False gives the deterministic centred crop.
+        heatmaps: render heatmaps per sample; False leaves them to
+            :class:`util.heatmaps.HeatmapCollate` or the training device.
+    """
+
+    def __init__(self, cache_dir: str = 'datasets/UnityEyes/cache', augment=True, heatmaps=True):
+        index_path = os.path.join(cache_dir, 'index.json')
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f'{cache_dir} is not a UnityEyes cache, create it with cache_unityeyes.py')
+        with open(index_path) as f:
+            self.meta = json.load(f)
+        self.cache_dir = cache_dir
+        self.augment = augment
+        self.heatmaps = heatmaps
+        self.shard_size = self.meta['shard_size']
+        self._length = sum(shard['count'] for shard in self.meta['shards'])
+        # Shard'lar ilk kullanımda eşlenir (her DataLoader worker'ı kendi eşlemesini açar)
+        self._shards = {}
+
+    def __len__(self):
+        return self._length
+
+    def _shard(self, i):
+        shard = self._shards.get(i)
+        if shard is None:
+            shard_dir = os.path.join(self.cache_dir, self.meta['shards'][i]['name'])
+            shard = {name: np.load(os.path.join(shard_dir, f'{name}.npy'), mmap_mode='r') for name in CACHE_ARRAYS}
+            self._shards[i] = shard
+        return shard
+
+    def __getitem__(self, idx):
+        if torch.is_tensor(idx):
+            idx = idx.tolist()
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+
+        shard = self._shard(idx // self.shard_size)
+        i = idx % self.shard_size
+        ow, oh, pad = self.meta['ow'], self.meta['oh'], self.meta['pad']
+
+        rand_x, rand_y, rand_blur = random_augmentation() if self.augment else (0.0, 0.0, None)
+        # Kayık kırpıntı = önbellekteki geniş kırpıntının (pad - kayma) kadar ötelenmiş hali
+        shift = np.array([[1.0, 0.0, rand_x - pad], [0.0, 1.0, rand_y - pad]])
+        eye = cv2.warpAffine(np.asarray(shard['crops'][i]), shift, (ow, oh))
+        transform = shift_transform(np.asarray(shard['transform'][i]), rand_x, rand_y)
+        return training_sample(eye, transform, np.array(shard['eye_middle'][i]), np.asarray(shard['landmarks'][i]),
+                               np.array(shard['gaze'][i]), blur_sigma=rand_blur, ow=ow, oh=oh,
+                               heatmaps=self.heatmaps)
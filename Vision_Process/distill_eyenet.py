@@ -0,0 +1,167 @@
+"""Distill smaller EyeNet variants from checkpoint.pt and publish a CPU speed/accuracy table.
+
+Each variant is named ``s{nstack}f{nfeatures}d{hourglass_depth}w{stem_width}``
+(the original EyeNet is ``s3f32d4w128``). It is trained with
+``train_eyenet.py --teacher`` on the UnityEyes cache into
+``<output-dir>/<variant>/`` in the ``checkpoint.pt`` format. Then every
+variant and the teacher are measured on this machine's CPU: latency of a
+batch of both eyes, MPIIGaze error (when the dataset is available) and the
+angular gaze difference to the teacher on UnityEyes crops. The table is
+printed and written to ``<output-dir>/variants.json``.
+
+    python distill_eyenet.py --teacher checkpoint.pt --output-dir runs/lite --epochs 3
+    python distill_eyenet.py --teacher checkpoint.pt --output-dir runs/lite --table-only --threads 2
+    python run_with_webcam.py --variants runs/lite/variants.json --latency-budget-ms 40
+
+Arguments not listed here (``--epochs``, ``--batch-size``, ``--workers``,
+...) are passed to ``train_eyenet.py``. Training resumes, so an interrupted
+run can be restarted with the same command. Latency depends on the
+machine: rerun with ``--table-only`` where the app runs.
+"""
+import argparse
+import os
+import platform
+import time
+
+import numpy as np
+import torch
+
+import train_eyenet
+from datasets.unity_eyes import UnityEyesCache
+from eval_mpiigaze import evaluate, load_dataset
+from models.eyenet import architecture, load_checkpoint
+from models.inference import load_inference_model
+from util.benchmark import measure_latency
+import util.gaze
+from util.variants import format_variants, parse_variant, save_variants, variant_name
+
+DEFAULT_VARIANTS = ['s2f32d4w64', 's1f32d3w32', 's1f16d3w32']
+
+
+def variant_checkpoint(output_dir, name):
+    """``best.pt`` of a variant when MPIIGaze selected one, otherwise its last ``checkpoint.pt``."""
+    best = os.path.join(output_dir, name, 'best.pt')
+    return best if os.path.exists(best) else os.path.join(output_dir, name, 'checkpoint.pt')
+
+
+def load_time(path, engine, repeats=3):
+    """Median time (ms) to load ``path`` into an inference model, as the app does at startup."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        load_inference_model(path, torch.device('cpu'), engine=engine)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def predict_gaze(model, images, batch_size=64):
+    gaze = []
+    with torch.no_grad():
+        for start in range(0, len(images), batch_size):
+            _, batch_gaze = model(torch.from_numpy(images[start:start + batch_size]))
+            gaze.append(batch_gaze.numpy())
+    return np.concatenate(gaze).astype(np.float64)
+
+
+def unityeyes_images(cache_dir, n):
+    """The first ``n`` un-augmented UnityEyes crops of the cache, None without a cache."""
+    if not os.path.exists(os.path.join(cache_dir, 'index.json')):
+        return None
+    dataset = UnityEyesCache(cache_dir, augment=False, heatmaps=False)
+    return np.stack([dataset[i]['img'] for i in range(min(n, len(dataset)))])
+
+
+def measure_variants(paths, teacher_path, engine='folded', batch_size=2, iters=30, mpii=None, mpii_samples=None,
+                     images=None):
+    """One table row per checkpoint in ``paths`` (the teacher included), measured on the CPU."""
+    device = torch.device('cpu')
+    teacher = load_inference_model(teacher_path, device, engine=engine)
+    teacher_gaze = predict_gaze(teacher, images) if images is not None else None
+    rows = []
+    for path in paths:
+        eyenet = load_checkpoint(path, device)
+        model = teacher if path == teacher_path else load_inference_model(path, device, engine=engine)
+        with torch.no_grad():
+            latency = measure_latency(model, torch.rand(batch_size, 96, 160), warmup=5, iters=iters)
+        row = dict(architecture(eyenet), name=variant_name(architecture(eyenet)), path=path,
+                   params=sum(p.numel() for p in eyenet.parameters()), load_ms=load_time(path, engine),
+                   latency_ms=latency['mean_ms'], p95_ms=latency['p95_ms'], mpii_error=None, teacher_error=None)
+        if mpii is not None:
+            row['mpii_error'] = float(np.mean(evaluate(model, mpii, device, limit=mpii_samples)))
+        if teacher_gaze is not None:
+            row['teacher_error'] = float(np.mean(util.gaze.angular_error(predict_gaze(model, images), teacher_gaze)))
+        rows.append(row)
+        print(f"{row['name']}: {row['latency_ms']:.1f} ms")
+    return rows
+
+
+def add_table_arguments(parser):
+    """Options of :func:`publish_table`."""
+    parser.add_argument('--unityeyes-cache', default='datasets/UnityEyes/cache')
+    parser.add_argument('--mpii-dir', default='datasets/MPIIGaze')
+    parser.add_argument('--mpii-cache', default='datasets/MPIIGaze_cache')
+    parser.add_argument('--engine', default='folded', choices=['eager', 'folded'],
+                        help='engine the latencies are measured with (used by run_with_webcam.py)')
+    parser.add_argument('--threads', type=int, default=None, help='torch CPU threads for the latency measurement')
+    parser.add_argument('--latency-batch', type=int, default=2, help='eye crops per forward pass (2: both eyes)')
+    parser.add_argument('--latency-iters', type=int, default=30)
+    parser.add_argument('--eval-samples', type=int, default=None, help='MPIIGaze samples per variant (default: all)')
+    parser.add_argument('--teacher-samples', type=int, default=512, help='UnityEyes crops compared to the teacher')
+
+
+def publish_table(args, paths, teacher_path, table_path, extra=None):
+    """Measure the checkpoints in ``paths``, print the table and write it to ``table_path``.
+
+    ``extra`` maps a path to additional fields of its row.
+    """
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f'missing checkpoints: {missing}')
+
+    mpii = None
+    if os.path.isdir(args.mpii_dir) or os.path.exists(os.path.join(args.mpii_cache, 'index.npy')):
+        mpii = load_dataset(args.mpii_dir, args.mpii_cache, workers=os.cpu_count())
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    rows = measure_variants(paths, teacher_path, engine=args.engine, batch_size=args.latency_batch,
+                            iters=args.latency_iters, mpii=mpii, mpii_samples=args.eval_samples,
+                            images=unityeyes_images(args.unityeyes_cache, args.teacher_samples))
+    for row in rows:
+        row.update((extra or {}).get(row['path'], {}))
+    info = {'engine': args.engine, 'threads': torch.get_num_threads(), 'batch_size': args.latency_batch,
+            'platform': platform.platform(), 'processor': platform.processor()}
+    os.makedirs(os.path.dirname(os.path.abspath(table_path)), exist_ok=True)
+    save_variants(table_path, rows, **info)
+    table = dict(info, variants=rows)
+    print(format_variants(table))
+    print(f'Wrote {table_path}')
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--teacher', default='checkpoint.pt')
+    parser.add_argument('--variants', nargs='+', default=DEFAULT_VARIANTS, help='e.g. s1f16d3w32')
+    parser.add_argument('--output-dir', default='runs/lite')
+    parser.add_argument('--table-only', action='store_true', help='only measure the already trained variants')
+    add_table_arguments(parser)
+    args, train_args = parser.parse_known_args(argv)
+    names = [variant_name(parse_variant(name)) for name in args.variants]
+
+    if not args.table_only:
+        for name in names:
+            arch = parse_variant(name)
+            print(f'Distilling {name}')
+            train_eyenet.main(['--output-dir', os.path.join(args.output_dir, name), '--teacher', args.teacher,
+                               '--nstack', str(arch['nstack']), '--nfeatures', str(arch['nfeatures']),
+                               '--hourglass-depth', str(arch['hourglass_depth']),
+                               '--stem-width', str(arch['stem_width']), '--unityeyes-cache', args.unityeyes_cache,
+                               '--mpii-dir', args.mpii_dir, '--mpii-cache', args.mpii_cache, '--resume']
+                              + (['--gaze-rank', str(arch['gaze_rank'])] if arch['gaze_rank'] else []) + train_args)
+
+    paths = [args.teacher] + [variant_checkpoint(args.output_dir, name) for name in names]
+    return publish_table(args, paths, args.teacher, os.path.join(args.output_dir, 'variants.json'))
+
+
+if __name__ == '__main__':
+    main()
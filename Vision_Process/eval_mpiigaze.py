@@ -1,75 +1,123 @@
-import torch
-from datasets.mpii_gaze import MPIIGaze
-from models.eyenet import EyeNet
+"""Evaluate EyeNet on the MPIIGaze evaluation subset.
+
+The first run preprocesses the subset into ``--cache`` (see
+:func:`datasets.mpii_gaze.build_mpii_cache`), later runs read the memory
+mapped crops in batches. Prints the mean and the per-person angular error.
+
+    python eval_mpiigaze.py --model checkpoint.pt --batch-size 128
+    python eval_mpiigaze.py --model eyenet_int8.pt --engine int8 --output errors.json
+"""
+import argparse
+import json
 import os
+
+import torch
+from torch.utils.data import DataLoader, Subset
+from datasets.mpii_gaze import MPIIGaze, MPIIGazeCache, build_mpii_cache, is_mpii_cache, to_float_image
+from models.inference import ENGINES, is_torchscript, load_inference_model, read_metadata
 import numpy as np
-import cv2
-from util.preprocess import gaussian_2d
-from matplotlib import pyplot as plt
 import util.gaze
 
-device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
-dataset = MPIIGaze()
-checkpoint = torch.load('checkpoint.pt', map_location=device)
 
-# Modeli boş bir şekilde başlat
-eyenet = EyeNet(nstack=checkpoint['nstack'], nfeatures=checkpoint['nfeatures'], nlandmarks=checkpoint['nlandmarks'])
-eyenet.to_empty(device)
+def _batches(dataset, n, batch_size, workers):
+    """(images, gaze, is_right) numpy batches of the first ``n`` samples."""
+    if isinstance(dataset, MPIIGazeCache):
+        # Önbellek zaten önişlenmiş: dilimler doğrudan eşlenmiş dosyadan okunur
+        is_right = dataset.index['side'][:n] == 'right'
+        for start in range(0, n, batch_size):
+            end = min(start + batch_size, n)
+            yield to_float_image(dataset.images[start:end]), np.asarray(dataset.gaze[start:end]), is_right[start:end]
+        return
+    loader = DataLoader(Subset(dataset, range(n)), batch_size=batch_size, num_workers=workers)
+    for batch in loader:
+        yield batch['img'].numpy(), batch['gaze'].numpy(), np.array(batch['side']) == 'right'
 
-# Model ağırlıklarını yükle
-eyenet.load_state_dict(checkpoint['model_state_dict'])
 
-with torch.no_grad():
-    errors = []
+def evaluate(model, dataset, device, limit=None, verbose=False, batch_size=64, workers=0, input_scale=1.0):
+    """Run ``model`` over the MPIIGaze evaluation subset and return per-sample angular errors (degrees).
 
-    print('N', len(dataset))
-    for i, sample in enumerate(dataset):
-        print(i)
-        x = torch.tensor([sample['img']]).float().to(device)
-
-        heatmaps_pred, landmarks_pred, gaze_pred = eyenet.forward(x)
-
-        gaze = sample['gaze'].reshape((1, 2))
-        gaze_pred = np.asarray(gaze_pred.cpu().numpy())
-
-        if sample['side'] == 'right':
-            gaze_pred[0, 1] = -gaze_pred[0, 1]
-
-        angular_error = util.gaze.angular_error(gaze, gaze_pred)
-        errors.append(angular_error)
-        print('---')
-        print('error', angular_error)
-        print('mean error', np.mean(errors))
-        print('side', sample['side'])
-        print('gaze', gaze)
-        print('gaze pred', gaze_pred)
-
-        # landmarks_pred = np.asarray(landmarks_pred.cpu().numpy())[0, :]
-        #
-        # plt.figure(figsize=(8, 9))
-        #
-        # iris_center = landmarks_pred[-2][::-1]
-        # iris_center *= 2
-        # img = sample['img']
-        #
-        # img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
-        #
-        # img_gaze_pred = img.copy()
-        # util.gaze.draw_gaze(img_gaze_pred, iris_center, gaze_pred[0, :], length=60, color=(255, 0, 0))
-        #
-        # img_gaze = img.copy()
-        # util.gaze.draw_gaze(img_gaze, iris_center, sample['gaze'], length=60, color=(0, 255, 0))
-        #
-        # plt.subplot(121)
-        # plt.imshow(cv2.cvtColor(img_gaze, cv2.COLOR_BGR2RGB))
-        # plt.title('True Gaze')
-        #
-        # plt.subplot(122)
-        # plt.imshow(cv2.cvtColor(img_gaze_pred, cv2.COLOR_BGR2RGB))
-        # plt.title('Predicted Gaze')
-        #
-        # plt.show()
+    ``model`` maps ``N x 96 x 160`` eye images to ``(landmarks, gaze)``, see
+    :func:`models.inference.load_inference_model`. ``dataset`` is an
+    :class:`MPIIGaze` (loaded with ``workers`` DataLoader processes) or an
+    :class:`MPIIGazeCache`. The ``[0, 1]`` images are multiplied by
+    ``input_scale`` (255 evaluates the 0-255 crops of ``run_with_webcam.py``).
+    """
+    n = len(dataset) if limit is None else min(limit, len(dataset))
+    errors = np.empty(n)
+    done = 0
+
+    with torch.no_grad():
+        for imgs, gaze, is_right in _batches(dataset, n, batch_size, workers):
+            x = torch.from_numpy(imgs).float().to(device)
+            if input_scale != 1.0:
+                x = x * input_scale
+
+            _, gaze_pred = model(x)
 
+            gaze_pred = np.array(gaze_pred.cpu().numpy(), dtype=np.float64)
+            # Sağ gözler aynalanmış: yaw işareti geri çevrilir
+            gaze_pred[is_right, 1] = -gaze_pred[is_right, 1]
 
+            errors[done:done + len(imgs)] = util.gaze.angular_error(gaze, gaze_pred)
+            done += len(imgs)
+            if verbose:
+                print(f'{done}/{n} mean error {errors[:done].mean():.3f}')
 
+    return errors
 
+
+def per_person_errors(errors, persons):
+    """Mean angular error per person, ``{person: (mean, count)}``."""
+    persons = np.asarray(persons)[:len(errors)]
+    return {str(person): (float(errors[persons == person].mean()), int((persons == person).sum()))
+            for person in np.unique(persons)}
+
+
+def load_dataset(mpii_dir, cache_dir=None, workers=None):
+    """The evaluation subset from ``cache_dir``, building the cache first if needed; raw files without a cache."""
+    if cache_dir is None:
+        return MPIIGaze(mpii_dir)
+    if not is_mpii_cache(cache_dir):
+        print(f'Building the MPIIGaze cache in {cache_dir} (one time)')
+        build_mpii_cache(mpii_dir, cache_dir, workers=workers)
+    return MPIIGazeCache(cache_dir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='checkpoint.pt', help='checkpoint.pt or a frozen TorchScript model')
+    parser.add_argument('--engine', default='eager', choices=ENGINES)
+    parser.add_argument('--mpii-dir', default='datasets/MPIIGaze')
+    parser.add_argument('--cache', default='datasets/MPIIGaze_cache', help='preprocessed evaluation subset')
+    parser.add_argument('--no-cache', action='store_true', help='read the .mat files directly')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='processes for building the cache / loading without a cache')
+    parser.add_argument('--limit', type=int, default=None, help='only evaluate the first N samples')
+    parser.add_argument('--input-scale', type=float, default=None,
+                        help='multiply the [0, 1] images by this (default: the input_scale of a quantized '
+                             'model, otherwise 1)')
+    parser.add_argument('--output', default=None, help='write mean and per-person errors as JSON')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+    dataset = load_dataset(args.mpii_dir, None if args.no_cache else args.cache, workers=args.workers)
+    eyenet = load_inference_model(args.model, device, engine=args.engine)
+    input_scale = args.input_scale
+    if input_scale is None:
+        input_scale = read_metadata(args.model).get('input_scale', 1.0) if is_torchscript(args.model) else 1.0
+
+    print('N', len(dataset))
+    errors = evaluate(eyenet, dataset, device, limit=args.limit, verbose=args.verbose,
+                      batch_size=args.batch_size, workers=args.workers, input_scale=input_scale)
+    persons = per_person_errors(errors, dataset.persons)
+    for person, (error, count) in persons.items():
+        print(f'  {person:<6}{error:>8.3f} deg  ({count} samples)')
+    print('mean error', np.mean(errors))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'model': args.model, 'engine': args.engine, 'samples': len(errors),
+                       'mean_error': float(np.mean(errors)),
+                       'per_person': {person: {'mean_error': error, 'samples': count}
+                                      for person, (error, count) in persons.items()}}, f, indent=2)
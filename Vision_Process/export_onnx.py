@@ -0,0 +1,59 @@
+"""Export ``checkpoint.pt`` to ONNX for the ONNX Runtime backend.
+
+The architecture (nstack/nfeatures/nlandmarks/hourglass_depth/stem_width) is read from the checkpoint.
+BatchNorm is folded before export and the batch axis is dynamic. If
+onnxruntime is installed, the exported model is checked against PyTorch.
+
+    python export_onnx.py --checkpoint checkpoint.pt --output eyenet.onnx
+    python run_with_webcam.py --backend onnx --model eyenet.onnx
+"""
+import argparse
+import inspect
+
+import numpy as np
+import torch
+
+from models.eyenet import architecture, load_checkpoint
+from models.inference import EyeNetInference
+
+
+def export(model: EyeNetInference, output, opset=13):
+    example = torch.zeros((2, model.img_h, model.img_w))
+    kwargs = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        kwargs['dynamo'] = False  # TorchScript based exporter, supports dynamic_axes
+    torch.onnx.export(model.eval(), (example,), output,
+                      input_names=['imgs'], output_names=['landmarks', 'gaze'],
+                      dynamic_axes={'imgs': {0: 'batch'}, 'landmarks': {0: 'batch'}, 'gaze': {0: 'batch'}},
+                      opset_version=opset, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checkpoint', default='checkpoint.pt')
+    parser.add_argument('--output', default='eyenet.onnx')
+    parser.add_argument('--opset', type=int, default=13)
+    parser.add_argument('--no-fold', action='store_true', help='keep BatchNorm layers')
+    args = parser.parse_args()
+
+    eyenet = load_checkpoint(args.checkpoint, torch.device('cpu'))
+    model = EyeNetInference(eyenet, fold_bn=not args.no_fold)
+    export(model, args.output, opset=args.opset)
+    print(f'Saved {args.output} ({", ".join(f"{k}={v}" for k, v in architecture(eyenet).items())})')
+
+    try:
+        from backends.onnx_backend import OnnxBackend
+    except ImportError:
+        print('onnxruntime not installed, skipping the output check')
+        return
+
+    x = np.random.rand(3, eyenet.img_h, eyenet.img_w).astype(np.float32) * 255
+    landmarks, gaze = OnnxBackend(args.output).infer(x)
+    with torch.no_grad():
+        ref_landmarks, ref_gaze = model(torch.from_numpy(x))
+    print(f'max |landmarks diff|: {np.abs(landmarks - ref_landmarks.numpy()).max():.2e}')
+    print(f'max |gaze diff|:      {np.abs(gaze - ref_gaze.numpy()).max():.2e}')
+
+
+if __name__ == '__main__':
+    main()
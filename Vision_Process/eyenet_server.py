@@ -0,0 +1,58 @@
+"""EyeNet inference service for several vision processes on this machine.
+
+The model is loaded once. Clients connect over a Unix domain socket and
+their eye crops are run in shared batches (up to ``--max-batch`` eyes, the
+first request waits at most ``--max-wait-ms`` for others).
+
+    python eyenet_server.py --backend onnx --model eyenet.onnx
+    python run_with_webcam.py --backend remote --model /tmp/eyenet.sock
+"""
+import argparse
+import time
+
+from backends import DEFAULT_SOCKET_PATH, create_backend
+from backends.batcher import EyeNetBatcher
+from backends.eyenet_socket import EyeNetSocketServer, require_unix_sockets
+
+DEFAULT_MODELS = {'torch': 'checkpoint.pt', 'onnx': 'eyenet.onnx'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH)
+    parser.add_argument('--backend', default='torch', choices=sorted(DEFAULT_MODELS))
+    parser.add_argument('--model', default=None)
+    parser.add_argument('--engine', default='eager', help='inference engine of the torch backend')
+    parser.add_argument('--threads', type=int, default=None, help='CPU threads for EyeNet')
+    parser.add_argument('--max-batch', type=int, default=16, help='maximum number of eyes per inference')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                        help='how long the first request of a batch waits for other clients')
+    args = parser.parse_args()
+    # Fail before loading the model
+    require_unix_sockets()
+
+    model_path = args.model or DEFAULT_MODELS[args.backend]
+    backend_options = {'threads': args.threads}
+    if args.backend == 'torch':
+        backend_options['engine'] = args.engine
+    backend = create_backend(args.backend, model_path, **backend_options)
+    batcher = EyeNetBatcher(backend, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms).start()
+    server = EyeNetSocketServer(args.socket, batcher.run_eyenet)
+    print(f'EyeNet server: {args.backend} ({model_path}) on {args.socket}')
+
+    start = time.perf_counter()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.stop()
+    stats = batcher.stats()
+    elapsed = time.perf_counter() - start
+    print(f"{stats['eyes']} eyes in {stats['batches']} batches "
+          f"(mean batch {stats['mean_batch_size']:.1f}, {stats['eyes'] / elapsed:.1f} eyes/s)")
+
+
+if __name__ == '__main__':
+    main()
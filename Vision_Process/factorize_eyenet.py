@@ -0,0 +1,70 @@
+"""Factorize EyeNet's gaze_fc1 with a truncated SVD and compare ranks.
+
+``gaze_fc1`` (``nfeatures * 240 + 2 * nlandmarks`` -> 256) holds most of
+the parameters of EyeNet. For each ``--ranks`` value it is replaced by two
+thin linears (see :mod:`models.low_rank`) and the result is written to
+``<output-dir>/<variant>/checkpoint.pt``, e.g. ``runs/lowrank/s3f32d4w128r32``.
+With ``--finetune-steps`` each factorized model is then fine-tuned for that
+many steps with ``train_eyenet.py``, distilled from the original.
+
+The original and every rank are measured like ``distill_eyenet.py``:
+parameters, load time, per-frame latency, MPIIGaze error and gaze
+difference to the original. The table is printed and written to
+``<output-dir>/variants.json``, so ``run_with_webcam.py --variants`` can
+pick a rank by latency budget.
+
+    python factorize_eyenet.py --checkpoint checkpoint.pt --ranks 16 32 64 128
+    python factorize_eyenet.py --checkpoint checkpoint.pt --ranks 32 64 --finetune-steps 2000 --lr 1e-5
+
+Arguments not listed here (``--lr``, ``--batch-size``, ``--workers``, ...)
+are passed to ``train_eyenet.py`` when fine-tuning.
+"""
+import argparse
+import os
+
+import torch
+
+import train_eyenet
+from distill_eyenet import add_table_arguments, publish_table, variant_checkpoint
+from models.eyenet import architecture, load_checkpoint
+from models.low_rank import factorize_gaze_fc1
+from util.variants import variant_name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checkpoint', default='checkpoint.pt')
+    parser.add_argument('--ranks', type=int, nargs='+', default=[16, 32, 64, 128])
+    parser.add_argument('--output-dir', default='runs/lowrank')
+    parser.add_argument('--finetune-steps', type=int, default=0, help='fine-tune each rank for this many steps')
+    add_table_arguments(parser)
+    args, train_args = parser.parse_known_args(argv)
+
+    eyenet = load_checkpoint(args.checkpoint, torch.device('cpu'))
+    paths = [args.checkpoint]
+    extra = {}
+    for rank in args.ranks:
+        factorized, energy = factorize_gaze_fc1(eyenet, rank)
+        name = variant_name(architecture(factorized))
+        variant_dir = os.path.join(args.output_dir, name)
+        os.makedirs(variant_dir, exist_ok=True)
+        print(f'{name}: rank {rank} keeps {100 * energy:.2f}% of the squared singular values of gaze_fc1')
+
+        if args.finetune_steps:
+            init_path = os.path.join(variant_dir, 'factorized.pt')
+            train_eyenet.save_checkpoint(init_path, factorized, svd_energy=energy)
+            train_eyenet.main(['--output-dir', variant_dir, '--init', init_path, '--teacher', args.checkpoint,
+                               '--max-steps', str(args.finetune_steps), '--unityeyes-cache', args.unityeyes_cache,
+                               '--mpii-dir', args.mpii_dir, '--mpii-cache', args.mpii_cache] + train_args)
+            path = variant_checkpoint(args.output_dir, name)
+        else:
+            path = os.path.join(variant_dir, 'checkpoint.pt')
+            train_eyenet.save_checkpoint(path, factorized, svd_energy=energy)
+        paths.append(path)
+        extra[path] = {'svd_energy': energy, 'finetune_steps': args.finetune_steps}
+
+    return publish_table(args, paths, args.checkpoint, os.path.join(args.output_dir, 'variants.json'), extra=extra)
+
+
+if __name__ == '__main__':
+    main()
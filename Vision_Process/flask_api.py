@@ -2,21 +2,74 @@
 """
 Flask Web API - Gaze Estimation Dikkat Verilerini Almak İçin
 Port 8000'de /attention endpoint'ini dinler
+
+Kayıtlar tek tek (POST /attention) veya toplu olarak (POST /attention/bulk, NDJSON ya da JSON
+dizisi) alınır ve sabit kapasiteli bir halka tamponda saklanır (bkz. util.attention_store).
+GET /data?since=<cursor> okumaya kalınan yerden devam eder.
+
+    python flask_api.py --capacity 100000 --retention-sec 3600
+    curl -X POST --data-binary @records.ndjson -H 'Content-Type: application/x-ndjson' \
+        http://127.0.0.1:8000/attention/bulk
 """
 
 from flask import Flask, request, jsonify
+import argparse
 import datetime
 import json
 import logging
 
+from util.attention_store import AttentionStore, IngestSummary
+
 app = Flask(__name__)
 
 # Logging ayarları
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Gelen verileri saklamak için basit bir liste (gerçek uygulamada veritabanı kullanılır)
-attention_data_history = []
+# Gelen veriler sabit kapasiteli halka tamponda (kayıt başına değil, toplu ekleme)
+DEFAULT_CAPACITY = 100000
+attention_store = AttentionStore(capacity=DEFAULT_CAPACITY)
+# Kayıt başına log yerine her 10 saniyede bir özet satırı
+ingest_summary = IngestSummary(logger, interval_sec=10.0)
+# /data'nın bir istekte döndürebileceği en fazla kayıt
+MAX_READ_LIMIT = 10000
+
+
+def parse_records(body, content_type):
+    """İstek gövdesi -> kayıt listesi: tek JSON nesnesi, JSON dizisi veya NDJSON (satır başına bir nesne)
+
+    Boş tek nesne ({}) kayıt sayılmaz ve boş liste döner; dizi veya NDJSON içindeki boş nesneler geçersizdir.
+    """
+    if content_type and 'ndjson' in content_type:
+        records = []
+        for number, line in enumerate(body.split(b'\n'), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{number}. satır geçersiz JSON: {e}")
+            if not isinstance(record, dict) or not record:
+                raise ValueError(f"{number}. satır boş olmayan tek bir JSON nesnesi olmalı")
+            records.append(record)
+        return records
+    records = json.loads(body)
+    if isinstance(records, dict):
+        return [records] if records else []
+    if not isinstance(records, list) or not all(isinstance(record, dict) and record for record in records):
+        raise ValueError("kayıtlar boş olmayan JSON nesnesi olmalı")
+    return records
+
+
+def ingest(records):
+    """Kayıtları zaman damgasıyla halka tampona ekler, özet loga sayar"""
+    received_at = datetime.datetime.now()
+    received_iso = received_at.isoformat()
+    for record in records:
+        record['received_at'] = received_iso
+    _, cursor = attention_store.extend(records, received_at=received_at.timestamp())
+    ingest_summary.add(records)
+    return received_iso, cursor
 
 @app.route('/')
 def home():
@@ -26,59 +79,64 @@ def home():
         "message": "Gaze Estimation API aktif",
         "endpoints": {
             "POST /attention": "Dikkat verilerini alır",
-            "GET /data": "Son 10 veriyi görüntüler",
+            "POST /attention/bulk": "Toplu dikkat verisi alır (NDJSON veya JSON dizisi)",
+            "GET /data": "Son 10 veriyi görüntüler, ?since=<cursor>&limit=N ile kaldığı yerden okur",
             "GET /stats": "İstatistikleri görüntüler"
         },
-        "data_count": len(attention_data_history),
+        "data_count": len(attention_store),
         "last_update": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
 
 @app.route('/attention', methods=['POST'])
 def receive_attention_data():
-    """Dikkat verilerini alan ana endpoint"""
+    """Dikkat verilerini alan ana endpoint (tek kayıt; JSON dizisi de kabul edilir)"""
+    return receive_records(allow_ndjson=False)
+
+@app.route('/attention/bulk', methods=['POST'])
+def receive_attention_bulk():
+    """Toplu dikkat verisi: NDJSON (Content-Type: application/x-ndjson) veya JSON dizisi"""
+    return receive_records(allow_ndjson=True)
+
+def receive_records(allow_ndjson):
     try:
-        # İstek verisini al
-        data = request.get_json()
-        
-        if not data:
+        body = request.get_data(cache=False)
+        if not body.strip():
+            return jsonify({
+                "status": "error",
+                "message": "JSON verisi bulunamadı"
+            }), 400
+        ndjson = allow_ndjson and 'ndjson' in request.mimetype
+        if not request.is_json and not ndjson:
+            return jsonify({
+                "status": "error",
+                "message": "Content-Type application/json olmalı (toplu veri için application/x-ndjson da olur)"
+            }), 415
+        try:
+            records = parse_records(body, request.mimetype)
+        except ValueError as e:
+            # json.JSONDecodeError da ValueError'dur
+            return jsonify({
+                "status": "error",
+                "message": f"Geçersiz veri: {e}"
+            }), 400
+        if not records:
             return jsonify({
                 "status": "error",
                 "message": "JSON verisi bulunamadı"
             }), 400
-        
-        # Zaman damgası ekle
-        data['received_at'] = datetime.datetime.now().isoformat()
-        
-        # Veriyi kaydet
-        attention_data_history.append(data)
-        
-        # Son 100 veriyi tut (bellek tasarrufu için)
-        if len(attention_data_history) > 100:
-            attention_data_history.pop(0)
-        
-        # Konsola yazdır
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        logger.info(f"[{timestamp}] ✅ Dikkat Verisi Alındı:")
-        logger.info(f"  📊 Toplam Dikkat: {data.get('total_attention', 0):.3f}")
-        logger.info(f"  👁️  Sol Göz: {data.get('left_attention', 0):.3f} | Sağ Göz: {data.get('right_attention', 0):.3f}")
-        logger.info(f"  🎯 Kafa OK: {data.get('head_ok', False)} | Sol Açık: {data.get('left_eye_open', False)} | Sağ Açık: {data.get('right_eye_open', False)}")
-        logger.info(f"  ⚡ FPS: {data.get('fps', 0):.1f} | Gecikme: {data.get('latency_ms', 0):.0f}ms")
-        
-        if 'head_pose' in data:
-            pose = data['head_pose']
-            logger.info(f"  🧭 Kafa - Yaw: {pose.get('yaw', 0):.1f}° | Pitch: {pose.get('pitch', 0):.1f}° | Roll: {pose.get('roll', 0):.1f}°")
-        
-        logger.info(f"  🔄 Hareketlilik: {data.get('mobility', 0):.3f} | Ortalama: {data.get('average_attention', 0):.3f}")
-        logger.info("-" * 50)
-        
+
+        received_at, cursor = ingest(records)
+
         # Başarılı yanıt
         return jsonify({
             "status": "success",
             "message": "Veri başarıyla alındı",
-            "data_count": len(attention_data_history),
-            "timestamp": data['received_at']
+            "accepted": len(records),
+            "data_count": len(attention_store),
+            "cursor": cursor,
+            "timestamp": received_at
         }), 200
-        
+
     except Exception as e:
         logger.error(f"❌ Veri alma hatası: {str(e)}")
         return jsonify({
@@ -88,40 +146,41 @@ def receive_attention_data():
 
 @app.route('/data', methods=['GET'])
 def get_recent_data():
-    """Son 10 veriyi döndür"""
-    recent_data = attention_data_history[-10:] if attention_data_history else []
+    """Son 10 veriyi döndür
+
+    ?since=<cursor>&limit=N: <cursor> sıra numarasından itibaren en fazla N kayıt. Yanıttaki
+    next_cursor bir sonraki isteğin since değeridir; missed, okunmadan üzerine yazılan kayıt sayısıdır.
+    """
+    try:
+        since = int(request.args['since']) if 'since' in request.args else None
+        limit = int(request.args.get('limit', 10 if since is None else 1000))
+        if (since is not None and since < 0) or not 1 <= limit <= MAX_READ_LIMIT:
+            raise ValueError
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": f"Geçersiz since/limit (limit 1-{MAX_READ_LIMIT})"
+        }), 400
+    records, next_cursor, missed = attention_store.read(since=since, limit=limit)
     return jsonify({
         "status": "success",
-        "total_records": len(attention_data_history),
-        "recent_data": recent_data
+        "total_records": len(attention_store),
+        "recent_data": records,
+        "next_cursor": next_cursor,
+        "missed": missed
     })
 
 @app.route('/stats', methods=['GET'])
 def get_statistics():
     """İstatistikleri döndür"""
-    if not attention_data_history:
+    stats = attention_store.stats()
+    if stats is None:
         return jsonify({
             "status": "success",
             "message": "Henüz veri yok",
             "stats": {}
         })
-    
-    # İstatistikleri hesapla
-    total_attentions = [d.get('total_attention', 0) for d in attention_data_history]
-    left_attentions = [d.get('left_attention', 0) for d in attention_data_history]
-    right_attentions = [d.get('right_attention', 0) for d in attention_data_history]
-    
-    stats = {
-        "total_records": len(attention_data_history),
-        "average_total_attention": sum(total_attentions) / len(total_attentions),
-        "max_total_attention": max(total_attentions),
-        "min_total_attention": min(total_attentions),
-        "average_left_attention": sum(left_attentions) / len(left_attentions),
-        "average_right_attention": sum(right_attentions) / len(right_attentions),
-        "first_record_time": attention_data_history[0].get('received_at'),
-        "last_record_time": attention_data_history[-1].get('received_at')
-    }
-    
+
     return jsonify({
         "status": "success",
         "stats": stats
@@ -142,8 +201,18 @@ def internal_error(error):
     }), 500
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY, help='saklanan en fazla kayıt')
+    parser.add_argument('--retention-sec', type=float, default=None,
+                        help='bu süreden eski kayıtlar silinir (varsayılan: sadece kapasite sınırı)')
+    parser.add_argument('--log-interval', type=float, default=10.0, help='özet log aralığı (saniye)')
+    args = parser.parse_args()
+    attention_store = AttentionStore(capacity=args.capacity, retention_sec=args.retention_sec)
+    ingest_summary = IngestSummary(logger, interval_sec=args.log_interval)
+
     print("🚀 Flask API başlatılıyor...")
     print("📡 Endpoint: http://127.0.0.1:8000/attention")
+    print("📦 Toplu veri: http://127.0.0.1:8000/attention/bulk")
     print("🌐 Ana sayfa: http://127.0.0.1:8000")
     print("📊 Veriler: http://127.0.0.1:8000/data")
     print("📈 İstatistikler: http://127.0.0.1:8000/stats")
@@ -0,0 +1,79 @@
+"""Build a frozen TorchScript inference model from ``checkpoint.pt``.
+
+BatchNorm is folded into the convolutions (see :mod:`models.inference`), the
+model is traced and frozen, and the result is only written if its MPIIGaze
+accuracy matches the original checkpoint within ``--tolerance`` degrees.
+A before/after CPU latency report is printed.
+
+    python freeze_eyenet.py --checkpoint checkpoint.pt --output eyenet_frozen.pt
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import torch
+
+from datasets.mpii_gaze import MPIIGaze
+from eval_mpiigaze import evaluate
+from models.eyenet import architecture, load_checkpoint
+from models.inference import EyeNetInference, freeze, save_torchscript
+from util.benchmark import measure_latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checkpoint', default='checkpoint.pt')
+    parser.add_argument('--output', default='eyenet_frozen.pt')
+    parser.add_argument('--mpii-dir', default='datasets/MPIIGaze')
+    parser.add_argument('--mpii-samples', type=int, default=2000, help='number of MPIIGaze samples to compare on')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='max allowed change of mean angular error (degrees)')
+    parser.add_argument('--batch-size', type=int, default=2, help='batch size used for the latency report')
+    parser.add_argument('--iters', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=None, help='torch CPU threads')
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    device = torch.device('cpu')
+
+    eyenet = load_checkpoint(args.checkpoint, device)
+    reference = EyeNetInference(eyenet, fold_bn=False)
+    frozen = freeze(EyeNetInference(eyenet, fold_bn=True), batch_size=args.batch_size)
+
+    # Output agreement on random crops
+    x = torch.rand((args.batch_size, eyenet.img_h, eyenet.img_w)) * 255
+    with torch.no_grad():
+        ref_landmarks, ref_gaze = reference(x)
+        landmarks, gaze = frozen(x)
+    print(f'max |landmarks diff|: {(landmarks - ref_landmarks).abs().max().item():.2e}')
+    print(f'max |gaze diff|:      {(gaze - ref_gaze).abs().max().item():.2e}')
+
+    # Accuracy gate on MPIIGaze
+    if os.path.isdir(args.mpii_dir):
+        dataset = MPIIGaze(args.mpii_dir)
+        ref_error = np.mean(evaluate(reference, dataset, device, limit=args.mpii_samples))
+        error = np.mean(evaluate(frozen, dataset, device, limit=args.mpii_samples))
+        print(f'MPIIGaze mean angular error: {ref_error:.3f} -> {error:.3f} deg')
+        if abs(error - ref_error) > args.tolerance:
+            print(f'Error changed by more than {args.tolerance} deg, not writing {args.output}')
+            sys.exit(1)
+    else:
+        print(f'{args.mpii_dir} not found, skipping the MPIIGaze accuracy check')
+
+    # Latency report
+    with torch.no_grad():
+        before = measure_latency(eyenet.forward, x, iters=args.iters)
+        after = measure_latency(frozen, x, iters=args.iters)
+    print(f'CPU latency (batch {args.batch_size}, {torch.get_num_threads()} threads):')
+    print(f'  {"":<10}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}')
+    for name, stats in [('eyenet', before), ('frozen', after)]:
+        print(f'  {name:<10}{stats["mean_ms"]:>10.2f}{stats["p50_ms"]:>10.2f}{stats["p95_ms"]:>10.2f}')
+    print(f'  speedup: {before["mean_ms"] / after["mean_ms"]:.2f}x')
+
+    save_torchscript(frozen, args.output, engine='folded', **architecture(eyenet))
+    print(f'Saved {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -15,7 +15,18 @@ class Merge(nn.Module):
 
 
 class EyeNet(nn.Module):
-    def __init__(self, nstack, nfeatures, nlandmarks, bn=False, increase=0, **kwargs):
+    """Stacked hourglass landmark and gaze network.
+
+    ``hourglass_depth`` (number of 2x downsamplings per hourglass) and
+    ``stem_width`` (channels of the full resolution stem convolutions in
+    ``pre``/``pre2``) default to the original architecture; smaller values
+    give the lite variants of ``distill_eyenet.py``. With ``gaze_rank``
+    ``gaze_fc1`` is a rank ``gaze_rank`` factorization of the dense layer,
+    two thin linears (see :mod:`models.low_rank`).
+    """
+
+    def __init__(self, nstack, nfeatures, nlandmarks, bn=False, increase=0, hourglass_depth=4, stem_width=128,
+                 gaze_rank=None, **kwargs):
         super(EyeNet, self).__init__()
 
         self.img_w = 160
@@ -23,30 +34,34 @@ class EyeNet(nn.Module):
         self.nstack = nstack
         self.nfeatures = nfeatures
         self.nlandmarks = nlandmarks
+        self.hourglass_depth = hourglass_depth
+        self.stem_width = stem_width
+        self.gaze_rank = gaze_rank
+        half = stem_width // 2
 
         self.heatmap_w = self.img_w / 2
         self.heatmap_h = self.img_h / 2
 
         self.nstack = nstack
         self.pre = nn.Sequential(
-            Conv(1, 64, 7, 1, bn=True, relu=True),
-            Residual(64, 128),
+            Conv(1, half, 7, 1, bn=True, relu=True),
+            Residual(half, stem_width),
             Pool(2, 2),
-            Residual(128, 128),
-            Residual(128, nfeatures)
+            Residual(stem_width, stem_width),
+            Residual(stem_width, nfeatures)
         )
 
         self.pre2 = nn.Sequential(
-            Conv(nfeatures, 64, 7, 2, bn=True, relu=True),
-            Residual(64, 128),
+            Conv(nfeatures, half, 7, 2, bn=True, relu=True),
+            Residual(half, stem_width),
             Pool(2, 2),
-            Residual(128, 128),
-            Residual(128, nfeatures)
+            Residual(stem_width, stem_width),
+            Residual(stem_width, nfeatures)
         )
 
         self.hgs = nn.ModuleList([
             nn.Sequential(
-                Hourglass(4, nfeatures, bn, increase),
+                Hourglass(hourglass_depth, nfeatures, bn, increase),
             ) for i in range(nstack)])
 
         self.features = nn.ModuleList([
@@ -59,7 +74,12 @@ class EyeNet(nn.Module):
         self.merge_features = nn.ModuleList([Merge(nfeatures, nfeatures) for i in range(nstack - 1)])
         self.merge_preds = nn.ModuleList([Merge(nlandmarks, nfeatures) for i in range(nstack - 1)])
 
-        self.gaze_fc1 = nn.Linear(in_features=int(nfeatures * self.img_w * self.img_h / 64 + nlandmarks*2), out_features=256)
+        gaze_features = int(nfeatures * self.img_w * self.img_h / 64 + nlandmarks*2)
+        if gaze_rank is None:
+            self.gaze_fc1 = nn.Linear(in_features=gaze_features, out_features=256)
+        else:
+            self.gaze_fc1 = nn.Sequential(nn.Linear(in_features=gaze_features, out_features=gaze_rank, bias=False),
+                                          nn.Linear(in_features=gaze_rank, out_features=256))
         self.gaze_fc2 = nn.Linear(in_features=256, out_features=2)
 
         self.nstack = nstack
@@ -107,3 +127,30 @@ class EyeNet(nn.Module):
         gaze_loss = self.gaze_loss(gaze_pred, gaze)
 
         return torch.sum(heatmap_loss), landmarks_loss, 1000 * gaze_loss
+
+
+def architecture(eyenet):
+    """Constructor arguments of ``eyenet`` as stored in ``checkpoint.pt``."""
+    return {
+        'nstack': eyenet.nstack,
+        'nfeatures': eyenet.nfeatures,
+        'nlandmarks': eyenet.nlandmarks,
+        'hourglass_depth': eyenet.hourglass_depth,
+        'stem_width': eyenet.stem_width,
+        'gaze_rank': eyenet.gaze_rank,
+    }
+
+
+def from_checkpoint(checkpoint):
+    """Build an EyeNet from a loaded ``checkpoint.pt`` dict (older checkpoints have no depth/stem/rank keys)."""
+    eyenet = EyeNet(nstack=checkpoint['nstack'], nfeatures=checkpoint['nfeatures'], nlandmarks=checkpoint['nlandmarks'],
+                    hourglass_depth=checkpoint.get('hourglass_depth', 4), stem_width=checkpoint.get('stem_width', 128),
+                    gaze_rank=checkpoint.get('gaze_rank'))
+    eyenet.load_state_dict(checkpoint['model_state_dict'])
+    return eyenet
+
+
+def load_checkpoint(path, device):
+    """Build an EyeNet from a ``checkpoint.pt`` file and load its weights (eval mode)."""
+    checkpoint = torch.load(path, map_location=device, weights_only=False)
+    return from_checkpoint(checkpoint).to(device).eval()
@@ -0,0 +1,172 @@
+"""Inference-only build of EyeNet.
+
+:class:`EyeNetInference` skips the stacked heatmap output, returns only
+``(landmarks, gaze)`` and keeps the soft-argmax index grid as a buffer. With
+``fold_bn=True`` every BatchNorm that directly follows a convolution is folded
+into that convolution's weights. The pre-activation ``bn1`` of each
+``Residual`` is followed by a ReLU before its convolution and is kept as is.
+
+The result can be traced and frozen into a TorchScript module with
+:func:`freeze` and written with :func:`save_torchscript`, see
+``freeze_eyenet.py`` and ``quantize_eyenet.py``.
+"""
+import copy
+import json
+import warnings
+import zipfile
+
+import torch
+from torch import nn
+
+from models.eyenet import EyeNet, load_checkpoint
+from models.layers import Conv, Residual
+from util.softargmax import SoftArgmax2d
+
+ENGINES = ('eager', 'folded', 'int8')
+METADATA_FILE = 'eyenet.json'
+
+
+def fold_conv_bn(conv: nn.Conv2d, bn: nn.BatchNorm2d) -> nn.Conv2d:
+    """Return a convolution equal to ``bn(conv(x))`` with ``bn`` in eval mode."""
+    fused = nn.Conv2d(conv.in_channels, conv.out_channels, conv.kernel_size, conv.stride,
+                      conv.padding, conv.dilation, conv.groups, bias=True).to(conv.weight.device)
+    with torch.no_grad():
+        scale = torch.rsqrt(bn.running_var + bn.eps)
+        if bn.weight is not None:
+            scale = scale * bn.weight
+        bias = conv.bias if conv.bias is not None else torch.zeros_like(bn.running_mean)
+        shift = (bias - bn.running_mean) * scale
+        if bn.bias is not None:
+            shift = shift + bn.bias
+        fused.weight.copy_(conv.weight * scale.reshape(-1, 1, 1, 1))
+        fused.bias.copy_(shift)
+    return fused
+
+
+def fold_batchnorm(module: nn.Module) -> nn.Module:
+    """Fold BatchNorm layers into their preceding convolutions, in place."""
+    for m in list(module.modules()):
+        if isinstance(m, Conv) and m.bn is not None:
+            m.conv = fold_conv_bn(m.conv, m.bn)
+            m.bn = None
+        elif isinstance(m, Residual):
+            # conv1 -> bn2 and conv2 -> bn3 can be folded, bn1 -> relu -> conv1 cannot
+            m.conv1.conv = fold_conv_bn(m.conv1.conv, m.bn2)
+            m.bn2 = nn.Identity()
+            m.conv2.conv = fold_conv_bn(m.conv2.conv, m.bn3)
+            m.bn3 = nn.Identity()
+    return module
+
+
+class EyeNetInference(nn.Module):
+    def __init__(self, eyenet: EyeNet, fold_bn=True):
+        super(EyeNetInference, self).__init__()
+        eyenet = copy.deepcopy(eyenet).eval()
+        if fold_bn:
+            fold_batchnorm(eyenet)
+
+        self.nstack = eyenet.nstack
+        self.nfeatures = eyenet.nfeatures
+        self.nlandmarks = eyenet.nlandmarks
+        self.img_w = eyenet.img_w
+        self.img_h = eyenet.img_h
+
+        self.pre = eyenet.pre
+        self.pre2 = eyenet.pre2
+        self.hgs = eyenet.hgs
+        self.features = eyenet.features
+        self.outs = eyenet.outs
+        self.merge_features = eyenet.merge_features
+        self.merge_preds = eyenet.merge_preds
+        self.gaze_fc1 = eyenet.gaze_fc1
+        self.gaze_fc2 = eyenet.gaze_fc2
+        self.softargmax = SoftArgmax2d(int(eyenet.heatmap_h), int(eyenet.heatmap_w))
+        self.eval()
+
+    def forward(self, imgs):
+        # imgs of size N,ih,iw
+        x = imgs.unsqueeze(1)
+        x = self.pre(x)
+
+        gaze_x = self.pre2(x)
+        gaze_x = gaze_x.flatten(start_dim=1)
+
+        preds = None
+        for i in range(self.nstack):
+            hg = self.hgs[i](x)
+            feature = self.features[i](hg)
+            preds = self.outs[i](feature)
+            if i < self.nstack - 1:
+                x = x + self.merge_preds[i](preds) + self.merge_features[i](feature)
+
+        # Only the last stack's heatmaps are needed for the landmarks
+        landmarks_out = self.softargmax(preds)  # N x nlandmarks x 2
+
+        gaze = torch.cat((gaze_x, landmarks_out.flatten(start_dim=1)), dim=1)
+        gaze = self.gaze_fc1(gaze)
+        gaze = nn.functional.relu(gaze)
+        gaze = self.gaze_fc2(gaze)
+
+        return landmarks_out, gaze
+
+
+def freeze(model: nn.Module, batch_size=2, example=None) -> torch.jit.ScriptModule:
+    """Trace ``model`` and freeze it into a TorchScript module."""
+    if example is None:
+        device = next(model.parameters()).device
+        example = torch.zeros((batch_size, model.img_h, model.img_w), dtype=torch.float32, device=device)
+    with torch.no_grad(), warnings.catch_warnings():
+        # Conv's channel assert is a constant for a fixed architecture
+        warnings.simplefilter('ignore', torch.jit.TracerWarning)
+        traced = torch.jit.trace(model.eval(), example, check_trace=False)
+    return torch.jit.freeze(traced)
+
+
+def save_torchscript(module: torch.jit.ScriptModule, path, **metadata):
+    """Save a TorchScript model together with a small JSON metadata record."""
+    torch.jit.save(module, path, _extra_files={METADATA_FILE: json.dumps(metadata)})
+
+
+def is_torchscript(path) -> bool:
+    """Whether ``path`` is a TorchScript archive rather than a training checkpoint."""
+    if not zipfile.is_zipfile(path):
+        return False
+    with zipfile.ZipFile(path) as archive:
+        return any('/code/' in name for name in archive.namelist())
+
+
+def read_metadata(path) -> dict:
+    """Return the metadata stored by :func:`save_torchscript`, or ``{}``."""
+    with zipfile.ZipFile(path) as archive:
+        for name in archive.namelist():
+            if name.endswith('/extra/' + METADATA_FILE):
+                return json.loads(archive.read(name))
+    return {}
+
+
+def load_inference_model(path, device, engine='eager'):
+    """Load a model that maps ``N x 96 x 160`` eye crops to ``(landmarks, gaze)``.
+
+    Args:
+        path: a ``checkpoint.pt`` file or a TorchScript file written by
+            ``freeze_eyenet.py`` / ``quantize_eyenet.py``.
+        device: torch device to load onto.
+        engine: ``'eager'`` (plain EyeNet weights) or ``'folded'`` (BatchNorm
+            folded) for checkpoints. ``'int8'`` requires a model written by
+            ``quantize_eyenet.py``. Other TorchScript files ignore it.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f'Unknown engine {engine!r}, expected one of {ENGINES}')
+
+    if is_torchscript(path):
+        metadata = read_metadata(path)
+        if engine == 'int8' and metadata.get('engine') != 'int8':
+            raise ValueError(f'{path} is not an int8 model, create one with quantize_eyenet.py')
+        if 'qengine' in metadata:
+            torch.backends.quantized.engine = metadata['qengine']
+        return torch.jit.load(path, map_location=device).eval()
+
+    if engine == 'int8':
+        raise ValueError(f'{path} is a training checkpoint, create an int8 model with quantize_eyenet.py')
+    eyenet = load_checkpoint(path, device)
+    return EyeNetInference(eyenet, fold_bn=(engine == 'folded')).to(device)
@@ -1,3 +1,4 @@
+import torch
 from torch import nn
 
 Pool = nn.MaxPool2d
@@ -20,7 +21,8 @@ class Conv(nn.Module):
             self.bn = nn.BatchNorm2d(out_dim)
 
     def forward(self, x):
-        assert x.size()[1] == self.inp_dim, "{} {}".format(x.size()[1], self.inp_dim)
+        # torch._assert instead of assert keeps the module symbolically traceable (FX quantization)
+        torch._assert(x.size()[1] == self.inp_dim, "{} {}".format(x.size()[1], self.inp_dim))
         x = self.conv(x)
         if self.bn is not None:
             x = self.bn(x)
@@ -0,0 +1,43 @@
+"""Truncated SVD factorization of EyeNet's dense gaze layer.
+
+``gaze_fc1`` maps the flattened ``pre2`` features and the landmarks
+(``nfeatures * 240 + 2 * nlandmarks`` inputs) to 256 units, by far the
+largest weight matrix of the network. With ``W = U S V^T`` the rank ``r``
+approximation ``W ~ (U_r) (S_r V_r^T)`` is two thin linears,
+``in -> r`` (no bias) and ``r -> 256`` (with the original bias), with
+``r * (in + 256)`` instead of ``in * 256`` weights.
+
+    factorized, energy = factorize_gaze_fc1(eyenet, rank=32)
+"""
+import copy
+
+import torch
+from torch import nn
+
+
+def low_rank_linear(linear: nn.Linear, rank: int):
+    """Rank ``rank`` factorization of ``linear`` as ``nn.Sequential(in -> rank, rank -> out)``.
+
+    Also returns the share of the squared singular values that is kept.
+    """
+    if not 0 < rank <= min(linear.in_features, linear.out_features):
+        raise ValueError(f'rank must be in 1..{min(linear.in_features, linear.out_features)}, got {rank}')
+    with torch.no_grad():
+        u, s, vh = torch.linalg.svd(linear.weight.double(), full_matrices=False)
+        first = nn.Linear(linear.in_features, rank, bias=False)
+        second = nn.Linear(rank, linear.out_features)
+        first.weight.copy_(s[:rank, None] * vh[:rank])
+        second.weight.copy_(u[:, :rank])
+        second.bias.copy_(linear.bias)
+        energy = float((s[:rank] ** 2).sum() / (s ** 2).sum())
+    return nn.Sequential(first, second).to(linear.weight.device), energy
+
+
+def factorize_gaze_fc1(eyenet, rank):
+    """Copy of ``eyenet`` with ``gaze_fc1`` factorized to ``rank`` (``gaze_rank`` is set, so checkpoints load)."""
+    if eyenet.gaze_rank is not None:
+        raise ValueError(f'gaze_fc1 is already factorized (rank {eyenet.gaze_rank})')
+    factorized = copy.deepcopy(eyenet)
+    factorized.gaze_fc1, energy = low_rank_linear(eyenet.gaze_fc1, rank)
+    factorized.gaze_rank = rank
+    return factorized, energy
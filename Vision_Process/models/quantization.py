@@ -0,0 +1,80 @@
+"""INT8 quantization of EyeNet for CPU inference.
+
+The gaze head (``gaze_fc1``/``gaze_fc2``) is quantized dynamically. The
+hourglass convolutions are statically quantized with observers calibrated on
+real eye crops (FX graph mode). The soft-argmax stays in float, because its
+``beta=100`` softmax is too sensitive to heatmap rounding.
+"""
+import io
+
+import numpy as np
+import torch
+from torch import nn
+from torch.ao.quantization import default_dynamic_qconfig, get_default_qconfig_mapping, quantize_dynamic
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+from models.inference import EyeNetInference
+
+
+def default_qengine():
+    """fbgemm on x86, qnnpack elsewhere (ARM laptops)."""
+    supported = torch.backends.quantized.supported_engines
+    return 'fbgemm' if 'fbgemm' in supported else 'qnnpack'
+
+
+def calibration_batches(dataset, num_samples, batch_size=16, scale=1.0):
+    """Yield ``N x 96 x 160`` float batches of eye crops from a dataset.
+
+    ``dataset`` is any dataset whose samples have an ``'img'`` key in ``[0, 1]``
+    (UnityEyes, MPIIGaze). The crops are multiplied by ``scale``, which must
+    be the input range of the deployed path (255 for ``run_with_webcam.py``).
+    Only one range is calibrated: observers that see both 0-1 and 0-255
+    inputs pick a scale that collapses 0-1 inputs into about one bin.
+    """
+    num_samples = min(num_samples, len(dataset))
+    rng = np.random.default_rng(0)
+    indices = rng.permutation(len(dataset))[:num_samples]
+    for start in range(0, num_samples, batch_size):
+        imgs = [np.ascontiguousarray(dataset[int(i)]['img'], dtype=np.float32)
+                for i in indices[start:start + batch_size]]
+        yield torch.from_numpy(np.stack(imgs)) * scale
+
+
+def quantize_eyenet(model: EyeNetInference, calibration, qengine=None, static=True) -> nn.Module:
+    """Return an INT8 copy of ``model``.
+
+    Args:
+        model: float inference model, ideally with BatchNorm folded.
+        calibration: iterable of input batches used to calibrate the static
+            observers. Ignored when ``static`` is False.
+        qengine: quantized backend, ``'fbgemm'`` (x86) or ``'qnnpack'`` (ARM).
+        static: also quantize the convolutions. With False only the gaze
+            head is (dynamically) quantized.
+    """
+    qengine = qengine or default_qengine()
+    torch.backends.quantized.engine = qengine
+    model = model.cpu().eval()
+
+    if not static:
+        return quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+    qconfig_mapping = (get_default_qconfig_mapping(qengine)
+                       .set_module_name('softargmax', None)
+                       .set_module_name('gaze_fc1', default_dynamic_qconfig)
+                       .set_module_name('gaze_fc2', default_dynamic_qconfig))
+    example = torch.zeros((1, model.img_h, model.img_w))
+    prepared = prepare_fx(model, qconfig_mapping, example_inputs=(example,))
+    with torch.no_grad():
+        for batch in calibration:
+            prepared(batch)
+    return convert_fx(prepared)
+
+
+def serialized_size(module) -> int:
+    """Size in bytes of ``module`` serialized with TorchScript or torch.save."""
+    buffer = io.BytesIO()
+    if isinstance(module, torch.jit.ScriptModule):
+        torch.jit.save(module, buffer)
+    else:
+        torch.save(module.state_dict(), buffer)
+    return buffer.tell()
@@ -0,0 +1,290 @@
+"""Attention tracking for several cameras in one process.
+
+Each stream has its own capture thread, landmark worker (FaceMesh, head
+pose, eye segmentation, scoring) and attention state. The eye crops of all
+streams go through one shared EyeNet model in batches
+(:class:`backends.batcher.EyeNetBatcher`). The heavy stages (capture decode,
+FaceMesh, OpenCV, EyeNet) release the GIL, so the streams run in parallel on
+separate cores without a process and a model copy per camera.
+
+    python multi_stream.py --stream desk1=webcam:0 --stream desk2=webcam:1 --backend onnx
+    curl http://127.0.0.1:8001/attention/desk1
+
+Endpoints:
+    /attention                 all streams
+    /attention/<stream_id>     one stream, with optional ?window=30&window=600
+    /attention/<stream_id>/stream
+                               live updates of one stream (SSE or NDJSON, see util.attention_stream)
+    /latency                   per-stream stage latencies and EyeNet batching statistics
+"""
+import argparse
+import threading
+import time
+
+from flask import Flask, Response, jsonify, request
+
+from backends import BACKENDS, DEFAULT_SOCKET_PATH, create_backend
+from backends.batcher import EyeNetBatcher
+from util.attention_stats import AttentionAggregator, parse_windows
+from util.attention_stream import STREAM_HEADERS, STREAM_MIMETYPES, AttentionBroadcaster, parse_stream_options
+from util.capture import LatestFrameCapture
+from util.eyenet_scheduler import EyeNetScheduler
+from util.frame_analyzer import FrameAnalyzer
+from util.frame_source import open_source
+from util.stage_timer import StageTimer
+
+try:
+    from flask_cors import CORS
+    FLASK_CORS_AVAILABLE = True
+except ImportError:
+    FLASK_CORS_AVAILABLE = False
+
+DEFAULT_MODELS = {'torch': 'checkpoint.pt', 'onnx': 'eyenet.onnx', 'remote': DEFAULT_SOCKET_PATH}
+ATTENTION_RETENTION_SEC = 24 * 60 * 60
+
+
+class StreamWorker:
+    """Capture and analysis thread of one camera, with its own attention state.
+
+    Args:
+        stream_id: name used in the HTTP API.
+        source: a :mod:`util.frame_source` source.
+        run_eyenet: shared ``run_eyenet(eyes)``, e.g. :meth:`EyeNetBatcher.run_eyenet`.
+        scheduler: per-stream :class:`EyeNetScheduler`, default settings if None.
+        face_mesh: this stream's FaceMesh, created if None.
+    """
+
+    def __init__(self, stream_id, source, run_eyenet, scheduler=None, retention_sec=ATTENTION_RETENTION_SEC,
+                 face_mesh=None):
+        self.stream_id = stream_id
+        self.source = source
+        self.timer = StageTimer(window=1000)
+        self.analyzer = FrameAnalyzer(run_eyenet, face_mesh=face_mesh, scheduler=scheduler, timer=self.timer,
+                                      overlays=False)
+        self.attention = AttentionAggregator(retention_sec=retention_sec)
+        self.broadcaster = AttentionBroadcaster()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self.started_at = None
+        self.frames = 0
+        self.last_frame_time = None
+        self.current = {
+            'face_found': False,
+            'attention': 0.0,
+            'head_looking_at_screen': False,
+            'left_eye_open': False,
+            'right_eye_open': False,
+        }
+
+    def start(self):
+        self._running = True
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name=f'stream-{self.stream_id}', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        capture = LatestFrameCapture(self.source).start() if self.source.live else None
+        timer = self.timer
+        try:
+            while self._running:
+                timer.begin()
+                if capture is not None:
+                    ok, frame, frame_time = capture.read(timeout=5.0)
+                else:
+                    ok, frame, frame_time = self.source.read()
+                if not ok or frame is None:
+                    print(f"[{self.stream_id}] kaynaktan görüntü alınamıyor, akış durdu")
+                    break
+                timer.lap('capture')
+
+                result = self.analyzer.analyze(frame, frame_time)
+                with self._lock:
+                    self.frames += 1
+                    self.last_frame_time = frame_time
+                    self.current['face_found'] = result['face_found']
+                    if result['face_found']:
+                        self.current['attention'] = result['total_attention']
+                        self.current['head_looking_at_screen'] = bool(result['head_ok'])
+                        self.current['left_eye_open'] = bool(result['left_eye_open'])
+                        self.current['right_eye_open'] = bool(result['right_eye_open'])
+                    current = dict(self.current)
+                if result['face_found']:
+                    self.attention.add(result['total_attention'], frame_time)
+                self.broadcaster.publish(dict(current, face_found=bool(current['face_found']),
+                                              attention=float(current['attention'])), timestamp=frame_time)
+                timer.lap('bookkeeping')
+                timer.end()
+        finally:
+            self._running = False
+            if capture is not None:
+                capture.stop()
+            self.source.release()
+            self.analyzer.close()
+
+    def snapshot(self, windows=None):
+        """Same fields as run_with_webcam's /attention, plus stream information."""
+        now = time.time()
+        with self._lock:
+            current = dict(self.current)
+            frames = self.frames
+        one_min_avg, five_min_avg, twenty_min_avg = self.attention.averages([60, 300, 1200], now=now)
+        data = {
+            "stream_id": self.stream_id,
+            "running": self.alive,
+            "face_found": bool(current['face_found']),
+            "frames": frames,
+            "fps": frames / (now - self.started_at) if self.started_at and now > self.started_at else 0.0,
+            "attention": float(current['attention']),
+            "head_looking_at_screen": current['head_looking_at_screen'],
+            "left_eye_open": current['left_eye_open'],
+            "right_eye_open": current['right_eye_open'],
+            "attention_1min_avg": float(one_min_avg),
+            "attention_5min_avg": float(five_min_avg),
+            "attention_20min_avg": float(twenty_min_avg),
+            "attention_total_avg": float(self.attention.total_average()),
+        }
+        if windows:
+            averages = self.attention.averages(windows, now=now)
+            data["attention_windows"] = {f"{seconds:g}": float(avg) for seconds, avg in zip(windows, averages)}
+        return data
+
+
+def create_app(workers, batcher):
+    """Flask app serving the attention state of every stream."""
+    app = Flask(__name__)
+    if FLASK_CORS_AVAILABLE:
+        CORS(app)
+    else:
+        @app.after_request
+        def after_request(response):
+            response.headers.add('Access-Control-Allow-Origin', '*')
+            response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+            response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+            return response
+
+    def windows_or_error():
+        try:
+            return parse_windows(request.args, ATTENTION_RETENTION_SEC), None
+        except ValueError as e:
+            return None, (jsonify({"status": "error", "message": f"Geçersiz pencere: {e}"}), 400)
+
+    @app.route('/attention', methods=['GET'])
+    def get_all_attention():
+        windows, error = windows_or_error()
+        if error:
+            return error
+        return jsonify({"streams": {stream_id: worker.snapshot(windows) for stream_id, worker in workers.items()}})
+
+    @app.route('/attention/<stream_id>', methods=['GET'])
+    def get_stream_attention(stream_id):
+        worker = workers.get(stream_id)
+        if worker is None:
+            return jsonify({"status": "error", "message": f"Bilinmeyen akış: {stream_id}"}), 404
+        windows, error = windows_or_error()
+        if error:
+            return error
+        return jsonify(worker.snapshot(windows))
+
+    @app.route('/attention/<stream_id>/stream', methods=['GET'])
+    def stream_stream_attention(stream_id):
+        worker = workers.get(stream_id)
+        if worker is None:
+            return jsonify({"status": "error", "message": f"Bilinmeyen akış: {stream_id}"}), 404
+        try:
+            options = parse_stream_options(request.args)
+            events = worker.broadcaster.stream(**options)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Geçersiz akış ayarı: {e}"}), 400
+        except RuntimeError as e:
+            return jsonify({"status": "error", "message": str(e)}), 503
+        return Response(events, mimetype=STREAM_MIMETYPES[options['fmt']], headers=STREAM_HEADERS)
+
+    @app.route('/latency', methods=['GET'])
+    def get_latency():
+        return jsonify({
+            "eyenet_batcher": batcher.stats(),
+            "streams": {stream_id: {"stages": worker.timer.summary(), "eyenet": worker.analyzer.scheduler.stats()}
+                        for stream_id, worker in workers.items()},
+        })
+
+    return app
+
+
+def parse_stream(spec, index):
+    """``id=source`` or ``source`` (named stream<index>)."""
+    stream_id, sep, source = spec.partition('=')
+    if not sep:
+        return f'stream{index}', spec
+    return stream_id, source
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stream', action='append', required=True,
+                        help='id=kaynak, ör. desk1=webcam:0 veya lab=kayit.mp4 (birden fazla verilebilir)')
+    parser.add_argument('--realtime', action='store_true', help='kayıtlı kaynakları gerçek zamanlı oynat')
+    parser.add_argument('--backend', default='torch', choices=BACKENDS)
+    parser.add_argument('--model', default=None)
+    parser.add_argument('--engine', default='eager', help='torch backend için çıkarım motoru')
+    parser.add_argument('--threads', type=int, default=None, help='EyeNet için CPU thread sayısı')
+    parser.add_argument('--max-batch', type=int, default=16, help='tek EyeNet çıkarımındaki en fazla göz sayısı')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                        help='ilk isteğin diğer akışları bekleyeceği en uzun süre')
+    parser.add_argument('--eyenet-every-frame', action='store_true', help='EyeNet zamanlayıcısını kapat')
+    parser.add_argument('--port', type=int, default=8001)
+    args = parser.parse_args()
+
+    model_path = args.model or DEFAULT_MODELS[args.backend]
+    backend_options = {'threads': args.threads} if args.backend != 'remote' else {}
+    if args.backend == 'torch':
+        backend_options['engine'] = args.engine
+    backend = create_backend(args.backend, model_path, **backend_options)
+    batcher = EyeNetBatcher(backend, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms).start()
+    print(f"EyeNet backend: {args.backend} ({model_path}), paylaşılan batch en fazla {args.max_batch} göz")
+
+    workers = {}
+    for i, spec in enumerate(args.stream):
+        stream_id, source_spec = parse_stream(spec, i)
+        if stream_id in workers:
+            parser.error(f'stream id {stream_id!r} is used twice')
+        source = open_source(source_spec, realtime=args.realtime)
+        workers[stream_id] = StreamWorker(stream_id, source, batcher.run_eyenet,
+                                          scheduler=EyeNetScheduler(enabled=not args.eyenet_every_frame))
+    for worker in workers.values():
+        worker.start()
+        print(f"  - {worker.stream_id}: http://127.0.0.1:{args.port}/attention/{worker.stream_id}")
+
+    app = create_app(workers, batcher)
+    server = threading.Thread(target=app.run, kwargs={'host': '0.0.0.0', 'port': args.port, 'debug': False,
+                                                      'use_reloader': False}, daemon=True)
+    server.start()
+
+    try:
+        while any(worker.alive for worker in workers.values()):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    for worker in workers.values():
+        worker.stop()
+    for worker in workers.values():
+        worker.join(timeout=2.0)
+    batcher.stop()
+    stats = batcher.stats()
+    print(f"EyeNet: {stats['batches']} batch, ortalama {stats['mean_batch_size']:.1f} göz/batch")
+
+
+if __name__ == '__main__':
+    main()
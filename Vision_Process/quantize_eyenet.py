@@ -0,0 +1,113 @@
+"""Build an INT8 EyeNet for CPU-only deployments.
+
+The gaze head is dynamically quantized and the hourglass convolutions are
+statically quantized after calibration on UnityEyes or MPIIGaze eye crops.
+The tool prints the MPIIGaze mean angular error, CPU latency and model size
+of the float and INT8 models. It refuses to write the INT8 model if the error
+grows by more than ``--max-error-increase`` degrees. Calibration and the
+error check both use ``--input-scale``, the input range of the deployed path
+(0-255 crops in ``run_with_webcam.py``).
+
+    python quantize_eyenet.py --checkpoint checkpoint.pt --output eyenet_int8.pt
+    python run_with_webcam.py --model eyenet_int8.pt --engine int8
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import torch
+
+from datasets.mpii_gaze import MPIIGaze
+from eval_mpiigaze import evaluate
+from models.eyenet import architecture, load_checkpoint
+from models.inference import EyeNetInference, freeze, save_torchscript
+from models.quantization import calibration_batches, default_qengine, quantize_eyenet, serialized_size
+from util.benchmark import measure_latency
+
+
+def save_quantized(module, path, float_error, quantized_error, max_error_increase, **metadata):
+    """Write the INT8 ``module`` to ``path`` unless it is too inaccurate.
+
+    The model is refused when its mean angular error is more than
+    ``max_error_increase`` degrees above the float model's. Returns whether
+    the model was written.
+    """
+    if quantized_error - float_error > max_error_increase:
+        return False
+    save_torchscript(module, path, engine='int8', mpii_error=float(quantized_error), **metadata)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checkpoint', default='checkpoint.pt')
+    parser.add_argument('--output', default='eyenet_int8.pt')
+    parser.add_argument('--calibration', default='unityeyes', choices=['unityeyes', 'mpiigaze'])
+    parser.add_argument('--unityeyes-dir', default=None, help='defaults to datasets/UnityEyes/imgs')
+    parser.add_argument('--mpii-dir', default='datasets/MPIIGaze')
+    parser.add_argument('--calibration-samples', type=int, default=512)
+    parser.add_argument('--input-scale', type=float, default=255.0,
+                        help='input range to calibrate and check for: 255 for the 0-255 crops of '
+                             'run_with_webcam.py, 1 for [0, 1] inputs')
+    parser.add_argument('--eval-samples', type=int, default=None, help='MPIIGaze samples to evaluate (default: all)')
+    parser.add_argument('--max-error-increase', type=float, default=0.5,
+                        help='max allowed increase of the mean angular error (degrees)')
+    parser.add_argument('--qengine', default=default_qengine(), choices=torch.backends.quantized.supported_engines)
+    parser.add_argument('--dynamic-only', action='store_true', help='only quantize the gaze head')
+    parser.add_argument('--batch-size', type=int, default=2, help='batch size used for the latency report')
+    parser.add_argument('--iters', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=None, help='torch CPU threads')
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    device = torch.device('cpu')
+
+    if not os.path.isdir(args.mpii_dir):
+        print(f'{args.mpii_dir} not found: the accuracy gate needs the MPIIGaze evaluation subset')
+        sys.exit(1)
+    mpii = MPIIGaze(args.mpii_dir)
+
+    eyenet = load_checkpoint(args.checkpoint, device)
+    float_model = EyeNetInference(eyenet, fold_bn=True)
+
+    if args.calibration == 'unityeyes':
+        from datasets.unity_eyes import UnityEyesDataset
+        calibration_set = UnityEyesDataset(args.unityeyes_dir)
+    else:
+        calibration_set = mpii
+    calibration = calibration_batches(calibration_set, args.calibration_samples, scale=args.input_scale)
+
+    quantized = quantize_eyenet(float_model, calibration, qengine=args.qengine, static=not args.dynamic_only)
+    example = torch.zeros((args.batch_size, eyenet.img_h, eyenet.img_w))
+    float_frozen = freeze(float_model, example=example)
+    quantized_frozen = freeze(quantized, example=example)
+
+    float_error = np.mean(evaluate(float_frozen, mpii, device, limit=args.eval_samples, input_scale=args.input_scale))
+    quantized_error = np.mean(evaluate(quantized_frozen, mpii, device, limit=args.eval_samples,
+                                       input_scale=args.input_scale))
+
+    x = torch.rand((args.batch_size, eyenet.img_h, eyenet.img_w)) * 255
+    with torch.no_grad():
+        float_latency = measure_latency(float_frozen, x, iters=args.iters)
+        quantized_latency = measure_latency(quantized_frozen, x, iters=args.iters)
+
+    print(f'qengine: {args.qengine}, batch {args.batch_size}, {torch.get_num_threads()} threads')
+    print(f'  {"":<8}{"error deg":>12}{"mean ms":>10}{"p95 ms":>10}{"size MB":>10}')
+    for name, error, latency, model in [('float', float_error, float_latency, float_frozen),
+                                        ('int8', quantized_error, quantized_latency, quantized_frozen)]:
+        print(f'  {name:<8}{error:>12.3f}{latency["mean_ms"]:>10.2f}{latency["p95_ms"]:>10.2f}'
+              f'{serialized_size(model) / 2**20:>10.2f}')
+
+    if not save_quantized(quantized_frozen, args.output, float_error, quantized_error, args.max_error_increase,
+                          qengine=args.qengine, static=not args.dynamic_only, input_scale=args.input_scale,
+                          **architecture(eyenet)):
+        print(f'Mean angular error grew by {quantized_error - float_error:.3f} deg '
+              f'(> {args.max_error_increase}), not writing {args.output}')
+        sys.exit(1)
+    print(f'Saved {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import numpy as np
+
+from util.attention_stats import AttentionAggregator
+
+
+def _brute_force(times, values, now, seconds):
+    # Bucket-aligned reference: samples whose 1 s bucket lies in (now - seconds, now]
+    buckets = np.floor(times)
+    mask = (buckets > np.floor(now - seconds)) & (buckets <= np.floor(now))
+    return values[mask].mean() if mask.any() else 0.0
+
+
+def test_window_averages_match_brute_force():
+    rng = np.random.default_rng(0)
+    # 30 fps with a few gaps of several seconds
+    times = 1000.0 + np.cumsum(rng.choice([1 / 30, 1 / 30, 1 / 30, 4.0], size=3000, p=[0.33, 0.33, 0.33, 0.01]))
+    values = rng.random(len(times))
+
+    aggregator = AttentionAggregator(retention_sec=3600)
+    for t, v in zip(times, values):
+        aggregator.add(v, timestamp=t)
+
+    now = times[-1] + 0.5
+    for seconds in [1, 5, 60, 300, 1200]:
+        assert np.isclose(aggregator.average(seconds, now=now), _brute_force(times, values, now, seconds))
+    assert np.isclose(aggregator.total_average(), values.mean())
+    assert aggregator.average(10, now=now + 100) == 0.0
+
+
+def test_retention_bounds_memory_and_window():
+    aggregator = AttentionAggregator(retention_sec=10)
+    for t in range(100):
+        aggregator.add(1.0 if t < 50 else 0.0, timestamp=float(t))
+    # Windows longer than the retention are clamped to it
+    assert aggregator.average(1000, now=99.0) == 0.0
+    assert aggregator._cum_sum.shape == (11,)
+    assert np.isclose(aggregator.total_average(), 0.5)
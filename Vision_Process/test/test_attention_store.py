@@ -0,0 +1,90 @@
+import json
+import logging
+
+import pytest
+
+import flask_api
+from util.attention_store import AttentionStore, IngestSummary
+
+
+def records(start, stop):
+    return [{'total_attention': i / 10, 'left_attention': 1.0, 'i': i} for i in range(start, stop)]
+
+
+def test_ring_buffer_cursor_and_wrap():
+    store = AttentionStore(capacity=5)
+    assert store.extend(records(0, 3), received_at=100.0) == (0, 3)
+    assert store.extend(records(3, 7), received_at=100.0) == (3, 7)
+    assert len(store) == 5
+
+    got, cursor, missed = store.read(since=0, limit=10)
+    assert [r['i'] for r in got] == [2, 3, 4, 5, 6] and cursor == 7 and missed == 2
+    got, cursor, missed = store.read(since=cursor)
+    assert got == [] and cursor == 7 and missed == 0
+    assert [r['i'] for r in store.read(limit=2)[0]] == [5, 6]
+
+    stats = store.stats()
+    assert stats['total_records'] == 5
+    assert stats['average_total_attention'] == pytest.approx(0.4)
+    assert stats['max_total_attention'] == pytest.approx(0.6) and stats['average_left_attention'] == 1.0
+
+    # A batch larger than the capacity keeps its newest records
+    assert store.extend(records(7, 20)) == (7, 20)
+    assert [r['i'] for r in store.read(since=7, limit=10)[0]] == [15, 16, 17, 18, 19]
+
+
+def test_retention():
+    store = AttentionStore(capacity=10, retention_sec=60)
+    store.extend(records(0, 3), received_at=0.0)
+    store.extend(records(3, 5))
+    assert len(store) == 2
+    got, _, missed = store.read(since=0)
+    assert [r['i'] for r in got] == [3, 4] and missed == 3
+    assert AttentionStore(capacity=3).stats() is None
+
+
+def test_ingest_summary_is_rate_limited(caplog):
+    summary = IngestSummary(logging.getLogger('test_ingest'), interval_sec=3600)
+    with caplog.at_level(logging.INFO, logger='test_ingest'):
+        for _ in range(100):
+            summary.add(records(0, 10))
+        assert caplog.records == []
+        summary.interval_sec = 0
+        summary.add(records(0, 10))
+    assert len(caplog.records) == 1 and '1010 kayıt, 101 istek' in caplog.records[0].getMessage()
+
+
+def test_bulk_ingestion_endpoints(monkeypatch):
+    monkeypatch.setattr(flask_api, 'attention_store', AttentionStore(capacity=100))
+    client = flask_api.app.test_client()
+
+    body = '\n'.join(json.dumps(r) for r in records(0, 5)) + '\n'
+    response = client.post('/attention/bulk', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200 and response.get_json()['accepted'] == 5
+    response = client.post('/attention/bulk', json=records(5, 8))
+    assert response.get_json()['cursor'] == 8
+    response = client.post('/attention', json=records(8, 9)[0])
+    assert response.get_json()['data_count'] == 9
+
+    response = client.post('/attention/bulk', data='{"a": 1}\n{oops\n', content_type='application/x-ndjson')
+    assert response.status_code == 400 and '2. satır' in response.get_json()['message']
+    assert client.post('/attention/bulk', json=[1, 2]).status_code == 400
+    assert client.post('/attention', data='', content_type='application/json').status_code == 400
+    # Each NDJSON line is exactly one non-empty object
+    response = client.post('/attention/bulk', data='{"a": 1}\n{"a": 1},{"b": 2}\n', content_type='application/x-ndjson')
+    assert response.status_code == 400 and '2. satır' in response.get_json()['message']
+    response = client.post('/attention/bulk', data='{"a": 1}\n\n{}\n', content_type='application/x-ndjson')
+    assert response.status_code == 400 and '3. satır' in response.get_json()['message']
+    assert client.post('/attention', json={}).status_code == 400
+    assert client.post('/attention/bulk', json=[{'a': 1}, {}]).status_code == 400
+    # Without a JSON content type the body is not parsed, NDJSON only goes to /attention/bulk
+    assert client.post('/attention', data=json.dumps(records(0, 1)[0]), content_type='text/plain').status_code == 415
+    assert client.post('/attention', data=body, content_type='application/x-ndjson').status_code == 415
+
+    data = client.get('/data').get_json()
+    assert [r['i'] for r in data['recent_data']] == list(range(9)) and data['next_cursor'] == 9
+    data = client.get('/data?since=6&limit=2').get_json()
+    assert [r['i'] for r in data['recent_data']] == [6, 7] and data['next_cursor'] == 8
+    assert all('received_at' in r for r in data['recent_data'])
+    assert client.get('/data?since=x').status_code == 400
+    assert client.get('/stats').get_json()['stats']['total_records'] == 9
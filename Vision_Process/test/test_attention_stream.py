@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+
+import pytest
+
+from util.attention_stream import AttentionBroadcaster, Subscriber, parse_stream_options
+
+
+def snapshot(attention, **fields):
+    return dict({'attention': attention, 'face_found': True, 'left_eye_open': True}, **fields)
+
+
+def test_only_changes_beyond_delta_are_queued():
+    subscriber = Subscriber(delta=0.1, buffer=8)
+    for value in [0.5, 0.52, 0.55, 0.61, 0.6]:
+        subscriber.offer(snapshot(value))
+    subscriber.offer(snapshot(0.6, left_eye_open=False))  # a field change always counts
+    assert [s['attention'] for s in subscriber._queue] == [0.5, 0.61, 0.6]
+
+
+def test_slow_subscriber_gets_latest_and_counts_drops():
+    subscriber = Subscriber(delta=0.0, buffer=2)
+    for i in range(5):
+        subscriber.offer(snapshot(i / 10))
+    assert len(subscriber._queue) == 2
+    assert subscriber.take(timeout=0)['attention'] == 0.4
+    assert subscriber.dropped == 4
+    assert subscriber.take(timeout=0) is None
+
+
+def test_stream_rate_limit_coalesces_and_unsubscribes():
+    broadcaster = AttentionBroadcaster()
+    broadcaster.publish(snapshot(0.0))
+    events = broadcaster.stream(fmt='ndjson', delta=0.0, max_rate=20.0, heartbeat_sec=1.0)
+    first = json.loads(next(events))
+    assert first['attention'] == 0.0 and first['seq'] == 1 and first['dropped'] == 0
+
+    def publish():
+        for i in range(1, 21):
+            broadcaster.publish(snapshot(i / 100))
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=publish)
+    start = time.monotonic()
+    thread.start()
+    thread.join()
+    # Rate limited: the next event comes 50 ms after the first and is the newest snapshot
+    second = json.loads(next(events))
+    assert time.monotonic() - start >= 0.04
+    assert second['seq'] == 21 and second['dropped'] == 19
+    events.close()
+    assert broadcaster.subscriber_count == 0
+
+
+def test_subscriber_limit_and_options():
+    broadcaster = AttentionBroadcaster(max_subscribers=1)
+    broadcaster.stream()
+    with pytest.raises(RuntimeError):
+        broadcaster.stream()
+    assert parse_stream_options({'format': 'ndjson', 'delta': '0.1', 'buffer': '2'}) == \
+        {'fmt': 'ndjson', 'delta': 0.1, 'buffer': 2}
+    for args in [{'format': 'xml'}, {'delta': '2'}, {'buffer': '0'}, {'max_rate': 'fast'}]:
+        with pytest.raises(ValueError):
+            parse_stream_options(args)
+
+
+def test_sse_endpoint():
+    import run_with_webcam
+
+    client = run_with_webcam.app.test_client()
+    assert client.get('/attention/stream?format=xml').status_code == 400
+
+    run_with_webcam.attention_broadcaster.publish(snapshot(0.7))
+    response = client.get('/attention/stream?max_rate=0', buffered=False)
+    assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    chunk = next(response.response)
+    chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+    assert chunk.startswith('id: ') and '"attention":0.7' in chunk and chunk.endswith('\n\n')
+    response.close()
+    assert run_with_webcam.attention_broadcaster.subscriber_count == 0
+
+
+def test_closing_an_unstarted_stream_unsubscribes():
+    broadcaster = AttentionBroadcaster(max_subscribers=2)
+    # E.g. HEAD requests: the server closes the body without iterating it
+    for _ in range(5):
+        broadcaster.stream(fmt='ndjson').close()
+    assert broadcaster.subscriber_count == 0
@@ -0,0 +1,66 @@
+import threading
+
+import numpy as np
+import pytest
+
+from backends.base import EyeNetBackend
+from backends.batcher import EyeNetBatcher
+from util.eye_sample import EyeSample
+
+
+class MeanBackend(EyeNetBackend):
+    """Gaze = mean pixel value of the crop, so results can be matched to their inputs."""
+
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+        self.release = threading.Event()
+
+    def infer(self, batch):
+        self.release.wait(timeout=2.0)
+        self.batch_sizes.append(len(batch))
+        mean = batch.mean(axis=(1, 2))
+        return np.zeros((len(batch), 34, 2)), np.stack([mean, mean], axis=1)
+
+
+def make_eyes(value):
+    img = np.full((96, 160), value, dtype=np.uint8)
+    return [EyeSample(None, img, is_left, np.eye(3)[:2], 40.0) for is_left in (True, False)]
+
+
+def test_concurrent_callers_share_batches_and_get_their_own_results():
+    backend = MeanBackend()
+    batcher = EyeNetBatcher(backend, max_batch=16, max_wait_ms=50.0).start()
+    results = {}
+
+    def call(value):
+        results[value] = batcher.run_eyenet(make_eyes(value))
+
+    threads = [threading.Thread(target=call, args=(value,)) for value in (10, 20, 30, 40)]
+    for thread in threads:
+        thread.start()
+    backend.release.set()
+    for thread in threads:
+        thread.join(timeout=5.0)
+    batcher.stop()
+
+    for value in (10, 20, 30, 40):
+        assert len(results[value]) == 2
+        assert all(np.allclose(prediction.gaze, value) for prediction in results[value])
+    assert sum(backend.batch_sizes) == 8
+    assert len(backend.batch_sizes) < 4
+    stats = batcher.stats()
+    assert stats['eyes'] == 8 and stats['mean_batch_size'] > 2
+
+
+def test_backend_errors_reach_the_caller():
+    class FailingBackend(EyeNetBackend):
+        def infer(self, batch):
+            raise ValueError('model failed')
+
+    batcher = EyeNetBatcher(FailingBackend()).start()
+    with pytest.raises(ValueError, match='model failed'):
+        batcher.run_eyenet(make_eyes(1))
+    batcher.stop()
+    with pytest.raises(RuntimeError):
+        batcher.run_eyenet(make_eyes(1))
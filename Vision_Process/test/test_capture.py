@@ -0,0 +1,40 @@
+import threading
+
+import numpy as np
+
+from util.capture import LatestFrameCapture
+
+
+class FakeCapture:
+    def __init__(self, nframes):
+        self.nframes = nframes
+        self.i = 0
+        self.release = threading.Event()
+
+    def read(self):
+        if self.i >= self.nframes:
+            return False, None
+        if self.i > 0:
+            self.release.wait()
+        self.i += 1
+        return True, np.full((4, 4), self.i, dtype=np.uint8)
+
+
+def test_latest_frame_capture_drops_stale_frames():
+    fake = FakeCapture(nframes=5)
+    capture = LatestFrameCapture(fake).start()
+
+    ok, frame, timestamp = capture.read(timeout=1.0)
+    assert ok and frame[0, 0] == 1 and timestamp is not None
+
+    # Let the producer run ahead; only the newest frame must be handed out
+    fake.release.set()
+    capture._thread.join(timeout=1.0)
+    ok, frame, _ = capture.read(timeout=1.0)
+    assert ok and frame[0, 0] == 5
+
+    ok, frame, _ = capture.read(timeout=1.0)
+    assert not ok and frame is None
+
+    stats = capture.stats()
+    assert stats == {'captured': 5, 'consumed': 2, 'dropped': 3}
@@ -0,0 +1,30 @@
+import numpy as np
+
+from backends.base import project_landmarks
+from util.eye_prediction import EyePrediction
+from util.eye_sample import EyeSample
+
+
+def test_eye_sample_keeps_views():
+    crop = np.arange(96 * 160, dtype=np.uint8).reshape(96, 160)
+    flipped = np.fliplr(crop)
+    sample = EyeSample(orig_img=None, img=flipped, is_left=True, transform_inv=np.eye(3)[:2],
+                       estimated_radius=40.0)
+    assert np.shares_memory(sample.img, crop)
+    assert not hasattr(sample, '__dict__')
+    prediction = EyePrediction(eye_sample=sample, landmarks=np.zeros((34, 2)), gaze=np.zeros(2))
+    assert prediction.eye_sample is sample and not hasattr(prediction, '__dict__')
+
+
+def test_project_landmarks_accepts_affine_and_homogeneous_transforms():
+    affine = np.array([[0.5, 0.0, 300.0], [0.0, 0.5, 120.0]])
+    homogeneous = np.vstack([affine, [0.0, 0.0, 1.0]])
+    landmarks = np.random.default_rng(0).random((2, 34, 2)) * 40
+    eyes_affine = [EyeSample(None, None, is_left, affine, 40.0) for is_left in (True, False)]
+    eyes_homogeneous = [EyeSample(None, None, is_left, homogeneous, 40.0) for is_left in (True, False)]
+
+    projected = project_landmarks(landmarks, eyes_affine)
+    assert projected.shape == (2, 34, 2)
+    assert np.allclose(projected, project_landmarks(landmarks, eyes_homogeneous))
+    # Right eye: heatmap (y, x) -> crop (x, y) scaled by 2, then affine to the frame
+    assert np.allclose(projected[1, :, 0], 0.5 * landmarks[1, :, 1] * 2 + 300.0)
@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+
+from util.eyenet_scheduler import EyeNetScheduler
+
+
+def _run(scheduler, points, pose, t):
+    if scheduler.should_run(points, 50.0, pose, t):
+        scheduler.update(points, pose, t)
+        return True
+    return False
+
+
+def test_runs_on_motion_pose_change_and_staleness():
+    scheduler = EyeNetScheduler(motion_threshold=0.05, pose_threshold_deg=3.0, max_staleness_sec=0.2)
+    points = np.zeros((6, 2), dtype=np.float32)
+    pose = (0.0, 0.0, 0.0)
+
+    assert _run(scheduler, points, pose, 0.0)  # no reference yet
+    assert not _run(scheduler, points + 1.0, pose, 1 / 30)  # 1 px < 5% of a 50 px eye
+    moved = points.copy()
+    moved[4] += 3.0  # iris moved by 3 px without head motion
+    assert _run(scheduler, moved, pose, 2 / 30)
+    assert not _run(scheduler, moved, (2.0, 0.0, 0.0), 3 / 30)
+    assert _run(scheduler, moved, (4.0, 0.0, 0.0), 4 / 30)
+    assert not _run(scheduler, moved, (4.0, 0.0, 0.0), 4 / 30 + 0.19)
+    assert _run(scheduler, moved, (4.0, 0.0, 0.0), 4 / 30 + 0.21)
+
+    scheduler.invalidate()
+    assert _run(scheduler, moved, (4.0, 0.0, 0.0), 0.5)
+    assert scheduler.stats()['eyenet_runs'] == 5 and scheduler.frames == 8
+
+
+def test_effective_rate_of_a_still_face():
+    scheduler = EyeNetScheduler(max_staleness_sec=0.2)
+    points = np.zeros((6, 2), dtype=np.float32)
+    for i in range(120):
+        _run(scheduler, points, (0.0, 0.0, 0.0), i / 30)
+    stats = scheduler.stats()
+    assert np.isclose(stats['frame_hz'], 30.0)
+    assert 4.0 <= stats['eyenet_hz'] <= 5.5
+    assert stats['run_ratio'] < 0.2
+
+
+def test_disabled_runs_every_frame():
+    scheduler = EyeNetScheduler(enabled=False)
+    points = np.zeros((6, 2), dtype=np.float32)
+    assert all(_run(scheduler, points, (0.0, 0.0, 0.0), i / 30) for i in range(10))
+
+
+def test_stats_while_the_frame_thread_runs():
+    scheduler = EyeNetScheduler(max_staleness_sec=0.0)
+    points = np.zeros((6, 2), dtype=np.float32)
+    errors = []
+    done = threading.Event()
+
+    def read_stats():
+        while not done.is_set():
+            try:
+                stats = scheduler.stats()
+                assert stats['eyenet_runs'] <= stats['frames']
+            except Exception as e:  # e.g. deque mutated during iteration
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=read_stats)
+    reader.start()
+    for i in range(20000):
+        _run(scheduler, points, (0.0, 0.0, 0.0), i / 30)
+    done.set()
+    reader.join(timeout=5.0)
+    assert errors == []
@@ -0,0 +1,144 @@
+import socket
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from backends import create_backend, eyenet_socket
+from backends.base import EyeNetBackend
+from backends.batcher import EyeNetBatcher
+from backends.eyenet_socket import (ERROR_LENGTH, REQUEST_HEADER, REQUEST_MAGIC, RESPONSE_HEADER, RESPONSE_MAGIC,
+                                    STATUS_ERROR, EyeNetSocketServer, decode_response)
+from util.eye_sample import EyeSample
+
+
+class PixelBackend(EyeNetBackend):
+    """Landmarks and gaze derived from the crop pixels, so every eye has its own output."""
+
+    def infer(self, batch):
+        n = len(batch)
+        landmarks = batch[:, :34, :2].astype(np.float32) / 8
+        gaze = np.stack([batch[:, 0, 0], batch[:, 1, 1]], axis=1) / 255
+        return landmarks.reshape(n, 34, 2), gaze.astype(np.float32)
+
+
+class FailingBackend(EyeNetBackend):
+    def infer(self, batch):
+        raise ValueError('model failed')
+
+
+def make_eyes(seed):
+    rng = np.random.default_rng(seed)
+    eyes = []
+    for is_left in (True, False):
+        img = rng.integers(0, 256, (96, 160), dtype=np.uint8)
+        transform = np.array([[0.5, 0.0, rng.uniform(0, 600)], [0.0, 0.5, rng.uniform(0, 400)]])
+        eyes.append(EyeSample(None, np.fliplr(img) if is_left else img, is_left, transform, 40.0))
+    return eyes
+
+
+@pytest.fixture
+def serve(tmp_path):
+    servers = []
+
+    def start(backend):
+        batcher = EyeNetBatcher(backend, max_wait_ms=5.0).start()
+        server = EyeNetSocketServer(str(tmp_path / 'eyenet.sock'), batcher.run_eyenet)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append((server, batcher))
+        return server
+
+    yield start
+    for server, batcher in servers:
+        server.shutdown()
+        server.server_close()
+        batcher.stop()
+
+
+def test_remote_backend_matches_local_backend(serve):
+    server = serve(PixelBackend())
+    remote = create_backend('remote', server.socket_path)
+    local = PixelBackend()
+    results = {}
+
+    def call(seed):
+        client = create_backend('remote', server.socket_path)
+        results[seed] = client.run_eyenet(make_eyes(seed))
+        client.close()
+
+    threads = [threading.Thread(target=call, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5.0)
+    assert remote.run_eyenet([]) == []
+    results[4] = remote.run_eyenet(make_eyes(4))
+    remote.close()
+
+    for seed, predictions in results.items():
+        eyes = make_eyes(seed)
+        expected = local.run_eyenet(eyes)
+        assert len(predictions) == 2
+        for prediction, eye, reference in zip(predictions, eyes, expected):
+            assert prediction.eye_sample.is_left == eye.is_left
+            assert np.allclose(prediction.landmarks, reference.landmarks)
+            assert np.allclose(prediction.gaze, reference.gaze)
+
+
+def test_server_errors_are_raised_by_the_client(serve):
+    server = serve(FailingBackend())
+    remote = create_backend('remote', server.socket_path)
+    for _ in range(2):  # the connection stays usable after an error
+        with pytest.raises(RuntimeError, match='model failed'):
+            remote.run_eyenet(make_eyes(0))
+    remote.close()
+
+
+def test_missing_server(tmp_path):
+    remote = create_backend('remote', str(tmp_path / 'missing.sock'))
+    with pytest.raises(ConnectionError, match='eyenet_server.py'):
+        remote.run_eyenet(make_eyes(0))
+
+
+def test_server_rejects_other_crop_sizes(serve):
+    server = serve(PixelBackend())
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(5.0)
+    sock.connect(server.socket_path)
+    # A huge declared crop size must not make the server allocate the body
+    sock.sendall(REQUEST_HEADER.pack(REQUEST_MAGIC, 64, 65535, 65535))
+    with pytest.raises(RuntimeError, match='unsupported eye crop size 65535x65535'):
+        decode_response(sock, make_eyes(0))
+    assert sock.recv(1) == b''  # the stream is out of sync, the server closed it
+    sock.close()
+
+
+def test_truncated_error_response_is_a_connection_error():
+    server_end, client_end = socket.socketpair()
+    message = RESPONSE_HEADER.pack(RESPONSE_MAGIC, STATUS_ERROR, 0) + ERROR_LENGTH.pack(100) + b'model'
+    server_end.sendall(message)
+    server_end.close()
+    with pytest.raises(ConnectionError):
+        decode_response(client_end, make_eyes(0))
+    client_end.close()
+
+    server_end, client_end = socket.socketpair()
+    server_end.sendall(RESPONSE_HEADER.pack(RESPONSE_MAGIC, STATUS_ERROR, 0))
+    server_end.close()
+    with pytest.raises(ConnectionError):
+        decode_response(client_end, make_eyes(0))
+    client_end.close()
+
+
+def test_platform_without_unix_sockets(monkeypatch):
+    # Windows Python: the apps still import, only the remote backend is refused
+    code = ("import socket, socketserver; del socket.AF_UNIX; del socketserver.UnixStreamServer; "
+            "import backends.eyenet_socket, multi_stream, run_with_webcam")
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=str(Path(__file__).parents[1]))
+
+    monkeypatch.setattr(eyenet_socket, 'UNIX_SOCKETS_AVAILABLE', False)
+    with pytest.raises(RuntimeError, match='torch or onnx'):
+        create_backend('remote', '/tmp/missing.sock')
@@ -0,0 +1,56 @@
+import numpy as np
+
+from util.face_roi import FaceROITracker
+from util.mediapipe_face import to_pixels
+
+FRAME_SHAPE = (480, 960, 3)
+
+
+def _face(cx, cy, size):
+    rng = np.random.default_rng(0)
+    return np.array([cx, cy], dtype=np.float32) + (rng.random((478, 2)) - 0.5).astype(np.float32) * size
+
+
+def test_roi_follows_face_with_hysteresis():
+    tracker = FaceROITracker()
+    assert tracker.region(FRAME_SHAPE) == (0, 0, 960, 480)
+
+    tracker.update(_face(400, 240, 150), FRAME_SHAPE)
+    roi = tracker.region(FRAME_SHAPE)
+    x0, y0, x1, y1 = roi
+    assert x0 <= 325 and x1 >= 475 and y0 <= 165 and y1 >= 315
+    assert (x1 - x0) * (y1 - y0) < 0.25 * 960 * 480
+
+    # Small motion keeps the same crop, leaving the margin moves it
+    tracker.update(_face(405, 242, 150), FRAME_SHAPE)
+    assert tracker.region(FRAME_SHAPE) == roi
+    tracker.update(_face(520, 240, 150), FRAME_SHAPE)
+    moved = tracker.region(FRAME_SHAPE)
+    assert moved != roi and moved[2] >= 595
+
+    # Face at the border: the crop is clipped to the frame
+    tracker.update(_face(930, 240, 150), FRAME_SHAPE)
+    assert tracker.region(FRAME_SHAPE)[2] == 960
+
+    tracker.reset()
+    assert tracker.region(FRAME_SHAPE) == (0, 0, 960, 480)
+    assert tracker.stats() == {'roi_frames': 0, 'full_frames': 0, 'roi_ratio': 0.0}
+
+
+def test_each_frame_is_counted_once():
+    tracker = FaceROITracker()
+    tracker.count(used_roi=False)
+    tracker.count(used_roi=True)
+    tracker.count(used_roi=True)
+    assert tracker.stats() == {'roi_frames': 2, 'full_frames': 1, 'roi_ratio': 2 / 3}
+
+
+def test_disabled_tracker_uses_full_frame():
+    tracker = FaceROITracker(enabled=False)
+    tracker.update(_face(400, 240, 150), FRAME_SHAPE)
+    assert tracker.region(FRAME_SHAPE) == (0, 0, 960, 480)
+
+
+def test_crop_landmarks_map_back_to_frame():
+    normalized = np.array([[0.5, 0.25, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32)
+    assert np.allclose(to_pixels(normalized, 200, 100, origin=(300, 50)), [[400, 75], [300, 150]])
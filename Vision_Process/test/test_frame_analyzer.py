@@ -0,0 +1,169 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from util.eye_prediction import EyePrediction
+from util.eyenet_scheduler import EyeNetScheduler
+from util.face_roi import FaceROITracker
+from util.frame_analyzer import GAZE_VERTICAL_OFFSET_RAD, FrameAnalyzer
+
+FRAME_SHAPE = (480, 640, 3)
+
+
+def face_points():
+    """478 full-frame pixel landmarks of a frontal face with open eyes."""
+    rng = np.random.default_rng(0)
+    points = np.array([320, 240], dtype=np.float32) + (rng.random((478, 2)) - 0.5).astype(np.float32) * 150
+    fixed = {
+        1: (320, 260), 152: (320, 330), 61: (295, 290), 291: (345, 290),  # nose, chin, mouth corners
+        33: (270, 220), 160: (280, 212), 158: (290, 212), 133: (300, 220), 153: (290, 228), 144: (280, 228),
+        263: (370, 220), 387: (360, 212), 385: (350, 212), 362: (340, 220), 380: (350, 228), 373: (360, 228),
+        468: (285, 220), 473: (355, 220),  # iris centres
+    }
+    for index, xy in fixed.items():
+        points[index] = xy
+    return points
+
+
+class FakeFaceMesh:
+    """Returns ``points`` normalized to the image it is given, which is the tracker's region."""
+
+    def __init__(self, points, tracker=None, visible=lambda image: True):
+        self.points = points
+        self.tracker = tracker
+        self.visible = visible
+        self.shapes = []
+
+    def process(self, image):
+        self.shapes.append(image.shape[:2])
+        if not self.visible(image):
+            return SimpleNamespace(multi_face_landmarks=None)
+        roi = self.tracker.roi if self.tracker is not None else None
+        origin = roi[:2] if roi is not None else (0, 0)
+        h, w = image.shape[:2]
+        normalized = (self.points - np.array(origin, dtype=np.float32)) / np.array([w, h], dtype=np.float32)
+        landmarks = [SimpleNamespace(x=float(x), y=float(y), z=0.0) for x, y in normalized]
+        return SimpleNamespace(multi_face_landmarks=[SimpleNamespace(landmark=landmarks)])
+
+    def close(self):
+        pass
+
+
+class FakeEyeNet:
+    def __init__(self, gaze=(0.1, 0.05)):
+        self.gaze = np.array(gaze)
+        self.calls = 0
+
+    def __call__(self, eyes):
+        self.calls += 1
+        return [EyePrediction(eye, np.zeros((34, 2)), self.gaze.copy()) for eye in eyes]
+
+
+def make_analyzer(eyenet, mesh, scheduler=None, face_roi=None, **kwargs):
+    face_roi = face_roi or FaceROITracker(enabled=False)
+    mesh.tracker = face_roi
+    analyzer = FrameAnalyzer(eyenet, face_mesh=mesh, scheduler=scheduler, face_roi=face_roi, gaze_smoothing=0.0,
+                             **kwargs)
+    analyzer.timer.begin()  # laps only need a start point, frames are not timed here
+    return analyzer
+
+
+def frame(value=None):
+    if value is not None:
+        return np.full(FRAME_SHAPE, value, dtype=np.uint8)
+    return np.random.default_rng(1).integers(0, 256, size=FRAME_SHAPE, dtype=np.uint8)
+
+
+def test_face_lost_scores_zero_and_forces_a_new_inference():
+    eyenet = FakeEyeNet()
+    mesh = FakeFaceMesh(face_points())
+    analyzer = make_analyzer(eyenet, mesh)
+    image = frame()
+
+    result = analyzer.analyze(image, 0.0)
+    assert result['face_found'] and result['gaze_found'] and eyenet.calls == 1
+    assert result['left_eye_open'] and result['right_eye_open']
+    assert result['left_eye_img'].shape == (96, 160)
+
+    mesh.visible = lambda image: False
+    result = analyzer.analyze(image, 1 / 30)
+    assert not result['face_found']
+    assert result['total_attention'] == 0.0 and result['left_status'] == "Bakmıyor"
+    assert analyzer.last_preds is None
+
+    # Same landmarks within max_staleness_sec, but the face was lost in between
+    mesh.visible = lambda image: True
+    assert analyzer.analyze(image, 2 / 30)['gaze_found']
+    assert eyenet.calls == 2
+
+
+def test_skipped_frames_reuse_the_last_prediction():
+    eyenet = FakeEyeNet()
+    points = face_points()
+    mesh = FakeFaceMesh(points)
+    analyzer = make_analyzer(eyenet, mesh, scheduler=EyeNetScheduler(max_staleness_sec=0.2))
+    image = frame()
+
+    first = analyzer.analyze(image, 0.0)
+    second = analyzer.analyze(image, 1 / 30)
+    assert eyenet.calls == 1
+    assert second['gaze_found'] and second['mobility'] == 0.0
+    assert np.allclose(second['left_gaze'], first['left_gaze'])
+    assert np.allclose(second['eye_overlays'][0]['origin'], first['eye_overlays'][0]['origin'])
+    # Only real inferences are calibration samples
+    assert len(analyzer.gaze_samples_left) == 1
+
+    # The eyes moved: the stale overlays would be wrong, EyeNet runs again
+    mesh.points = points + np.array([20.0, 0.0], dtype=np.float32)
+    analyzer.analyze(image, 2 / 30)
+    assert eyenet.calls == 2
+
+    analyzer.analyze(image, 2 / 30 + 0.1)
+    assert eyenet.calls == 2
+    analyzer.analyze(image, 2 / 30 + 0.25)
+    assert eyenet.calls == 3
+    assert analyzer.scheduler.stats()['eyenet_runs'] == 3
+
+
+def test_calibration_uses_frame_timestamps():
+    eyenet = FakeEyeNet(gaze=(0.2, -0.1))
+    analyzer = make_analyzer(eyenet, FakeFaceMesh(face_points()), scheduler=EyeNetScheduler(enabled=False),
+                             calibration_sec=1.0)
+    image = frame()
+
+    # Frames are analyzed back to back; only their timestamps span the calibration period
+    for t in 1000.0 + 0.25 * np.arange(5):
+        result = analyzer.analyze(image, t)
+        assert not analyzer.offset_calibrated and not analyzer.gaze_offset_calibrated
+        assert np.allclose(result['left_gaze'], [0.2, -0.1 + GAZE_VERTICAL_OFFSET_RAD])
+
+    result = analyzer.analyze(image, 1001.25)
+    assert analyzer.offset_calibrated and analyzer.gaze_offset_calibrated
+    assert len(analyzer.pitch_samples) == 6
+    assert np.isclose(analyzer.pitch_offset, result['pitch'])
+    assert np.allclose(analyzer.gaze_offset_left, [0.2, -0.1])
+    assert np.allclose(result['left_gaze'], [0.0, GAZE_VERTICAL_OFFSET_RAD])
+    assert np.allclose(result['right_gaze'], [0.0, GAZE_VERTICAL_OFFSET_RAD])
+
+
+def test_face_lost_in_roi_falls_back_to_full_frame_once():
+    tracker = FaceROITracker()
+    mesh = FakeFaceMesh(face_points(), visible=lambda image: image.shape[:2] == FRAME_SHAPE[:2])
+    analyzer = make_analyzer(FakeEyeNet(), mesh, face_roi=tracker)
+    image = frame(200)
+
+    assert analyzer.analyze(image, 0.0)['face_found']
+    assert tracker.roi is not None
+    assert analyzer.analyze(image, 1 / 30)['face_found']
+    assert mesh.shapes[1] != FRAME_SHAPE[:2] and mesh.shapes[2] == FRAME_SHAPE[:2]
+    assert tracker.stats() == {'roi_frames': 0, 'full_frames': 2, 'roi_ratio': 0.0}
+
+    mesh.visible = lambda image: True
+    assert analyzer.analyze(image, 2 / 30)['face_found']
+    assert len(mesh.shapes) == 4
+    assert tracker.stats() == {'roi_frames': 1, 'full_frames': 2, 'roi_ratio': 1 / 3}
+
+    # Only the face region holds pixels of this frame, the rest of the gray buffer is cleared
+    x0, y0, x1, y1 = tracker.roi
+    assert (analyzer.gray[y0:y1, x0:x1] == 200).all()
+    assert int(analyzer.gray.sum()) == 200 * (x1 - x0) * (y1 - y0)
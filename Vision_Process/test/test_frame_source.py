@@ -0,0 +1,65 @@
+import time
+
+import cv2
+import numpy as np
+
+from util.capture import LatestFrameCapture
+from util.frame_source import ImageDirectorySource, SyntheticSource, open_source
+
+
+def _read_all(source):
+    frames, timestamps = [], []
+    while True:
+        ok, frame, timestamp = source.read()
+        if not ok:
+            return frames, timestamps
+        frames.append(frame)
+        timestamps.append(timestamp)
+
+
+def test_synthetic_source_is_deterministic():
+    a, ta = _read_all(SyntheticSource(width=64, height=32, num_frames=5, start_time=100.0, fps=10))
+    b, tb = _read_all(open_source('synthetic:5', fps=10))
+    assert len(a) == len(b) == 5
+    assert a[0].shape == (32, 64, 3) and a[0].dtype == np.uint8
+    assert np.allclose(ta, 100.0 + np.arange(5) / 10)
+    assert np.allclose(np.diff(tb), 0.1)
+
+
+def test_image_directory_source(tmp_path):
+    for i in range(3):
+        cv2.imwrite(str(tmp_path / f'{i:04d}.png'), np.full((8, 8, 3), i, dtype=np.uint8))
+    (tmp_path / 'notes.txt').write_text('not an image')
+
+    source = open_source(str(tmp_path), fps=5)
+    assert isinstance(source, ImageDirectorySource) and len(source) == 3
+    frames, timestamps = _read_all(source)
+    assert [frame[0, 0, 0] for frame in frames] == [0, 1, 2]
+    assert np.allclose(np.diff(timestamps), 0.2)
+
+
+def test_video_file_source(tmp_path):
+    path = str(tmp_path / 'clip.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (32, 16))
+    for i in range(4):
+        writer.write(np.full((16, 32, 3), 60 * i, dtype=np.uint8))
+    writer.release()
+
+    frames, timestamps = _read_all(open_source(path))
+    assert len(frames) == 4 and frames[0].shape == (16, 32, 3)
+    assert np.allclose(np.diff(timestamps), 1 / 25)
+
+
+def test_realtime_source_is_paced_and_keeps_timestamps():
+    source = SyntheticSource(width=16, height=8, num_frames=3, realtime=True, fps=50)
+    assert source.live
+    start = time.time()
+    capture = LatestFrameCapture(source).start()
+    timestamps = []
+    while True:
+        ok, _, timestamp = capture.read(timeout=1.0)
+        if not ok:
+            break
+        timestamps.append(timestamp)
+    assert time.time() - start >= 2 / 50
+    assert timestamps[-1] == source.start_time + 2 / 50
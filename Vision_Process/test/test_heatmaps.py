@@ -0,0 +1,42 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from util.heatmaps import HeatmapCollate, render_heatmaps, render_heatmaps_torch
+from util.preprocess import gaussian_2d, get_heatmaps
+
+
+def _reference(landmarks):
+    return np.array([[gaussian_2d(80, 48, cx=x, cy=y, sigma=2.0) for (y, x) in sample] for sample in landmarks])
+
+
+def test_batched_heatmaps_match_gaussian_2d():
+    rng = np.random.default_rng(0)
+    # Also landmarks outside the heatmap, as after a large random shift
+    landmarks = (rng.random((3, 34, 2)) * [60, 100] - [6, 10]).astype(np.float32)
+    expected = _reference(landmarks)
+
+    heatmaps = render_heatmaps(landmarks)
+    assert heatmaps.shape == (3, 34, 48, 80) and heatmaps.dtype == np.float32
+    assert np.allclose(heatmaps, expected, atol=1e-6)
+    assert np.allclose(get_heatmaps(80, 48, landmarks[0]), expected[0], atol=1e-6)
+    assert np.allclose(render_heatmaps_torch(torch.from_numpy(landmarks)).numpy(), expected, atol=1e-6)
+
+
+def test_heatmap_collate_adds_batch_heatmaps():
+    rng = np.random.default_rng(1)
+    samples = [{'img': np.zeros((96, 160), dtype=np.float32),
+                'landmarks': (rng.random((34, 2)) * [48, 80]).astype(np.float32)} for _ in range(4)]
+    batch = HeatmapCollate()(samples)
+    assert batch['heatmaps'].shape == (4, 34, 48, 80)
+    expected = _reference(np.stack([sample['landmarks'] for sample in samples]))
+    assert np.allclose(batch['heatmaps'].numpy(), expected, atol=1e-6)
+
+
+def test_preprocess_imports_without_torch():
+    # sys.modules['torch'] = None makes every torch import fail
+    code = "import sys; sys.modules['torch'] = None; import util.preprocess, util.heatmaps"
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=str(Path(__file__).parents[1]))
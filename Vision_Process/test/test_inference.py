@@ -0,0 +1,43 @@
+import torch
+
+from models.eyenet import EyeNet
+from models.inference import EyeNetInference, freeze
+from util.softargmax import SoftArgmax2d, softargmax2d
+
+
+def _random_eyenet():
+    torch.manual_seed(0)
+    eyenet = EyeNet(nstack=2, nfeatures=16, nlandmarks=34)
+    # Give every BatchNorm non-trivial statistics so folding is exercised
+    for m in eyenet.modules():
+        if isinstance(m, torch.nn.BatchNorm2d):
+            m.running_mean.uniform_(-0.5, 0.5)
+            m.running_var.uniform_(0.5, 2.0)
+            m.weight.data.uniform_(0.5, 1.5)
+            m.bias.data.uniform_(-0.5, 0.5)
+    return eyenet.eval()
+
+
+def test_softargmax_module_matches_function():
+    heatmaps = torch.randn(2, 34, 48, 80) * 0.05
+    expected = softargmax2d(heatmaps)
+    actual = SoftArgmax2d(48, 80)(heatmaps)
+    assert torch.allclose(actual, expected, atol=1e-3)
+
+
+def test_folded_eyenet_matches_eyenet():
+    eyenet = _random_eyenet()
+    imgs = torch.rand(2, 96, 160)
+
+    with torch.no_grad():
+        _, landmarks, gaze = eyenet(imgs)
+        folded = EyeNetInference(eyenet, fold_bn=True)
+        folded_landmarks, folded_gaze = folded(imgs)
+        frozen_landmarks, frozen_gaze = freeze(folded)(imgs[:1])
+
+    assert torch.allclose(folded_landmarks, landmarks, atol=1e-2)
+    assert torch.allclose(folded_gaze, gaze, atol=1e-4)
+    assert torch.allclose(frozen_landmarks, folded_landmarks[:1], atol=1e-3)
+    assert torch.allclose(frozen_gaze, folded_gaze[:1], atol=1e-4)
+    assert not any(isinstance(m, torch.nn.BatchNorm2d) and name.endswith(('bn2', 'bn3'))
+                   for name, m in folded.named_modules())
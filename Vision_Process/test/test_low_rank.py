@@ -0,0 +1,59 @@
+import os
+
+import pytest
+import torch
+from torch import nn
+
+import factorize_eyenet
+from models.eyenet import EyeNet, load_checkpoint
+from models.inference import EyeNetInference
+from models.low_rank import factorize_gaze_fc1, low_rank_linear
+from train_eyenet import save_checkpoint
+
+
+def test_low_rank_linear():
+    torch.manual_seed(0)
+    linear = nn.Linear(40, 12)
+    x = torch.randn(5, 40)
+
+    full, energy = low_rank_linear(linear, 12)
+    assert energy == pytest.approx(1.0)
+    assert torch.allclose(full(x), linear(x), atol=1e-5)
+
+    errors = [(low_rank_linear(linear, rank)[0](x) - linear(x)).abs().mean() for rank in (2, 6, 10)]
+    assert errors[0] > errors[1] > errors[2]
+    with pytest.raises(ValueError):
+        low_rank_linear(linear, 13)
+
+
+def test_factorized_checkpoint_round_trip(tmp_path):
+    eyenet = EyeNet(nstack=1, nfeatures=16, nlandmarks=34, hourglass_depth=3, stem_width=32).eval()
+    factorized, energy = factorize_gaze_fc1(eyenet, 8)
+    assert 0 < energy < 1 and eyenet.gaze_rank is None
+    assert sum(p.numel() for p in factorized.parameters()) < sum(p.numel() for p in eyenet.parameters())
+    with pytest.raises(ValueError):
+        factorize_gaze_fc1(factorized, 4)
+
+    save_checkpoint(str(tmp_path / 'r8.pt'), factorized)
+    loaded = load_checkpoint(str(tmp_path / 'r8.pt'), 'cpu')
+    assert loaded.gaze_rank == 8
+    x = torch.rand(2, 96, 160)
+    with torch.no_grad():
+        _, _, gaze = factorized(x)
+        _, folded_gaze = EyeNetInference(loaded, fold_bn=True)(x)
+    assert torch.allclose(folded_gaze, gaze, atol=1e-4)
+
+
+def test_factorize_ranks_table(tmp_path):
+    checkpoint = str(tmp_path / 'checkpoint.pt')
+    save_checkpoint(checkpoint, EyeNet(nstack=1, nfeatures=16, nlandmarks=34, hourglass_depth=3, stem_width=32))
+    out = str(tmp_path / 'lowrank')
+    table = factorize_eyenet.main(['--checkpoint', checkpoint, '--ranks', '4', '64', '--output-dir', out,
+                                   '--mpii-dir', str(tmp_path / 'none'), '--mpii-cache', str(tmp_path / 'none'),
+                                   '--unityeyes-cache', str(tmp_path / 'none'), '--latency-iters', '2'])
+    names = [row['name'] for row in table['variants']]
+    assert names == ['s1f16d3w32', 's1f16d3w32r4', 's1f16d3w32r64']
+    assert all(row['load_ms'] > 0 for row in table['variants'])
+    assert table['variants'][1]['svd_energy'] < table['variants'][2]['svd_energy']
+    assert os.path.exists(os.path.join(out, 's1f16d3w32r4/checkpoint.pt'))
+    assert os.path.exists(os.path.join(out, 'variants.json'))
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import scipy.io as sio
+import torch
+
+from datasets.mpii_gaze import MPIIGaze, MPIIGazeCache, build_mpii_cache
+from eval_mpiigaze import evaluate, per_person_errors
+
+
+def write_mpii(root, persons=('p00', 'p01'), days=('day01', 'day02'), per_day=5):
+    rng = np.random.default_rng(0)
+    os.makedirs(os.path.join(root, 'Evaluation Subset', 'sample list for eye image'))
+    for person in persons:
+        lines = []
+        os.makedirs(os.path.join(root, 'Data', 'Normalized', person))
+        for day in days:
+            names = [f'{i:04d}.jpg' for i in range(1, per_day + 1)]
+            data = {}
+            for side in ('left', 'right'):
+                gaze = rng.normal([0.0, 0.0, -1.0], 0.2, (per_day, 3))
+                data[side] = {'image': rng.integers(0, 256, (per_day, 36, 60), dtype=np.uint8),
+                              'gaze': gaze / np.linalg.norm(gaze, axis=1, keepdims=True)}
+            filenames = np.empty((per_day, 1), dtype=object)
+            filenames[:, 0] = names
+            sio.savemat(os.path.join(root, 'Data', 'Normalized', person, day + '.mat'),
+                        {'data': data, 'filenames': filenames})
+            lines += [f'{day}/{name} {side}' for name, side in zip(names[::2], ('left', 'right', 'left'))]
+        with open(os.path.join(root, 'Evaluation Subset', 'sample list for eye image', person + '.txt'), 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+class ConstantGaze(torch.nn.Module):
+    def forward(self, imgs):
+        gaze = torch.stack([imgs.mean(dim=(1, 2)), imgs[:, 0, :].mean(dim=1)], dim=1) - 0.5
+        return torch.zeros(len(imgs), 34, 2), gaze
+
+
+def test_cache_matches_raw_dataset_and_batched_evaluation(tmp_path):
+    mpii_dir = str(tmp_path / 'MPIIGaze')
+    write_mpii(mpii_dir)
+    raw = MPIIGaze(mpii_dir)
+    assert len(raw) == 12
+
+    build_mpii_cache(mpii_dir, str(tmp_path / 'cache'), workers=2, verbose=False)
+    cache = MPIIGazeCache(str(tmp_path / 'cache'))
+    assert len(cache) == len(raw)
+    assert list(cache.persons) == list(raw.persons)
+    for i in range(len(raw)):
+        expected, actual = raw[i], cache[i]
+        assert actual['side'] == expected['side']
+        assert actual['img'].dtype == np.float32 and np.array_equal(actual['img'], expected['img'])
+        assert np.array_equal(actual['gaze'], expected['gaze'])
+
+    model = ConstantGaze()
+    device = torch.device('cpu')
+    reference = np.array([evaluate(model, cache, device, limit=i + 1, batch_size=1)[i] for i in range(len(raw))])
+    assert np.allclose(evaluate(model, raw, device, batch_size=5), reference)
+    assert np.allclose(evaluate(model, cache, device, batch_size=5), reference)
+    assert np.allclose(evaluate(model, raw, device, batch_size=4, workers=2), reference)
+
+    persons = per_person_errors(reference, cache.persons)
+    assert set(persons) == {'p00', 'p01'}
+    assert persons['p00'] == (reference[:6].mean(), 6)
@@ -0,0 +1,30 @@
+from backends.base import EyeNetBackend
+from backends.batcher import EyeNetBatcher
+from multi_stream import StreamWorker, create_app
+from test.test_frame_analyzer import FakeEyeNet, FakeFaceMesh, face_points
+from util.frame_source import SyntheticSource
+
+
+def test_attention_endpoints_serve_known_streams():
+    mesh = FakeFaceMesh(face_points())
+    worker = StreamWorker('desk1', SyntheticSource(num_frames=3, start_time=100.0), FakeEyeNet(), face_mesh=mesh)
+    mesh.tracker = worker.analyzer.face_roi
+    worker.start()
+    worker.join(timeout=10.0)
+    assert not worker.alive
+
+    client = create_app({'desk1': worker}, EyeNetBatcher(EyeNetBackend())).test_client()
+    response = client.get('/attention/desk1?window=30')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['stream_id'] == 'desk1' and data['frames'] == 3 and not data['running']
+    assert data['face_found'] and 0.0 < data['attention'] <= 1.0
+    assert set(data['attention_windows']) == {'30'}
+
+    assert client.get('/attention/desk2').status_code == 404
+    assert client.get('/attention/desk2/stream').status_code == 404
+    response = client.head('/attention/desk1/stream')
+    response.close()
+    assert response.status_code == 200 and worker.broadcaster.subscriber_count == 0
+    assert client.get('/attention/desk1?window=abc').status_code == 400
+    assert set(client.get('/attention').get_json()['streams']) == {'desk1'}
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+import torch
+
+from backends.torch_backend import TorchBackend
+from export_onnx import export
+from models.eyenet import EyeNet, load_checkpoint
+from models.inference import EyeNetInference
+from train_eyenet import save_checkpoint
+from util.eye_sample import EyeSample
+
+pytest.importorskip("onnxruntime")
+from backends.onnx_backend import OnnxBackend  # noqa: E402
+
+
+def _eyes(n):
+    rng = np.random.default_rng(0)
+    return [EyeSample(None, rng.integers(0, 256, size=(96, 160), dtype=np.uint8), i % 2 == 0,
+                      np.array([[0.5, 0.0, 100.0 + 10 * i], [0.0, 0.5, 50.0]]), 40.0)
+            for i in range(n)]
+
+
+def test_onnx_backend_matches_folded_torch_backend(tmp_path):
+    torch.manual_seed(0)
+    eyenet = EyeNet(nstack=1, nfeatures=16, nlandmarks=34, hourglass_depth=3, stem_width=32).eval()
+    for m in eyenet.modules():
+        if isinstance(m, torch.nn.BatchNorm2d):
+            m.running_mean.uniform_(-0.5, 0.5)
+            m.running_var.uniform_(0.5, 2.0)
+    checkpoint = str(tmp_path / 'checkpoint.pt')
+    save_checkpoint(checkpoint, eyenet)
+    onnx_path = str(tmp_path / 'eyenet.onnx')
+    export(EyeNetInference(load_checkpoint(checkpoint, 'cpu'), fold_bn=True), onnx_path)
+
+    torch_backend = TorchBackend(checkpoint, engine='folded', device='cpu')
+    onnx_backend = OnnxBackend(onnx_path, threads=1)
+    # The export example has 2 crops, the batch axis is dynamic
+    for n in (1, 3):
+        eyes = _eyes(n)
+        expected = torch_backend.run_eyenet(eyes)
+        actual = onnx_backend.run_eyenet(eyes)
+        assert len(actual) == n
+        for a, e in zip(actual, expected):
+            assert a.eye_sample is e.eye_sample
+            assert np.allclose(a.landmarks, e.landmarks, atol=1e-2)
+            assert np.allclose(a.gaze, e.gaze, atol=1e-4)
+
+
+def test_missing_onnx_model_is_reported(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        OnnxBackend(str(tmp_path / 'missing.onnx'))
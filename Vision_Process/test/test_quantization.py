@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from models.eyenet import EyeNet
+from models.inference import EyeNetInference, freeze, load_inference_model, read_metadata, save_torchscript
+from models.quantization import calibration_batches, quantize_eyenet
+from quantize_eyenet import save_quantized
+from train_eyenet import save_checkpoint
+
+
+def _dataset(n):
+    rng = np.random.default_rng(0)
+    return [{'img': rng.random((96, 160), dtype=np.float32)} for _ in range(n)]
+
+
+def test_calibration_batches_use_one_input_range():
+    dataset = _dataset(5)
+    batches = list(calibration_batches(dataset, 10, batch_size=4, scale=255.0))
+    assert [tuple(batch.shape) for batch in batches] == [(4, 96, 160), (1, 96, 160)]
+    # Every crop once, all in the 0-255 range
+    pixels = torch.cat(batches).double()
+    assert 1.0 < pixels.max() <= 255.0
+    assert pixels.sum().item() == pytest.approx(255.0 * sum(float(sample['img'].sum()) for sample in dataset))
+
+
+def test_int8_quantize_freeze_save_and_load(tmp_path):
+    torch.manual_seed(0)
+    eyenet = EyeNet(nstack=1, nfeatures=16, nlandmarks=34, hourglass_depth=3, stem_width=32).eval()
+    float_model = EyeNetInference(eyenet, fold_bn=True)
+    quantized = quantize_eyenet(float_model, calibration_batches(_dataset(8), 8, batch_size=4, scale=255.0))
+    example = torch.zeros((2, 96, 160))
+    frozen = freeze(quantized, example=example)
+
+    # The accuracy gate refuses a model that lost too much accuracy
+    refused = str(tmp_path / 'refused.pt')
+    assert not save_quantized(frozen, refused, float_error=5.0, quantized_error=6.0, max_error_increase=0.5)
+    assert not os.path.exists(refused)
+
+    path = str(tmp_path / 'eyenet_int8.pt')
+    assert save_quantized(frozen, path, float_error=5.0, quantized_error=5.2, max_error_increase=0.5,
+                          qengine=torch.backends.quantized.engine, input_scale=255.0)
+    assert read_metadata(path)['engine'] == 'int8'
+    assert read_metadata(path)['mpii_error'] == pytest.approx(5.2)
+    assert read_metadata(path)['input_scale'] == 255.0
+
+    model = load_inference_model(path, 'cpu', engine='int8')
+    with torch.no_grad():
+        landmarks, gaze = model(torch.rand(3, 96, 160) * 255)
+    assert landmarks.shape == (3, 34, 2) and gaze.shape == (3, 2)
+    assert torch.isfinite(landmarks).all() and torch.isfinite(gaze).all()
+
+
+def test_int8_engine_needs_a_quantized_model(tmp_path):
+    eyenet = EyeNet(nstack=1, nfeatures=16, nlandmarks=34, hourglass_depth=3, stem_width=32).eval()
+    checkpoint = str(tmp_path / 'checkpoint.pt')
+    save_checkpoint(checkpoint, eyenet)
+    frozen = str(tmp_path / 'eyenet_folded.pt')
+    save_torchscript(freeze(EyeNetInference(eyenet)), frozen, engine='folded')
+
+    for path in (checkpoint, frozen):
+        with pytest.raises(ValueError):
+            load_inference_model(path, 'cpu', engine='int8')
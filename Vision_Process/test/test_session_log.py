@@ -0,0 +1,66 @@
+import numpy as np
+
+from util.session_log import SessionLogReader, SessionLogWriter, load_session
+
+
+def _write(path, times, chunk_records=16, flush_interval_sec=5.0):
+    writer = SessionLogWriter(path, chunk_records=chunk_records, flush_interval_sec=flush_interval_sec)
+    for i, t in enumerate(times):
+        record = writer.next_record()
+        record['timestamp'] = t
+        record['face_found'] = i % 2 == 0
+        record['yaw'] = i
+        record['left_gaze'] = (i, -i)
+        record['total_attention'] = i / len(times)
+        writer.commit()
+    return writer
+
+
+def test_roundtrip_across_chunks_and_time_slice(tmp_path):
+    path = str(tmp_path / 'session.eclog')
+    times = 1000.0 + np.arange(100) / 30
+    with _write(path, times):
+        pass
+
+    log = SessionLogReader(path)
+    assert len(log) == 100
+    assert log.start_time == times[0] and log.end_time == times[-1]
+    assert np.array_equal(log.records['yaw'], np.arange(100))
+    assert np.array_equal(log.records['left_gaze'][:, 1], -np.arange(100))
+    # Fields that were not written keep their defaults
+    assert np.isnan(log.records['pitch']).all()
+    assert not log.records['head_ok'].any()
+
+    window = log.slice(times[10], times[20])
+    assert np.array_equal(window['timestamp'], times[10:20])
+    assert len(log.slice(times[-1] + 1)) == 0
+
+
+def test_reader_sees_flushed_records_of_an_open_log(tmp_path):
+    path = str(tmp_path / 'session.eclog')
+    writer = _write(path, 1000.0 + np.arange(40), flush_interval_sec=0.0)
+    records = load_session(path)
+    assert len(records) == 40
+    # Uncommitted records are not visible
+    writer.next_record()['timestamp'] = 2000.0
+    assert len(load_session(path)) == 40
+    writer.close()
+    assert len(load_session(path)) == 40
+
+
+def test_growing_while_a_record_is_still_referenced(tmp_path):
+    path = str(tmp_path / 'session.eclog')
+    writer = SessionLogWriter(path, chunk_records=4)
+    held = writer.next_record()
+    held['timestamp'] = 1000.0
+    writer.commit()
+    # `held` keeps the first mapping alive while the file grows twice and is closed
+    for i in range(1, 10):
+        record = writer.next_record()
+        record['timestamp'] = 1000.0 + i
+        writer.commit()
+    writer.close()
+
+    records = load_session(path)
+    assert np.array_equal(records['timestamp'], 1000.0 + np.arange(10))
+    assert held['timestamp'] == 1000.0
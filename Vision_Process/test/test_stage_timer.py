@@ -0,0 +1,32 @@
+import numpy as np
+
+from util.stage_timer import StageTimer, format_summary
+
+
+def test_summary_percentiles_over_rolling_window():
+    timer = StageTimer(window=100)
+    for ms in range(200):
+        timer.record('eyenet', float(ms))
+    timer.record('capture', 1.0)
+
+    summary = timer.summary()
+    assert list(summary) == ['eyenet', 'capture']
+    eyenet = summary['eyenet']
+    # Only the last 100 samples (100..199) are kept
+    assert eyenet['count'] == 200
+    assert eyenet['max_ms'] == 199.0
+    assert np.isclose(eyenet['p50_ms'], np.percentile(np.arange(100, 200), 50))
+    assert np.isclose(eyenet['p99_ms'], np.percentile(np.arange(100, 200), 99))
+    assert 'eyenet' in format_summary(summary)
+
+
+def test_laps_and_unbounded_window():
+    timer = StageTimer(window=None)
+    for _ in range(3000):
+        timer.begin()
+        timer.lap('a')
+        timer.lap('b')
+        timer.end()
+    summary = timer.summary()
+    assert [summary[stage]['count'] for stage in ('a', 'b', 'frame')] == [3000, 3000, 3000]
+    assert summary['frame']['mean_ms'] >= summary['a']['mean_ms']
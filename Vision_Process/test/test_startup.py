@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from util.startup import Startup, format_startup
+
+
+def test_run_parallel_overlaps_phases():
+    startup = Startup(launch_time=time.time())
+    barrier = threading.Barrier(2, timeout=2.0)
+
+    def task(value):
+        # Both tasks must be running at the same time to pass the barrier
+        barrier.wait()
+        return value
+
+    results = startup.run_parallel({'model': lambda: task(1), 'face_mesh': lambda: task(2)})
+    assert results == {'model': 1, 'face_mesh': 2}
+    report = startup.report()
+    assert list(report['phases']) and set(report['phases']) == {'model', 'face_mesh'}
+    assert not report['ready'] and report['error'] is None
+    assert 'face_mesh' in format_startup(report)
+
+
+def test_run_parallel_error_waits_for_all_tasks():
+    startup = Startup()
+    finished = []
+
+    def fail():
+        raise RuntimeError('no model')
+
+    def slow():
+        time.sleep(0.05)
+        finished.append(True)
+
+    with pytest.raises(RuntimeError):
+        startup.run_parallel({'model': fail, 'camera': slow})
+    assert finished == [True]
+    assert startup.error == 'model: no model'
+
+
+def test_readiness_endpoints():
+    import run_with_webcam
+
+    client = run_with_webcam.app.test_client()
+    startup = run_with_webcam.startup
+    assert 'imports' in startup.report()['phases']
+    ready = startup.ready
+    try:
+        startup._ready.clear()
+        assert client.get('/ready').status_code == 503
+        assert client.get('/attention').get_json()['ready'] is False
+
+        startup.mark('first_score')
+        startup.set_ready()
+        response = client.get('/ready')
+        assert response.status_code == 200
+        assert response.get_json()['phases']['first_score']['duration_sec'] == 0
+        assert client.get('/attention').get_json()['ready'] is True
+    finally:
+        if not ready:
+            startup._ready.clear()
@@ -0,0 +1,39 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+import train_eyenet
+from datasets.unity_eyes import build_unityeyes_cache
+from models.eyenet import load_checkpoint
+
+
+def test_train_resume_and_checkpoint_format(tmp_path):
+    img_dir = str(tmp_path / 'imgs')
+    os.makedirs(img_dir)
+    rng = np.random.default_rng(0)
+    with open(os.path.join(os.path.dirname(__file__), 'data/imgs/1.json')) as f:
+        json_text = f.read()
+    for i in range(1, 5):
+        cv2.imwrite(os.path.join(img_dir, f'{i}.jpg'), rng.integers(0, 256, (600, 800, 3), dtype=np.uint8))
+        with open(os.path.join(img_dir, f'{i}.json'), 'w') as f:
+            f.write(json_text)
+    build_unityeyes_cache(img_dir, str(tmp_path / 'cache'), workers=1, verbose=False)
+
+    out = str(tmp_path / 'run')
+    args = ['--output-dir', out, '--unityeyes-cache', str(tmp_path / 'cache'), '--mpii-dir', str(tmp_path / 'none'),
+            '--mpii-cache', str(tmp_path / 'none'), '--nstack', '1', '--nfeatures', '16', '--batch-size', '2',
+            '--workers', '0', '--threads', '1', '--log-every', '1', '--epochs', '5']
+    state = train_eyenet.main(args + ['--max-steps', '3'])
+    assert state['step'] == 3 and state['epoch'] == 1  # 2 steps per epoch, stopped inside the second
+
+    eyenet = load_checkpoint(os.path.join(out, 'checkpoint.pt'), 'cpu')
+    assert (eyenet.nstack, eyenet.nfeatures, eyenet.nlandmarks) == (1, 16, 34)
+
+    state = train_eyenet.main(args + ['--max-steps', '4', '--resume'])
+    assert state['step'] == 4
+    with open(os.path.join(out, 'log.jsonl')) as f:
+        records = [json.loads(line) for line in f]
+    assert [record['step'] for record in records] == [1, 2, 3, 4]
+    assert all(record['samples_per_sec'] > 0 and 0 <= record['stall'] <= 1 for record in records)
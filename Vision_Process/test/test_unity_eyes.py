@@ -1,11 +1,58 @@
-import pytest
-
-from datasets.unity_eyes import UnityEyesDataset
+import json
 import os
 
+import cv2
+import numpy as np
+
+from datasets.unity_eyes import UnityEyesCache, UnityEyesDataset, build_unityeyes_cache
+from util.preprocess import preprocess_unityeyes_image
+
 def test_unity_eyes():
     ds = UnityEyesDataset(img_dir=os.path.join(os.path.dirname(__file__), 'data/imgs'))
     sample = ds[0]
     assert sample['full_img'].shape == (600, 800, 3)
     assert sample['img'].shape == (90, 150, 3)
     assert float(sample['json_data']['eye_details']['iris_size']) == 0.9349335
+
+
+def _write_unityeyes(img_dir, n=3):
+    os.makedirs(img_dir)
+    rng = np.random.default_rng(0)
+    with open(os.path.join(os.path.dirname(__file__), 'data/imgs/1.json')) as f:
+        json_text = f.read()
+    for i in range(1, n + 1):
+        img = cv2.GaussianBlur(rng.integers(0, 256, (600, 800, 3), dtype=np.uint8), (15, 15), 4)
+        cv2.imwrite(os.path.join(img_dir, f'{i}.jpg'), img)
+        with open(os.path.join(img_dir, f'{i}.json'), 'w') as f:
+            f.write(json_text)
+
+
+def test_unity_eyes_cache_matches_preprocessing(tmp_path):
+    img_dir = str(tmp_path / 'imgs')
+    _write_unityeyes(img_dir)
+    ds = UnityEyesDataset(img_dir=img_dir)
+    assert build_unityeyes_cache(img_dir, str(tmp_path / 'cache'), shard_size=2, workers=1, verbose=False) == 3
+    assert sorted(os.listdir(tmp_path / 'cache')) == ['index.json', 'shard_00000', 'shard_00001']
+
+    cache = UnityEyesCache(str(tmp_path / 'cache'), augment=False)
+    assert len(cache) == len(ds)
+    for i in range(len(ds)):
+        full_img = cv2.imread(ds.img_paths[i])
+        with open(ds.json_paths[i]) as f:
+            expected = preprocess_unityeyes_image(full_img, json.load(f), augment=False)
+        sample = cache[i]
+        assert set(sample) == set(expected)
+        assert np.abs(sample['img'] - expected['img']).max() <= 1 / 255 + 1e-6
+        for key in ('transform', 'transform_inv', 'eye_middle', 'landmarks', 'gaze', 'heatmaps'):
+            assert np.allclose(sample[key], expected[key], atol=1e-5), key
+
+    # Random shift: the same geometry as the on-the-fly preprocessing for the same draws
+    augmented = UnityEyesCache(str(tmp_path / 'cache'))
+    np.random.seed(3)
+    sample = augmented[2]
+    np.random.seed(3)
+    with open(ds.json_paths[2]) as f:
+        expected = preprocess_unityeyes_image(cv2.imread(ds.img_paths[2]), json.load(f))
+    assert np.allclose(sample['landmarks'], expected['landmarks'], atol=1e-5)
+    assert np.allclose(sample['transform'], expected['transform'])
+    assert np.abs(sample['img'] - expected['img']).mean() < 0.02
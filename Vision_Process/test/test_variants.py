@@ -0,0 +1,95 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+import torch
+
+import distill_eyenet
+from datasets.unity_eyes import build_unityeyes_cache
+from models.eyenet import EyeNet, architecture, load_checkpoint
+from models.inference import EyeNetInference
+from train_eyenet import save_checkpoint
+from util.variants import load_variants, parse_variant, pick_variant, save_variants, variant_name
+
+
+def row(name, latency_ms, mpii_error=None, teacher_error=None):
+    return {'name': name, 'path': name + '.pt', 'latency_ms': latency_ms, 'mpii_error': mpii_error,
+            'teacher_error': teacher_error}
+
+
+def test_variant_names():
+    assert parse_variant('s1f16d3w32') == {'nstack': 1, 'nfeatures': 16, 'hourglass_depth': 3, 'stem_width': 32,
+                                           'gaze_rank': None}
+    assert parse_variant('s1f16d3w32r8')['gaze_rank'] == 8
+    assert variant_name(architecture(EyeNet(nstack=3, nfeatures=32, nlandmarks=34))) == 's3f32d4w128'
+    for name in ['s1f16', 'x1f16d3w32', 's1f16d3w']:
+        with pytest.raises(ValueError):
+            parse_variant(name)
+
+
+def test_pick_variant():
+    table = {'variants': [row('big', 80, 5.0), row('mid', 30, 6.0), row('small', 20, 7.5)]}
+    assert pick_variant(table, 100) == (table['variants'][0], True)
+    assert pick_variant(table, 40)[0]['name'] == 'mid'
+    assert pick_variant(table, 10) == (table['variants'][2], False)
+
+    # Without MPIIGaze the difference to the teacher ranks the variants
+    table = {'variants': [row('a', 10, teacher_error=2.0), row('b', 12, teacher_error=1.0)]}
+    assert pick_variant(table, 15)[0]['name'] == 'b'
+
+
+def test_save_and_load_relative_paths(tmp_path):
+    os.makedirs(tmp_path / 'lite')
+    save_variants(str(tmp_path / 'lite/variants.json'), [dict(row('a', 10), path=str(tmp_path / 'lite/a/best.pt'))],
+                  engine='folded', threads=1)
+    moved = tmp_path / 'moved'
+    os.rename(tmp_path / 'lite', moved)
+    table = load_variants(str(moved / 'variants.json'))
+    assert table['engine'] == 'folded'
+    assert table['variants'][0]['path'] == str(moved / 'a/best.pt')
+
+
+def test_lite_architecture_round_trip(tmp_path):
+    eyenet = EyeNet(nstack=1, nfeatures=16, nlandmarks=34, hourglass_depth=3, stem_width=32).eval()
+    save_checkpoint(str(tmp_path / 'lite.pt'), eyenet)
+    loaded = load_checkpoint(str(tmp_path / 'lite.pt'), 'cpu')
+    assert architecture(loaded) == architecture(eyenet)
+
+    x = torch.rand(2, 96, 160)
+    with torch.no_grad():
+        _, landmarks, gaze = eyenet(x)
+        folded_landmarks, folded_gaze = EyeNetInference(loaded, fold_bn=True)(x)
+    assert landmarks.shape == (2, 34, 2) and gaze.shape == (2, 2)
+    assert torch.allclose(folded_gaze, gaze, atol=1e-4)
+
+
+def test_distill_and_table(tmp_path):
+    img_dir = str(tmp_path / 'imgs')
+    os.makedirs(img_dir)
+    rng = np.random.default_rng(0)
+    with open(os.path.join(os.path.dirname(__file__), 'data/imgs/1.json')) as f:
+        json_text = f.read()
+    for i in range(1, 5):
+        cv2.imwrite(os.path.join(img_dir, f'{i}.jpg'), rng.integers(0, 256, (600, 800, 3), dtype=np.uint8))
+        with open(os.path.join(img_dir, f'{i}.json'), 'w') as f:
+            f.write(json_text)
+    cache = str(tmp_path / 'cache')
+    build_unityeyes_cache(img_dir, cache, workers=1, verbose=False)
+    teacher = str(tmp_path / 'teacher.pt')
+    save_checkpoint(teacher, EyeNet(nstack=1, nfeatures=16, nlandmarks=34))
+
+    out = str(tmp_path / 'lite')
+    table = distill_eyenet.main(['--teacher', teacher, '--variants', 's1f16d3w16', '--output-dir', out,
+                                 '--unityeyes-cache', cache, '--mpii-dir', str(tmp_path / 'none'),
+                                 '--mpii-cache', str(tmp_path / 'none'), '--latency-iters', '2',
+                                 '--teacher-samples', '4', '--threads', '1',
+                                 # passed to train_eyenet.py
+                                 '--max-steps', '1', '--batch-size', '2', '--workers', '0', '--log-every', '1'])
+    assert [variant['name'] for variant in table['variants']] == ['s1f16d4w128', 's1f16d3w16']
+    assert table['variants'][0]['teacher_error'] == 0.0
+    assert load_checkpoint(os.path.join(out, 's1f16d3w16/checkpoint.pt'), 'cpu').hourglass_depth == 3
+
+    saved = load_variants(os.path.join(out, 'variants.json'))
+    assert saved['threads'] == 1 and saved['variants'][1]['path'] == os.path.join(out, 's1f16d3w16/checkpoint.pt')
+    assert pick_variant(saved, 1e6)[0]['name'] == 's1f16d4w128'  # the teacher is the most accurate
@@ -0,0 +1,241 @@
+"""Train or fine-tune EyeNet on UnityEyes.
+
+Samples come from the sharded UnityEyes cache (built on first use, see
+``cache_unityeyes.py``) through a multi-worker, prefetching DataLoader.
+Heatmap targets are rendered per batch: in the loader workers on CPU, on
+the device with CUDA. Checkpoints use the ``checkpoint.pt`` format that
+``run_with_webcam.py`` and the export tools load, plus the optimizer state
+for resuming. The MPIIGaze evaluation subset is evaluated periodically
+and the best model is kept as ``best.pt``.
+
+    python train_eyenet.py --output-dir runs/eyenet
+    python train_eyenet.py --output-dir runs/finetune --init checkpoint.pt --lr 1e-5 --epochs 2
+    python train_eyenet.py --output-dir runs/eyenet --resume       # continue from runs/eyenet/checkpoint.pt
+
+Every ``--log-every`` steps one JSON line with the losses, the throughput
+(samples/s) and the share of time spent waiting for the DataLoader
+(``stall``) is printed and appended to ``<output-dir>/log.jsonl``. On a
+CPU-only machine, split the cores between ``--workers`` and ``--threads``;
+a stall above a few percent means more workers are needed.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+
+from datasets.unity_eyes import UnityEyesCache, build_unityeyes_cache
+from eval_mpiigaze import evaluate, load_dataset, per_person_errors
+from models.eyenet import EyeNet, architecture, from_checkpoint, load_checkpoint
+from models.inference import EyeNetInference
+from util.heatmaps import HeatmapCollate, render_heatmaps_torch
+
+
+def save_checkpoint(path, eyenet, optimizer=None, **state):
+    """Write ``checkpoint.pt`` (architecture, model_state_dict and ``state``) atomically."""
+    checkpoint = dict(architecture(eyenet), model_state_dict=eyenet.state_dict())
+    if optimizer is not None:
+        checkpoint['optimizer_state_dict'] = optimizer.state_dict()
+    checkpoint.update(state)
+    tmp_path = path + '.tmp'
+    torch.save(checkpoint, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def default_workers():
+    # Veri hattı (önbellekten) modelin ileri/geri geçişinden çok daha ucuz: çekirdeklerin çoğu torch'a kalır
+    return min(8, max(1, (os.cpu_count() or 1) // 8))
+
+
+def make_loader(dataset, batch_size, workers, device):
+    options = {}
+    if workers > 0:
+        options = {'persistent_workers': True, 'prefetch_factor': 4}
+    return DataLoader(dataset, batch_size=batch_size, shuffle=True, drop_last=True, num_workers=workers,
+                      pin_memory=device.type == 'cuda',
+                      # CPU'da heatmap'ler worker'larda, CUDA'da cihazda üretilir
+                      collate_fn=HeatmapCollate() if device.type != 'cuda' else None,
+                      **options)
+
+
+def mpii_error(eyenet, mpii, device, limit, batch_size):
+    # Katlanmış kopya: eğitilen model ve BatchNorm istatistikleri değişmez
+    model = EyeNetInference(eyenet, fold_bn=True).to(device)
+    errors = evaluate(model, mpii, device, limit=limit, batch_size=batch_size)
+    return float(np.mean(errors)), per_person_errors(errors, mpii.persons)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output-dir', default='runs/eyenet')
+    parser.add_argument('--unityeyes-dir', default='datasets/UnityEyes/imgs')
+    parser.add_argument('--unityeyes-cache', default='datasets/UnityEyes/cache')
+    parser.add_argument('--mpii-dir', default='datasets/MPIIGaze')
+    parser.add_argument('--mpii-cache', default='datasets/MPIIGaze_cache')
+    parser.add_argument('--nstack', type=int, default=3)
+    parser.add_argument('--nfeatures', type=int, default=32)
+    parser.add_argument('--nlandmarks', type=int, default=34)
+    parser.add_argument('--hourglass-depth', type=int, default=4)
+    parser.add_argument('--stem-width', type=int, default=128, help='channels of the full resolution stem')
+    parser.add_argument('--gaze-rank', type=int, default=None,
+                        help='factorize gaze_fc1 to this rank (see models.low_rank)')
+    parser.add_argument('--teacher', default=None,
+                        help='distill from this checkpoint.pt: the targets mix the teacher outputs with the labels')
+    parser.add_argument('--distill-weight', type=float, default=0.5,
+                        help='weight of the teacher loss with --teacher (1: teacher only)')
+    parser.add_argument('--init', default=None, help='start from the weights of this checkpoint.pt (fine-tuning)')
+    parser.add_argument('--resume', action='store_true', help='continue from <output-dir>/checkpoint.pt')
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--max-steps', type=int, default=None, help='stop after this many optimizer steps')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--lr', type=float, default=1e-4)
+    parser.add_argument('--workers', type=int, default=None, help='DataLoader processes (default: cores / 8)')
+    parser.add_argument('--threads', type=int, default=None, help='torch CPU threads (default: remaining cores)')
+    parser.add_argument('--log-every', type=int, default=50)
+    parser.add_argument('--eval-every', type=int, default=2000, help='MPIIGaze evaluation interval in steps')
+    parser.add_argument('--eval-samples', type=int, default=None, help='MPIIGaze samples per evaluation (default: all)')
+    parser.add_argument('--checkpoint-every', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    device = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
+    workers = default_workers() if args.workers is None else args.workers
+    threads = args.threads or max(1, (os.cpu_count() or 1) - workers)
+    torch.set_num_threads(threads)
+    if device.type == 'cuda':
+        torch.backends.cudnn.benchmark = True
+    os.makedirs(args.output_dir, exist_ok=True)
+    checkpoint_path = os.path.join(args.output_dir, 'checkpoint.pt')
+    best_path = os.path.join(args.output_dir, 'best.pt')
+
+    if not os.path.exists(os.path.join(args.unityeyes_cache, 'index.json')):
+        print(f'Building the UnityEyes cache in {args.unityeyes_cache} (one time)')
+        build_unityeyes_cache(args.unityeyes_dir, args.unityeyes_cache, workers=os.cpu_count())
+    dataset = UnityEyesCache(args.unityeyes_cache, augment=True, heatmaps=False)
+    loader = make_loader(dataset, args.batch_size, workers, device)
+    mpii = None
+    if os.path.isdir(args.mpii_dir) or os.path.exists(os.path.join(args.mpii_cache, 'index.npy')):
+        mpii = load_dataset(args.mpii_dir, args.mpii_cache, workers=os.cpu_count())
+    else:
+        print(f'{args.mpii_dir} not found, training without MPIIGaze evaluation')
+
+    # Model, optimizer and training state
+    state = {'epoch': 0, 'step': 0, 'best_mpii_error': None}
+    resume = torch.load(checkpoint_path, map_location=device, weights_only=False) \
+        if args.resume and os.path.exists(checkpoint_path) else None
+    init = resume or (torch.load(args.init, map_location=device, weights_only=False) if args.init else None)
+    if init is not None:
+        eyenet = from_checkpoint(init)
+    else:
+        eyenet = EyeNet(nstack=args.nstack, nfeatures=args.nfeatures, nlandmarks=args.nlandmarks,
+                        hourglass_depth=args.hourglass_depth, stem_width=args.stem_width,
+                        gaze_rank=args.gaze_rank)
+    eyenet = eyenet.to(device)
+    optimizer = torch.optim.Adam(eyenet.parameters(), lr=args.lr)
+    if resume is not None:
+        optimizer.load_state_dict(resume['optimizer_state_dict'])
+        state.update({key: resume[key] for key in state if key in resume})
+        print(f'Resuming {checkpoint_path} at epoch {state["epoch"]}, step {state["step"]}')
+
+    teacher = None
+    if args.teacher:
+        teacher = load_checkpoint(args.teacher, device)
+        for p in teacher.parameters():
+            p.requires_grad_(False)
+        print(f'Distilling from {args.teacher} ({architecture(teacher)}), weight {args.distill_weight}')
+
+    print(f'{len(dataset)} UnityEyes samples, batch {args.batch_size}, {workers} workers, {threads} threads, {device}')
+    log_file = open(os.path.join(args.output_dir, 'log.jsonl'), 'a')
+
+    def log(record):
+        record = dict(record, step=state['step'], epoch=state['epoch'], time=time.time())
+        print(json.dumps(record))
+        log_file.write(json.dumps(record) + '\n')
+        log_file.flush()
+
+    def checkpoint():
+        save_checkpoint(checkpoint_path, eyenet, optimizer, **state)
+
+    def run_eval():
+        if mpii is None:
+            return
+        error, persons = mpii_error(eyenet, mpii, device, args.eval_samples, batch_size=4 * args.batch_size)
+        log({'mpii_error': error, 'mpii_per_person': {person: e for person, (e, _) in persons.items()}})
+        if state['best_mpii_error'] is None or error < state['best_mpii_error']:
+            state['best_mpii_error'] = error
+            save_checkpoint(best_path, eyenet, mpii_error=error, step=state['step'])
+
+    window = {'samples': 0, 'stall': 0.0, 'start': time.perf_counter(), 'losses': []}
+    done = args.max_steps is not None and state['step'] >= args.max_steps
+    while state['epoch'] < args.epochs and not done:
+        eyenet.train()
+        batches = iter(loader)
+        while True:
+            wait_start = time.perf_counter()
+            batch = next(batches, None)
+            window['stall'] += time.perf_counter() - wait_start
+            if batch is None:
+                break
+
+            imgs = batch['img'].to(device, non_blocking=True)
+            landmarks = batch['landmarks'].to(device, non_blocking=True)
+            gaze = batch['gaze'].to(device, non_blocking=True)
+            heatmaps = batch['heatmaps'].to(device, non_blocking=True) if 'heatmaps' in batch \
+                else render_heatmaps_torch(landmarks)
+
+            heatmaps_pred, landmarks_pred, gaze_pred = eyenet(imgs)
+            heatmap_loss, landmarks_loss, gaze_loss = eyenet.calc_loss(
+                heatmaps_pred, heatmaps, landmarks_pred, landmarks, gaze_pred, gaze)
+            if teacher is not None:
+                # Öğretmenin son yığın heatmap'leri, landmarkları ve gaze'i ikinci hedef
+                with torch.no_grad():
+                    teacher_heatmaps, teacher_landmarks, teacher_gaze = teacher(imgs)
+                distill_losses = eyenet.calc_loss(heatmaps_pred, teacher_heatmaps[:, -1], landmarks_pred,
+                                                  teacher_landmarks, gaze_pred, teacher_gaze)
+                a = args.distill_weight
+                heatmap_loss, landmarks_loss, gaze_loss = [(1 - a) * label + a * distill for label, distill in
+                                                           zip((heatmap_loss, landmarks_loss, gaze_loss), distill_losses)]
+            loss = heatmap_loss + landmarks_loss + gaze_loss
+
+            optimizer.zero_grad(set_to_none=True)
+            loss.backward()
+            optimizer.step()
+            state['step'] += 1
+            window['samples'] += len(imgs)
+            window['losses'].append([loss.item(), heatmap_loss.item(), landmarks_loss.item(), gaze_loss.item()])
+
+            if state['step'] % args.log_every == 0:
+                elapsed = time.perf_counter() - window['start']
+                losses = np.mean(window['losses'], axis=0)
+                log({'loss': losses[0], 'heatmap_loss': losses[1], 'landmarks_loss': losses[2],
+                     'gaze_loss': losses[3], 'samples_per_sec': window['samples'] / elapsed,
+                     'stall': window['stall'] / elapsed})
+                window = {'samples': 0, 'stall': 0.0, 'start': time.perf_counter(), 'losses': []}
+            paused = time.perf_counter()
+            if state['step'] % args.eval_every == 0:
+                run_eval()
+                eyenet.train()
+            if state['step'] % args.checkpoint_every == 0:
+                checkpoint()
+            # Değerlendirme ve kayıt süresi eğitim hızına sayılmaz
+            window['start'] += time.perf_counter() - paused
+            if args.max_steps is not None and state['step'] >= args.max_steps:
+                done = True
+                break
+        if not done:
+            # Yarıda kalan bir epoch devam ettirilirken baştan başlar
+            state['epoch'] += 1
+            checkpoint()
+
+    run_eval()
+    checkpoint()
+    log_file.close()
+    print(f'Saved {checkpoint_path}' + (f', best MPIIGaze error {state["best_mpii_error"]:.3f} deg in {best_path}'
+                                        if state['best_mpii_error'] is not None else ''))
+    return state
+
+
+if __name__ == '__main__':
+    main()
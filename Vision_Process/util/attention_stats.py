@@ -0,0 +1,123 @@
+"""Time-windowed attention averages with O(1) appends and queries."""
+import math
+import threading
+import time
+
+import numpy as np
+
+
+class AttentionAggregator:
+    """Running attention averages over arbitrary trailing time windows.
+
+    Samples are accumulated into fixed-width time buckets (``resolution_sec``).
+    A ring buffer stores the cumulative sum and count at the end of each
+    bucket. A window average is the difference of two cumulative entries, so
+    appends and queries are O(1). Memory is bounded by ``retention_sec``,
+    not by the frame rate. Window edges are rounded to the bucket resolution.
+
+    Appends (inference loop) and queries (HTTP thread) may come from
+    different threads.
+    """
+
+    def __init__(self, retention_sec=86400.0, resolution_sec=1.0):
+        self.retention_sec = retention_sec
+        self.resolution_sec = resolution_sec
+        self._capacity = int(math.ceil(retention_sec / resolution_sec)) + 1
+        self._cum_sum = np.zeros(self._capacity, dtype=np.float64)
+        self._cum_count = np.zeros(self._capacity, dtype=np.int64)
+        self._first_bucket = None
+        self._last_bucket = None
+        self._total_sum = 0.0
+        self._total_count = 0
+        self._last_value = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, value, timestamp=None):
+        """Record one attention sample taken at ``timestamp`` (default: now)."""
+        if timestamp is None:
+            timestamp = time.time()
+        bucket = int(timestamp // self.resolution_sec)
+        value = float(value)
+
+        with self._lock:
+            if self._last_bucket is None:
+                self._first_bucket = self._last_bucket = bucket
+                self._cum_sum[bucket % self._capacity] = 0.0
+                self._cum_count[bucket % self._capacity] = 0
+            elif bucket > self._last_bucket:
+                # Carry the cumulative totals over the buckets without samples
+                last = self._last_bucket % self._capacity
+                carry_sum, carry_count = self._cum_sum[last], self._cum_count[last]
+                if bucket - self._last_bucket >= self._capacity:
+                    self._cum_sum.fill(carry_sum)
+                    self._cum_count.fill(carry_count)
+                else:
+                    for b in range(self._last_bucket + 1, bucket + 1):
+                        self._cum_sum[b % self._capacity] = carry_sum
+                        self._cum_count[b % self._capacity] = carry_count
+                self._last_bucket = bucket
+            # Late samples (clock going backwards) count towards the newest bucket
+            i = self._last_bucket % self._capacity
+            self._cum_sum[i] += value
+            self._cum_count[i] += 1
+            self._total_sum += value
+            self._total_count += 1
+            self._last_value = value
+
+    def _cumulative(self, bucket):
+        """Cumulative (sum, count) up to and including ``bucket``, clamped to the retained range."""
+        if bucket < self._first_bucket:
+            return 0.0, 0
+        bucket = min(max(bucket, self._last_bucket - self._capacity + 1), self._last_bucket)
+        i = bucket % self._capacity
+        return self._cum_sum[i], self._cum_count[i]
+
+    def average(self, seconds, now=None):
+        """Mean of the samples of the last ``seconds`` seconds, 0.0 if there are none."""
+        if now is None:
+            now = time.time()
+        seconds = min(seconds, self.retention_sec)
+        with self._lock:
+            if self._last_bucket is None:
+                return 0.0
+            end_sum, end_count = self._cumulative(int(now // self.resolution_sec))
+            start_sum, start_count = self._cumulative(int((now - seconds) // self.resolution_sec))
+        count = end_count - start_count
+        return float((end_sum - start_sum) / count) if count > 0 else 0.0
+
+    def averages(self, windows, now=None):
+        """Averages for several windows (seconds) at the same instant."""
+        if now is None:
+            now = time.time()
+        return [self.average(seconds, now=now) for seconds in windows]
+
+    def total_average(self):
+        """Mean over every sample since the aggregator was created."""
+        with self._lock:
+            return self._total_sum / self._total_count if self._total_count else 0.0
+
+    @property
+    def count(self):
+        return self._total_count
+
+    @property
+    def last_value(self):
+        return self._last_value
+
+
+def parse_windows(args, max_seconds):
+    """Window lengths (seconds) from ``?window=30&window=600`` or ``?windows=30,600`` query args.
+
+    ``args`` is a werkzeug ``MultiDict`` (``request.args``). Raises
+    ValueError for values that are not numbers in ``(0, max_seconds]``.
+    """
+    values = args.getlist('window')
+    for item in args.getlist('windows'):
+        values.extend(item.split(','))
+    windows = []
+    for value in values:
+        seconds = float(value)
+        if not 0 < seconds <= max_seconds:
+            raise ValueError(f"pencere 0 ile {max_seconds} saniye arasında olmalı: {value}")
+        windows.append(seconds)
+    return windows
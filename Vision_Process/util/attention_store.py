@@ -0,0 +1,167 @@
+"""Fixed-capacity storage of attention records received by ``flask_api.py``.
+
+:class:`AttentionStore` is a ring buffer: records get consecutive sequence
+numbers (the cursor of ``GET /data?since=``), the oldest are overwritten
+when ``capacity`` is reached and records older than ``retention_sec`` are
+dropped. Appends are per batch. The attention fields used by ``/stats``
+are kept in numpy columns, so statistics are vectorized over the retained
+records.
+
+:class:`IngestSummary` replaces per-record logging with one summary line
+per ``interval_sec``.
+"""
+import threading
+import time
+
+import numpy as np
+
+# /stats için numpy sütunlarında tutulan alanlar
+STAT_FIELDS = ('total_attention', 'left_attention', 'right_attention')
+
+
+def _number(value):
+    return float(value) if isinstance(value, (int, float)) else 0.0
+
+
+class AttentionStore:
+    """Thread-safe ring buffer of record dicts with sequence number cursors.
+
+    Args:
+        capacity: most records kept.
+        retention_sec: records received longer ago are dropped (None: only
+            the capacity limits).
+    """
+
+    def __init__(self, capacity=100000, retention_sec=None):
+        if capacity < 1:
+            raise ValueError(f'capacity must be positive, got {capacity}')
+        self.capacity = capacity
+        self.retention_sec = retention_sec
+        self._records = [None] * capacity
+        self._received = np.zeros(capacity)
+        self._columns = {field: np.zeros(capacity) for field in STAT_FIELDS}
+        # Sıra numaraları: [_start, _end) tutulan kayıtlar, kayıt i'nin yeri i % capacity
+        self._start = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            self._expire(time.time())
+            return self._end - self._start
+
+    @property
+    def cursor(self):
+        """Sequence number the next record will get."""
+        return self._end
+
+    def _expire(self, now):
+        if self.retention_sec is None or self._start == self._end:
+            return
+        cutoff = now - self.retention_sec
+        # Alım zamanları artan sırada: süresi dolanlar her zaman baştadır
+        while self._start < self._end and self._received[self._start % self.capacity] < cutoff:
+            self._records[self._start % self.capacity] = None
+            self._start += 1
+
+    def extend(self, records, received_at=None):
+        """Append ``records`` received at ``received_at`` (default: now); returns their ``(first, end)`` sequence numbers."""
+        now = time.time() if received_at is None else received_at
+        # Kapasiteden büyük bir toplu eklemenin baştaki kayıtları hemen üzerine yazılmış sayılır
+        skipped = max(0, len(records) - self.capacity)
+        records = list(records[skipped:])
+        n = len(records)
+        columns = {field: np.fromiter((_number(r.get(field, 0)) for r in records), dtype=np.float64, count=n)
+                   for field in STAT_FIELDS}
+        with self._lock:
+            first = self._end
+            self._end += skipped
+            pos = self._end % self.capacity
+            # Halkanın sonunda en fazla iki parça
+            head = min(n, self.capacity - pos)
+            self._records[pos:pos + head] = records[:head]
+            self._records[:n - head] = records[head:]
+            self._received[pos:pos + head] = now
+            self._received[:n - head] = now
+            for field, column in columns.items():
+                self._columns[field][pos:pos + head] = column[:head]
+                self._columns[field][:n - head] = column[head:]
+            self._end += n
+            self._start = max(self._start, self._end - self.capacity)
+            self._expire(now)
+            return first, self._end
+
+    def read(self, since=None, limit=100):
+        """Records from sequence number ``since`` on (the newest ``limit`` without ``since``).
+
+        Returns ``(records, next_cursor, missed)``; ``missed`` counts records
+        after ``since`` that were already overwritten or expired.
+        """
+        with self._lock:
+            self._expire(time.time())
+            if since is None:
+                since = max(self._start, self._end - limit)
+            missed = max(0, self._start - since)
+            since = min(max(since, self._start), self._end)
+            end = min(self._end, since + limit)
+            records = [self._records[i % self.capacity] for i in range(since, end)]
+            return records, end, missed
+
+    def stats(self):
+        """Aggregates of the retained records, None if there are none."""
+        with self._lock:
+            self._expire(time.time())
+            n = self._end - self._start
+            if n == 0:
+                return None
+            index = np.arange(self._start, self._end) % self.capacity
+            columns = {field: column[index] for field, column in self._columns.items()}
+            first = self._records[self._start % self.capacity]
+            last = self._records[(self._end - 1) % self.capacity]
+        total = columns['total_attention']
+        return {
+            "total_records": n,
+            "average_total_attention": float(total.mean()),
+            "max_total_attention": float(total.max()),
+            "min_total_attention": float(total.min()),
+            "average_left_attention": float(columns['left_attention'].mean()),
+            "average_right_attention": float(columns['right_attention'].mean()),
+            "first_record_time": first.get('received_at'),
+            "last_record_time": last.get('received_at'),
+        }
+
+
+class IngestSummary:
+    """Counts ingested records and logs one summary every ``interval_sec`` (thread-safe)."""
+
+    def __init__(self, logger, interval_sec=10.0):
+        self.logger = logger
+        self.interval_sec = interval_sec
+        self._lock = threading.Lock()
+        self._reset(time.monotonic())
+
+    def _reset(self, now):
+        self._since = now
+        self._records = 0
+        self._requests = 0
+        self._attention_sum = 0.0
+        self._last = None
+
+    def add(self, records):
+        if not records:
+            return
+        attention = sum(_number(r.get('total_attention', 0)) for r in records)
+        now = time.monotonic()
+        with self._lock:
+            self._records += len(records)
+            self._requests += 1
+            self._attention_sum += attention
+            self._last = records[-1]
+            if now - self._since < self.interval_sec:
+                return
+            elapsed = now - self._since
+            count, requests, mean, last = self._records, self._requests, self._attention_sum / self._records, self._last
+            self._reset(now)
+        self.logger.info(f"📥 {elapsed:.0f} sn: {count} kayıt, {requests} istek ({count / elapsed:.0f} kayıt/sn) | "
+                         f"Ortalama dikkat: {mean:.3f} | Son: dikkat {_number(last.get('total_attention', 0)):.3f}, "
+                         f"FPS {_number(last.get('fps', 0)):.1f}, gecikme {_number(last.get('latency_ms', 0)):.0f}ms")
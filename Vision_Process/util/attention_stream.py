@@ -0,0 +1,211 @@
+"""Push live attention snapshots to streaming HTTP clients (SSE or NDJSON).
+
+The frame loop calls :meth:`AttentionBroadcaster.publish` with a compact
+snapshot on every frame. A snapshot reaches a subscriber only when it
+differs from the last one queued for it: the attention score moved by at
+least the subscriber's ``delta``, or one of the other fields changed (face
+found, head, eyes). Each subscriber has a small bounded buffer; a client
+that reads slower than snapshots arrive gets the newest one and the older
+ones are dropped and counted (latest wins). ``max_rate`` caps the events
+per second of a client the same way. When nothing changes a keepalive is
+sent every ``heartbeat_sec`` so disconnected clients are noticed.
+
+    broadcaster = AttentionBroadcaster()
+    broadcaster.publish({'attention': 0.8, 'face_found': True, ...}, timestamp=frame_time)   # frame loop
+    options = parse_stream_options(request.args)                                            # HTTP thread
+    return Response(broadcaster.stream(**options), mimetype=STREAM_MIMETYPES[options['fmt']])
+
+Events carry the snapshot plus ``seq`` (publish counter) and ``dropped``
+(snapshots this client skipped so far). Windowed averages are not
+streamed, they stay on ``GET /attention``.
+"""
+import json
+import threading
+import time
+from collections import deque
+
+STREAM_FORMATS = ('sse', 'ndjson')
+STREAM_MIMETYPES = {'sse': 'text/event-stream', 'ndjson': 'application/x-ndjson'}
+STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+# Değişim saymadan geçilen alanlar
+_IGNORED_FIELDS = ('attention', 'timestamp', 'seq')
+
+
+class Subscriber:
+    """Bounded, latest-wins queue of one streaming client."""
+
+    def __init__(self, delta=0.02, max_rate=10.0, buffer=4):
+        self.delta = delta
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self._queue = deque(maxlen=buffer)
+        self._cond = threading.Condition()
+        self._last = None
+        self.dropped = 0
+        self.closed = False
+
+    def _changed(self, snapshot):
+        last = self._last
+        if last is None or abs(snapshot['attention'] - last['attention']) >= self.delta:
+            return True
+        return any(snapshot.get(key) != last.get(key) for key in snapshot if key not in _IGNORED_FIELDS)
+
+    def offer(self, snapshot):
+        """Queue ``snapshot`` if it differs enough from the last queued one (publisher thread)."""
+        with self._cond:
+            if not self._changed(snapshot):
+                return
+            self._last = snapshot
+            if len(self._queue) == self._queue.maxlen:
+                # Yavaş istemci: en eski anlık görüntü atılır
+                self.dropped += 1
+            self._queue.append(snapshot)
+            self._cond.notify()
+
+    def take(self, timeout):
+        """The newest queued snapshot (older ones are dropped), None after ``timeout`` or when closed."""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            if not self._queue:
+                return None
+            self.dropped += len(self._queue) - 1
+            snapshot = self._queue[-1]
+            self._queue.clear()
+            return snapshot
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class AttentionBroadcaster:
+    """Fan-out of attention snapshots from the frame loop to streaming clients.
+
+    Args:
+        max_subscribers: concurrent streams; :meth:`subscribe` raises
+            ``RuntimeError`` beyond it (each stream holds a server thread).
+    """
+
+    def __init__(self, max_subscribers=32):
+        self.max_subscribers = max_subscribers
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._latest = None
+
+    def publish(self, snapshot, timestamp=None):
+        """Offer ``snapshot`` (with a float ``attention``) to every subscriber."""
+        with self._lock:
+            self._seq += 1
+            snapshot = dict(snapshot, seq=self._seq, timestamp=time.time() if timestamp is None else timestamp)
+            self._latest = snapshot
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(snapshot)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(self, delta=0.02, max_rate=10.0, buffer=4):
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise RuntimeError(f'too many streaming clients ({self.max_subscribers})')
+            subscriber = Subscriber(delta, max_rate, buffer)
+            self._subscribers.append(subscriber)
+            latest = self._latest
+        if latest is not None:
+            # Yeni istemci ilk olarak son durumu alır
+            subscriber.offer(latest)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscriber.close()
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def stream(self, fmt='sse', delta=0.02, max_rate=10.0, buffer=4, heartbeat_sec=15.0):
+        """:class:`EventStream` of encoded events for one client; unsubscribes when the client goes away.
+
+        Subscribes immediately (so :meth:`subscribe` errors surface before the
+        response starts).
+        """
+        subscriber = self.subscribe(delta, max_rate, buffer)
+        return EventStream(self, subscriber, self._events(subscriber, fmt, heartbeat_sec))
+
+    def _events(self, subscriber, fmt, heartbeat_sec):
+        try:
+            next_send = 0.0
+            while not subscriber.closed:
+                # Hız sınırı: beklerken gelenler tamponda birleşir, sadece en yenisi gönderilir
+                delay = next_send - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                snapshot = subscriber.take(heartbeat_sec)
+                if snapshot is None:
+                    if not subscriber.closed:
+                        yield encode_keepalive(fmt)
+                    continue
+                next_send = time.monotonic() + subscriber.min_interval
+                yield encode_event(dict(snapshot, dropped=subscriber.dropped), fmt)
+        finally:
+            self.unsubscribe(subscriber)
+
+
+class EventStream:
+    """Response body of one streaming client.
+
+    A generator's ``finally`` only runs once it has started, but the server
+    may close the body without iterating it (HEAD requests, clients that
+    disconnect before the first event). :meth:`close`, which WSGI servers
+    call on every response body, therefore unsubscribes itself.
+    """
+
+    def __init__(self, broadcaster, subscriber, events):
+        self._broadcaster = broadcaster
+        self._subscriber = subscriber
+        self._events = events
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._events)
+
+    def close(self):
+        self._events.close()
+        self._broadcaster.unsubscribe(self._subscriber)
+
+
+def encode_event(snapshot, fmt):
+    data = json.dumps(snapshot, separators=(',', ':'))
+    if fmt == 'sse':
+        return f"id: {snapshot['seq']}\nevent: attention\ndata: {data}\n\n"
+    return data + '\n'
+
+
+def encode_keepalive(fmt):
+    return ': keepalive\n\n' if fmt == 'sse' else '\n'
+
+
+def parse_stream_options(args):
+    """``?format=sse|ndjson&delta=0.02&max_rate=10&buffer=4`` -> :meth:`AttentionBroadcaster.stream` kwargs.
+
+    ``args`` is a mapping such as Flask's ``request.args``; raises
+    ``ValueError`` for invalid values.
+    """
+    fmt = args.get('format', 'sse')
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f'format must be one of {STREAM_FORMATS}, got {fmt!r}')
+    options = {'fmt': fmt}
+    for name, cast, low, high in (('delta', float, 0.0, 1.0), ('max_rate', float, 0.0, 1000.0),
+                                  ('buffer', int, 1, 1024)):
+        if name in args:
+            value = cast(args[name])
+            if not low <= value <= high:
+                raise ValueError(f'{name} must be in [{low:g}, {high:g}], got {value:g}')
+            options[name] = value
+    return options
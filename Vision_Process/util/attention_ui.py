@@ -0,0 +1,255 @@
+"""OpenCV user interface for the webcam attention demo.
+
+Drawing works on a snapshot dict of the latest results produced by the
+inference loop, so it can run inline or on its own thread at a lower rate.
+"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import util.gaze
+
+WINDOW_NAME = "Gaze Estimation"
+
+
+def draw_overlays(frame, snapshot):
+    """Draw head direction, eye landmarks and gaze arrows onto ``frame``."""
+    head = snapshot.get('head')
+    if head is not None:
+        nose_tip, end_point = head['nose_tip'], head['end_point']
+        cv2.arrowedLine(frame, nose_tip, end_point, (0, 0, 255), 4, tipLength=0.3)
+        # Kafa açısını burun ucunun hemen üstüne ve biraz sağına yaz
+        angle_text = f"Yaw: {head['yaw']:.1f}°  Pitch: {head['pitch']:.1f}°  Roll: {head['roll']:.1f}°"
+        angle_x = min(nose_tip[0]+60, frame.shape[1]-350)
+        angle_y = max(nose_tip[1]-40, 30)
+        cv2.putText(frame, angle_text, (angle_x, angle_y), cv2.FONT_HERSHEY_DUPLEX, 1.0, (255,140,0), 2, cv2.LINE_AA)
+
+    for eye in snapshot.get('eyes', []):
+        for (x, y) in eye['landmarks']:
+            cv2.circle(frame, (int(round(x)), int(round(y))), 1, eye['color'], -1, lineType=cv2.LINE_AA)
+        util.gaze.draw_gaze(frame, eye['origin'], eye['gaze'], length=60.0, thickness=2)
+    return frame
+
+
+def draw_top_bar(window_width, fps, latency_ms, total_attention, eyenet_hz=None):
+    top_bar = np.ones((80, window_width, 3), dtype=np.uint8) * 245
+    cv2.rectangle(top_bar, (0,0), (window_width,79), (220,220,220), 2)
+
+    # FPS, Gecikme ve EyeNet hızı panelleri - Sol taraf
+    panel_width = 180
+    metrics = [("FPS", f"{fps:.1f}", ""), ("Gecikme", f"{latency_ms:.0f}", "ms")]
+    if eyenet_hz is not None:
+        metrics.append(("EyeNet", f"{eyenet_hz:.1f}", "Hz"))
+    for i, (metric, value, unit) in enumerate(metrics):
+        panel_x = 20 + i * (panel_width + 20)
+        cv2.rectangle(top_bar, (panel_x, 10), (panel_x + panel_width, 70), (235,235,235), -1)
+        cv2.rectangle(top_bar, (panel_x, 10), (panel_x + panel_width, 70), (200,200,200), 1)
+        # Metrik adı
+        cv2.putText(top_bar, metric, (panel_x + 10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (100,100,100), 1, cv2.LINE_AA)
+        # Değer
+        value_text = f"{value}{unit}"
+        value_size = cv2.getTextSize(value_text, cv2.FONT_HERSHEY_SIMPLEX, 0.9, 2)[0]
+        value_x = panel_x + (panel_width - value_size[0]) // 2
+        cv2.putText(top_bar, value_text, (value_x, 58), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (40,40,40), 2, cv2.LINE_AA)
+
+    # Dikkat Skoru paneli - Sağ taraf
+    att_panel_width = 300
+    att_panel_x = window_width - att_panel_width - 20
+    # Gradient arka plan
+    att_color = (0,200,100) if total_attention > 0.7 else (0,128,255) if total_attention > 0.4 else (0,50,255)
+    cv2.rectangle(top_bar, (att_panel_x, 10), (att_panel_x + att_panel_width, 70), (245,245,245), -1)
+    cv2.rectangle(top_bar, (att_panel_x, 10), (att_panel_x + att_panel_width, 70), att_color, 2)
+    # Başlık
+    cv2.putText(top_bar, "Dikkat Skoru", (att_panel_x + 10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (100,100,100), 1, cv2.LINE_AA)
+    # Değer
+    score_text = f"{total_attention*100:.1f}%"
+    score_size = cv2.getTextSize(score_text, cv2.FONT_HERSHEY_SIMPLEX, 1.2, 2)[0]
+    score_x = att_panel_x + (att_panel_width - score_size[0]) // 2
+    cv2.putText(top_bar, score_text, (score_x, 58), cv2.FONT_HERSHEY_SIMPLEX, 1.2, att_color, 2, cv2.LINE_AA)
+    return top_bar
+
+
+def draw_status_bar(window_width, left_status, right_status, head_ok):
+    status_bar = np.ones((70, window_width, 3), dtype=np.uint8) * 245
+    cv2.rectangle(status_bar, (0,0), (window_width,69), (220,220,220), 2)
+
+    # Durum panelleri için genel ayarlar
+    panel_height = 50
+    panel_y = 10
+
+    # Sol Göz Paneli
+    left_panel_width = 280
+    left_panel_x = 20
+    left_status_color = (46,204,113) if left_status == "Açık" else (231,76,60)  # Yeşil / Kırmızı
+    cv2.rectangle(status_bar, (left_panel_x, panel_y), (left_panel_x + left_panel_width, panel_y + panel_height), (235,235,235), -1)
+    cv2.rectangle(status_bar, (left_panel_x, panel_y), (left_panel_x + left_panel_width, panel_y + panel_height), left_status_color, 2)
+    cv2.putText(status_bar, "SOL GÖZ", (left_panel_x + 10, panel_y + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (100,100,100), 1, cv2.LINE_AA)
+    cv2.putText(status_bar, left_status.upper(), (left_panel_x + 10, panel_y + 42), cv2.FONT_HERSHEY_SIMPLEX, 0.9, left_status_color, 2, cv2.LINE_AA)
+
+    # Sağ Göz Paneli
+    right_panel_x = window_width//2 - left_panel_width//2
+    right_status_color = (46,204,113) if right_status == "Açık" else (231,76,60)
+    cv2.rectangle(status_bar, (right_panel_x, panel_y), (right_panel_x + left_panel_width, panel_y + panel_height), (235,235,235), -1)
+    cv2.rectangle(status_bar, (right_panel_x, panel_y), (right_panel_x + left_panel_width, panel_y + panel_height), right_status_color, 2)
+    cv2.putText(status_bar, "SAĞ GÖZ", (right_panel_x + 10, panel_y + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (100,100,100), 1, cv2.LINE_AA)
+    cv2.putText(status_bar, right_status.upper(), (right_panel_x + 10, panel_y + 42), cv2.FONT_HERSHEY_SIMPLEX, 0.9, right_status_color, 2, cv2.LINE_AA)
+
+    # Kafa Pozisyonu Paneli
+    head_panel_x = window_width - left_panel_width - 20
+    head_status = "EKRANA BAKIYOR" if head_ok else "BAKMIYOR"
+    head_status_color = (46,204,113) if head_ok else (231,76,60)
+    cv2.rectangle(status_bar, (head_panel_x, panel_y), (head_panel_x + left_panel_width, panel_y + panel_height), (235,235,235), -1)
+    cv2.rectangle(status_bar, (head_panel_x, panel_y), (head_panel_x + left_panel_width, panel_y + panel_height), head_status_color, 2)
+    cv2.putText(status_bar, "KAFA YÖNÜ", (head_panel_x + 10, panel_y + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (100,100,100), 1, cv2.LINE_AA)
+    cv2.putText(status_bar, head_status, (head_panel_x + 10, panel_y + 42), cv2.FONT_HERSHEY_SIMPLEX, 0.9, head_status_color, 2, cv2.LINE_AA)
+    return status_bar
+
+
+def draw_attention_graph(att_hist, attention_window_sec, avg_attention, graph_height=120, graph_width=320, graph_margin=15):
+    graph_img = np.ones((graph_height+2*graph_margin, graph_width+2*graph_margin, 3), dtype=np.uint8) * 245
+
+    # Grafik başlığı ve çerçeve
+    cv2.rectangle(graph_img, (0,0), (graph_width+2*graph_margin, graph_height+2*graph_margin), (220,220,220), 2)
+    cv2.putText(graph_img, "Dikkat Grafiği", (graph_margin, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (100,100,100), 2, cv2.LINE_AA)
+
+    # Izgara çizgileri
+    for i in range(5):
+        y = graph_margin + graph_height - (i * graph_height // 4)
+        cv2.line(graph_img, (graph_margin, y), (graph_margin+graph_width, y), (230,230,230), 1)
+        cv2.putText(graph_img, f"{i*25}%", (5, y+4), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (150,150,150), 1, cv2.LINE_AA)
+
+    # Dikkat grafiği
+    att_hist = att_hist[-graph_width:]
+    points = []
+    for i in range(len(att_hist)):
+        x = graph_margin + i
+        y = graph_margin + graph_height - int(att_hist[i] * graph_height)
+        points.append([x, y])
+
+    if len(points) > 1:
+        # Grafik altı dolgu
+        pts = np.array([*points, [points[-1][0], graph_margin+graph_height], [points[0][0], graph_margin+graph_height]], np.int32)
+        cv2.fillPoly(graph_img, [pts], (240,248,255))
+        # Grafik çizgisi
+        points = np.array(points, np.int32)
+        cv2.polylines(graph_img, [points], False, (52,152,219), 2, cv2.LINE_AA)
+
+    live_attention = att_hist[-1] if len(att_hist) else 0
+
+    # Modern istatistik kutuları
+    stats_y = graph_height + graph_margin - 10
+    # Anlık değer
+    cv2.putText(graph_img, f"Anlık: {live_attention*100:.1f}%", (graph_margin, stats_y), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (52,152,219), 2, cv2.LINE_AA)
+    # Ortalama
+    avg_text = f"{attention_window_sec:.0f}s Ort: {avg_attention*100:.1f}%"
+    avg_size = cv2.getTextSize(avg_text, cv2.FONT_HERSHEY_SIMPLEX, 0.55, 2)[0]
+    cv2.putText(graph_img, avg_text, (graph_width+graph_margin-avg_size[0], stats_y), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (52,152,219), 2, cv2.LINE_AA)
+    return graph_img
+
+
+def render_attention_ui(snapshot):
+    """Build the full UI image for a results snapshot.
+
+    The snapshot is a dict produced by the inference loop. Its ``frame`` is
+    never modified; overlays are drawn on a copy.
+    """
+    orig_frame = snapshot['frame'].copy()
+    if not snapshot['face_found']:
+        return orig_frame
+
+    draw_overlays(orig_frame, snapshot)
+
+    left_eye_img = snapshot.get('left_eye_img')
+    right_eye_img = snapshot.get('right_eye_img')
+    if left_eye_img is not None and right_eye_img is not None:
+        eyes_combined = np.hstack([left_eye_img, right_eye_img])
+        eyes_combined = cv2.cvtColor(eyes_combined, cv2.COLOR_GRAY2BGR)
+
+        window_width = max(1200, orig_frame.shape[1], eyes_combined.shape[1])
+
+        top_bar = draw_top_bar(window_width, snapshot['fps'], snapshot['latency_ms'], snapshot['total_attention'],
+                               snapshot.get('eyenet_hz'))
+        status_bar = draw_status_bar(window_width, snapshot['left_status'], snapshot['right_status'], snapshot['head_ok'])
+
+        # Gözler barı
+        eyes_pad = np.ones((eyes_combined.shape[0], window_width, 3), dtype=np.uint8) * 255
+        x_offset = (window_width - eyes_combined.shape[1]) // 2
+        eyes_pad[:, x_offset:x_offset+eyes_combined.shape[1]] = eyes_combined
+
+        # Webcam görüntüsünü ortala ve genişlet
+        webcam_pad = np.ones((orig_frame.shape[0], window_width, 3), dtype=np.uint8) * 255
+        x_offset_webcam = (window_width - orig_frame.shape[1]) // 2
+        webcam_pad[:, x_offset_webcam:x_offset_webcam+orig_frame.shape[1]] = orig_frame
+
+        # Son pencereyi birleştir: üst bar, gözler, durum barı, webcam
+        final_img = np.vstack([top_bar, eyes_pad, status_bar, webcam_pad])
+    else:
+        final_img = orig_frame
+
+    # Dikkat grafiğini ana pencereye ekle
+    graph_img = draw_attention_graph(snapshot['attention_history'], snapshot['attention_window_sec'],
+                                     snapshot['average_attention'])
+    h, w, _ = final_img.shape
+    gh, gw, _ = graph_img.shape
+    if h > gh and w > gw:
+        final_img[0:gh, w-gw:w] = graph_img
+    return final_img
+
+
+def show(img, window_name=WINDOW_NAME):
+    """Show an image and poll the keyboard. Returns True if 'q' was pressed."""
+    cv2.imshow(window_name, img)
+    return cv2.waitKey(1) == ord('q')
+
+
+class ThreadedRenderer:
+    """Draws the latest submitted snapshot on its own thread at a capped rate.
+
+    The inference loop only swaps a reference in :meth:`submit`, so it never
+    waits on drawing. Snapshots submitted between two draws are skipped.
+    """
+
+    def __init__(self, render_fn=render_attention_ui, max_fps=10.0, window_name=WINDOW_NAME):
+        self._render_fn = render_fn
+        self._period = 1.0 / max_fps if max_fps > 0 else 0.0
+        self._window_name = window_name
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._running = False
+        self._thread = None
+        self.quit_requested = False
+        self.frames_rendered = 0
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='ThreadedRenderer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def submit(self, snapshot):
+        with self._lock:
+            self._snapshot = snapshot
+
+    def _run(self):
+        while self._running:
+            start = time.time()
+            with self._lock:
+                snapshot, self._snapshot = self._snapshot, None
+            if snapshot is not None:
+                if show(self._render_fn(snapshot), self._window_name):
+                    self.quit_requested = True
+                self.frames_rendered += 1
+            else:
+                cv2.waitKey(1)
+            remaining = self._period - (time.time() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+        cv2.destroyAllWindows()
@@ -0,0 +1,24 @@
+"""Small helpers for timing inference code."""
+import time
+
+import numpy as np
+
+
+def measure_latency(fn, *args, warmup=10, iters=100):
+    """Call ``fn(*args)`` repeatedly and return latency statistics in milliseconds."""
+    for _ in range(warmup):
+        fn(*args)
+
+    times = np.empty(iters)
+    for i in range(iters):
+        start = time.perf_counter()
+        fn(*args)
+        times[i] = time.perf_counter() - start
+    times *= 1000.0
+
+    return {
+        'mean_ms': float(np.mean(times)),
+        'p50_ms': float(np.percentile(times, 50)),
+        'p95_ms': float(np.percentile(times, 95)),
+        'iters': iters,
+    }
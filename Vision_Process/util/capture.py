@@ -0,0 +1,94 @@
+"""Threaded frame capture that always hands out the newest frame."""
+import threading
+import time
+
+
+class LatestFrameCapture:
+    """Reads frames from a capture object on a background thread.
+
+    Only the most recent frame is kept (a single slot that is overwritten on
+    every write), so a slow consumer always processes the freshest frame
+    instead of working through a backlog of stale ones.
+
+    Args:
+        capture: object with a ``read() -> (ok, frame)`` method, e.g. a
+            :obj:`cv2.VideoCapture`, or a :mod:`util.frame_source` source
+            whose ``read()`` also returns the frame timestamp.
+    """
+
+    def __init__(self, capture):
+        self._capture = capture
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        self._frame = None
+        self._timestamp = None
+        self._seq = 0
+        self._consumed_seq = 0
+
+        self.frames_captured = 0
+        self.frames_consumed = 0
+        self.frames_dropped = 0  # overwritten before the consumer saw them
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='LatestFrameCapture', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._running
+
+    def _run(self):
+        while self._running:
+            ok, frame, *timestamp = self._capture.read()
+            timestamp = timestamp[0] if timestamp else time.time()
+            with self._cond:
+                if not ok or frame is None:
+                    self._running = False
+                    self._cond.notify_all()
+                    break
+                if self._seq != self._consumed_seq:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._timestamp = timestamp
+                self._seq += 1
+                self.frames_captured += 1
+                self._cond.notify_all()
+
+    def read(self, timeout=None):
+        """Wait for a frame newer than the last one returned.
+
+        Returns:
+            ``(ok, frame, timestamp)`` where ``timestamp`` is the
+            :func:`time.time` at which the frame was captured. ``ok`` is
+            False if the capture stopped or ``timeout`` seconds passed.
+        """
+        with self._cond:
+            ready = self._cond.wait_for(lambda: self._seq != self._consumed_seq or not self._running,
+                                        timeout=timeout)
+            if not ready or self._seq == self._consumed_seq:
+                return False, None, None
+            self._consumed_seq = self._seq
+            self.frames_consumed += 1
+            return True, self._frame, self._timestamp
+
+    def stats(self):
+        with self._cond:
+            return {
+                'captured': self.frames_captured,
+                'consumed': self.frames_consumed,
+                'dropped': self.frames_dropped,
+            }
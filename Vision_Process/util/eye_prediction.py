@@ -1,20 +1,12 @@
 from util.eye_sample import EyeSample
 
 
-class EyePrediction():
-    def __init__(self, eye_sample: EyeSample, landmarks, gaze):
-        self._eye_sample = eye_sample
-        self._landmarks = landmarks
-        self._gaze = gaze
-
-    @property
-    def eye_sample(self):
-        return self._eye_sample
+class EyePrediction:
+    """EyeNet output for one :class:`EyeSample`, landmarks in frame coordinates."""
 
-    @property
-    def landmarks(self):
-        return self._landmarks
+    __slots__ = ('eye_sample', 'landmarks', 'gaze')
 
-    @property
-    def gaze(self):
-        return self._gaze
+    def __init__(self, eye_sample: EyeSample, landmarks, gaze):
+        self.eye_sample = eye_sample
+        self.landmarks = landmarks
+        self.gaze = gaze
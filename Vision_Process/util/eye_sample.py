@@ -1,27 +1,17 @@
-
 class EyeSample:
-    def __init__(self, orig_img, img, is_left, transform_inv, estimated_radius):
-        self._orig_img = orig_img.copy()
-        self._img = img.copy()
-        self._is_left = is_left
-        self._transform_inv = transform_inv
-        self._estimated_radius = estimated_radius
-    @property
-    def orig_img(self):
-        return self._orig_img
+    """A segmented eye crop.
 
-    @property
-    def img(self):
-        return self._img
+    Nothing is copied: ``img`` may be a view (e.g. the flipped crop of the
+    left eye) and ``orig_img`` is an optional reference to the source frame.
+    ``transform_inv`` maps crop ``(x, y, 1)`` coordinates to the frame; it is
+    a 2x3 affine matrix (a 3x3 homogeneous matrix is also accepted).
+    """
 
-    @property
-    def is_left(self):
-        return self._is_left
+    __slots__ = ('orig_img', 'img', 'is_left', 'transform_inv', 'estimated_radius')
 
-    @property
-    def transform_inv(self):
-        return self._transform_inv
-
-    @property
-    def estimated_radius(self):
-        return self._estimated_radius
\ No newline at end of file
+    def __init__(self, orig_img, img, is_left, transform_inv, estimated_radius):
+        self.orig_img = orig_img
+        self.img = img
+        self.is_left = is_left
+        self.transform_inv = transform_inv
+        self.estimated_radius = estimated_radius
@@ -0,0 +1,108 @@
+"""Decides on which frames EyeNet has to run."""
+import collections
+import threading
+
+import numpy as np
+
+
+class EyeNetScheduler:
+    """Runs EyeNet only when the eyes may have changed.
+
+    The tracked points (eye corners and iris centres) and the head pose at the
+    last inference are the reference. EyeNet runs again on the first frame
+    where any tracked point has moved by more than ``motion_threshold`` times
+    the eye width, the head pose has changed by more than
+    ``pose_threshold_deg``, or ``max_staleness_sec`` has passed. In between,
+    the caller reuses the last prediction, and the gaze smoothing carries it
+    forward.
+
+    The iris centres come from MediaPipe's refined landmarks and move with
+    the eyeball. A saccade without head motion therefore still triggers an
+    inference.
+
+    Args:
+        enabled: False runs EyeNet on every frame (the statistics are still kept).
+    """
+
+    def __init__(self, motion_threshold=0.05, pose_threshold_deg=3.0, max_staleness_sec=0.2, enabled=True):
+        self.motion_threshold = motion_threshold
+        self.pose_threshold_deg = pose_threshold_deg
+        self.max_staleness_sec = max_staleness_sec
+        self.enabled = enabled
+        self._ref_points = None
+        self._ref_pose = None
+        self._ref_time = None
+        self._run_times = collections.deque(maxlen=120)
+        self._frame_times = collections.deque(maxlen=120)
+        # stats() is read from the HTTP thread while the frame thread appends
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.runs = 0
+
+    def should_run(self, points, scale, pose, timestamp):
+        """Whether EyeNet has to run on this frame.
+
+        Args:
+            points: ``(n, 2)`` tracked landmarks in pixels.
+            scale: eye width in pixels, the unit of ``motion_threshold``.
+            pose: ``(yaw, pitch, roll)`` in degrees.
+            timestamp: frame time in seconds.
+        """
+        with self._lock:
+            self.frames += 1
+            self._frame_times.append(timestamp)
+        if not self.enabled or self._ref_points is None:
+            return True
+        if timestamp - self._ref_time >= self.max_staleness_sec:
+            return True
+        if np.abs(np.subtract(pose, self._ref_pose)).max() > self.pose_threshold_deg:
+            return True
+        motion = np.linalg.norm(points - self._ref_points, axis=1).max()
+        return motion > self.motion_threshold * scale
+
+    def update(self, points, pose, timestamp):
+        """Make the frame of a successful inference the new reference."""
+        self._ref_points = np.array(points, dtype=np.float32)
+        self._ref_pose = np.array(pose, dtype=np.float32)
+        self._ref_time = timestamp
+        with self._lock:
+            self.runs += 1
+            self._run_times.append(timestamp)
+
+    def invalidate(self):
+        """Force an inference on the next frame (face lost, inference failed)."""
+        self._ref_points = None
+
+    def displacement(self, points):
+        """Motion of ``points`` since the last inference, for moving stale overlays."""
+        return points - self._ref_points
+
+    def _snapshot(self):
+        with self._lock:
+            return self.frames, self.runs, list(self._frame_times), list(self._run_times)
+
+    @staticmethod
+    def _rates(frame_times, run_times):
+        """``(eyenet_hz, frame_hz)`` over a consistent snapshot of the timestamps."""
+        if len(frame_times) < 2 or frame_times[-1] <= frame_times[0]:
+            return 0.0, 0.0
+        start = frame_times[0]
+        span = frame_times[-1] - start
+        return sum(1 for t in run_times if t > start) / span, (len(frame_times) - 1) / span
+
+    @property
+    def eyenet_hz(self):
+        """EyeNet inferences per second over the last frames."""
+        _, _, frame_times, run_times = self._snapshot()
+        return self._rates(frame_times, run_times)[0]
+
+    def stats(self):
+        frames, runs, frame_times, run_times = self._snapshot()
+        eyenet_hz, frame_hz = self._rates(frame_times, run_times)
+        return {
+            'frames': frames,
+            'eyenet_runs': runs,
+            'run_ratio': runs / frames if frames else 0.0,
+            'eyenet_hz': eyenet_hz,
+            'frame_hz': frame_hz,
+        }
@@ -0,0 +1,81 @@
+"""Face region tracking, so FaceMesh and color conversion only touch the face."""
+import numpy as np
+
+
+class FaceROITracker:
+    """Padded face box from the previous frame's landmarks.
+
+    The box is only moved when the face leaves its inner margin or the face
+    size changes a lot. The crop therefore stays fixed while the head is
+    roughly still, and FaceMesh's own frame-to-frame tracking keeps working
+    on it. When FaceMesh loses the face inside the box, the caller resets
+    the tracker and detects on the full frame.
+
+    Args:
+        padding: margin around the landmark bounding box, relative to its size.
+        margin: the box is kept as long as the landmarks stay this far
+            (relative to their size) inside it.
+        min_size: minimum box side in pixels.
+        enabled: False always returns the full frame.
+    """
+
+    def __init__(self, padding=0.4, margin=0.1, min_size=160, enabled=True):
+        self.padding = padding
+        self.margin = margin
+        self.min_size = min_size
+        self.enabled = enabled
+        self.roi = None
+        self.roi_frames = 0
+        self.full_frames = 0
+
+    def region(self, frame_shape):
+        """``(x0, y0, x1, y1)`` to process this frame: the tracked box or the full frame."""
+        if self.roi is None:
+            return 0, 0, frame_shape[1], frame_shape[0]
+        return self.roi
+
+    def count(self, used_roi):
+        """Record the region a frame was finally processed on, once per frame."""
+        if used_roi:
+            self.roi_frames += 1
+        else:
+            self.full_frames += 1
+
+    def update(self, points, frame_shape):
+        """Track the face from its ``(n, 2)`` full-frame pixel landmarks."""
+        if not self.enabled:
+            return
+        h, w = frame_shape[:2]
+        x_min, y_min = points.min(axis=0)
+        x_max, y_max = points.max(axis=0)
+        size = max(x_max - x_min, y_max - y_min)
+
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            inset = self.margin * size
+            inside = (x_min - inset >= x0 or x0 == 0) and (y_min - inset >= y0 or y0 == 0) and \
+                     (x_max + inset <= x1 or x1 == w) and (y_max + inset <= y1 or y1 == h)
+            target_side = max(size * (1 + 2 * self.padding), self.min_size)
+            # Re-fit when the face shrank a lot (moved away), so the crop does not stay oversized
+            if inside and max(x1 - x0, y1 - y0) <= 1.5 * target_side:
+                return
+
+        side = max(size * (1 + 2 * self.padding), self.min_size)
+        cx, cy = 0.5 * (x_min + x_max), 0.5 * (y_min + y_max)
+        x0 = int(np.clip(np.floor(cx - side / 2), 0, w))
+        y0 = int(np.clip(np.floor(cy - side / 2), 0, h))
+        x1 = int(np.clip(np.ceil(cx + side / 2), 0, w))
+        y1 = int(np.clip(np.ceil(cy + side / 2), 0, h))
+        self.roi = (x0, y0, x1, y1) if x1 > x0 and y1 > y0 else None
+
+    def reset(self):
+        """Tracking lost: detect on the full frame next time."""
+        self.roi = None
+
+    def stats(self):
+        total = self.roi_frames + self.full_frames
+        return {
+            'roi_frames': self.roi_frames,
+            'full_frames': self.full_frames,
+            'roi_ratio': self.roi_frames / total if total else 0.0,
+        }
@@ -0,0 +1,400 @@
+"""Per-frame attention analysis of one camera stream.
+
+:class:`FrameAnalyzer` holds everything that belongs to a single stream:
+its FaceMesh graph, face region tracking, EyeNet scheduling, head pitch and
+gaze calibration, and gaze smoothing. EyeNet itself is injected as a
+``run_eyenet(eyes)`` callable, so several analyzers can share one model
+(see :class:`backends.batcher.EyeNetBatcher`).
+"""
+import math
+
+import cv2
+import numpy as np
+
+from util.eye_sample import EyeSample
+from util.eyenet_scheduler import EyeNetScheduler
+from util.face_roi import FaceROITracker
+from util.mediapipe_face import (EYE_CORNER_IDX, GAZE_TRACK_IDX, POSE_IDX, eye_aspect_ratios, landmark_mobility,
+                                 landmarks_to_array, to_pixels)
+from util.stage_timer import StageTimer
+
+# solvePnP için 3D model noktaları
+MODEL_POINTS = np.array([
+    [0.0, 0.0, 0.0],             # Nose tip
+    [0.0, -330.0, -65.0],        # Chin
+    [-225.0, 170.0, -135.0],     # Left eye left corner
+    [225.0, 170.0, -135.0],      # Right eye right corner
+    [-150.0, -150.0, -125.0],    # Left Mouth corner
+    [150.0, -150.0, -125.0]      # Right mouth corner
+])
+
+# Kafa ekrana bakıyor mu? Toleranslar: yaw ±25°, pitch ±40° (yukarı/aşağı bakışta da ekrana bakıyor kabul edilir)
+HEAD_YAW_TOL = 25.0
+HEAD_PITCH_TOL_UP = 40.0
+HEAD_PITCH_TOL_DOWN = 40.0
+# Ekran büyüklüğüne göre gaze tolerans açıları (ör: 24" ekran, 60cm mesafe)
+GAZE_HORIZONTAL_TOL_DEG = 15
+GAZE_VERTICAL_TOL_DEG = 10
+# Dikeyde 10 derece aşağı offset (radyan cinsinden)
+GAZE_VERTICAL_OFFSET_RAD = np.deg2rad(10)
+EAR_OPEN_THRESHOLD = 0.18
+ATTENTION_WEIGHTS = [0.2, 0.2, 0.4, 0.2]  # head, eye open, gaze, mobility
+
+
+def create_face_mesh():
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(static_image_mode=False, max_num_faces=1, refine_landmarks=True,
+                                           min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+
+def segment_eyes(frame, landmarks, ow=160, oh=96):
+    """Göz köşelerinden ow x oh boyutunda, histogramı eşitlenmiş göz kırpıntıları çıkarır.
+
+    Kare kopyalanmaz; sadece iki küçük kırpıntı ayrılır. Dönüşümler 2x3 afin matrislerdir.
+    """
+    eyes = []
+
+    # Segment eyes
+    for corner1, corner2, is_left in [(2, 3, True), (0, 1, False)]:
+        x1, y1 = landmarks[corner1, :]
+        x2, y2 = landmarks[corner2, :]
+        eye_width = 1.5 * float(np.linalg.norm(landmarks[corner1, :] - landmarks[corner2, :]))
+        if eye_width == 0.0:
+            return eyes
+
+        cx, cy = 0.5 * float(x1 + x2), 0.5 * float(y1 + y2)
+
+        # Gözün ortasını kırpıntının ortasına taşı ve göz genişliği ow olacak şekilde ölçekle:
+        # x' = scale * (x - cx) + ow / 2
+        scale = ow / eye_width
+        transform_mat = np.array([[scale, 0.0, 0.5 * ow - scale * cx],
+                                  [0.0, scale, 0.5 * oh - scale * cy]])
+        inv_scale = 1.0 / scale
+        inv_transform_mat = np.array([[inv_scale, 0.0, cx - 0.5 * ow * inv_scale],
+                                      [0.0, inv_scale, cy - 0.5 * oh * inv_scale]])
+
+        estimated_radius = 0.5 * eye_width * scale
+
+        eye_image = cv2.warpAffine(frame, transform_mat, (ow, oh))
+        cv2.equalizeHist(eye_image, dst=eye_image)
+
+        if is_left:
+            eye_image = np.fliplr(eye_image)
+        # Gözler artık tek pencerede gösterilecek
+        eyes.append(EyeSample(orig_img=None,
+                              img=eye_image,
+                              transform_inv=inv_transform_mat,
+                              is_left=is_left,
+                              estimated_radius=estimated_radius))
+    return eyes
+
+
+def gaze_attention(gaze):
+    """Gaze (yaw, pitch) radyan vektörünün ekrana bakma skoru (0-1)."""
+    yaw_deg = np.degrees(gaze[0])
+    pitch_deg = np.degrees(gaze[1])
+    # Dikkat skoru: tolerans içindeyse tam, değilse mesafeye göre
+    if abs(yaw_deg) < GAZE_HORIZONTAL_TOL_DEG and abs(pitch_deg) < GAZE_VERTICAL_TOL_DEG:
+        return 1.0
+    return max(0.0, 1.0 - (abs(yaw_deg) / GAZE_HORIZONTAL_TOL_DEG + abs(pitch_deg) / GAZE_VERTICAL_TOL_DEG) / 2)
+
+
+class FrameAnalyzer:
+    """Attention analysis state of one stream.
+
+    Args:
+        run_eyenet: ``run_eyenet(eyes) -> List[EyePrediction]``.
+        face_mesh: MediaPipe FaceMesh, created if None. A graph must not be
+            shared between streams.
+        scheduler: :class:`EyeNetScheduler`, default settings if None.
+        face_roi: :class:`FaceROITracker`, default settings if None.
+        timer: :class:`StageTimer` that receives the stage laps. The caller
+            calls ``begin()``/``end()`` around :meth:`analyze`.
+        overlays: also return the drawing data for the UI.
+        gaze_smoothing: 0.0: anlık, 1.0: tamamen önceki.
+        calibration_sec: head pitch and gaze offsets are averaged over the
+            first seconds of the stream (frame timestamps).
+    """
+
+    def __init__(self, run_eyenet, face_mesh=None, scheduler=None, face_roi=None, timer=None, overlays=True,
+                 gaze_smoothing=0.7, calibration_sec=5.0):
+        self.run_eyenet = run_eyenet
+        self.face_mesh = face_mesh if face_mesh is not None else create_face_mesh()
+        self.scheduler = scheduler or EyeNetScheduler()
+        self.face_roi = face_roi or FaceROITracker()
+        self.timer = timer or StageTimer()
+        self.overlays = overlays
+        self.gaze_smoothing = gaze_smoothing
+        self.calibration_sec = calibration_sec
+
+        self.start_time = None
+        self.pitch_samples = []
+        self.pitch_offset = 0
+        self.offset_calibrated = False
+        self.gaze_samples_left = []
+        self.gaze_samples_right = []
+        self.gaze_offset_left = np.array([0.0, 0.0])
+        self.gaze_offset_right = np.array([0.0, 0.0])
+        self.gaze_offset_calibrated = False
+        self.prev_left_gaze = None
+        self.prev_right_gaze = None
+        # Hareketlilik için bir önceki karenin landmarkları
+        self.prev_lm_xy = None
+        self.last_preds = None
+        self.last_eye_imgs = (None, None)
+        self.gray = None  # tam kare boyutunda gri tampon, her karede sadece işlenen bölge güncellenir
+        self.gray_region = None  # tamponda geçerli piksellerin bulunduğu bölge
+
+    def close(self):
+        self.face_mesh.close()
+
+    def _calibrating(self, frame_time):
+        return frame_time - self.start_time <= self.calibration_sec
+
+    def analyze(self, frame_bgr, frame_time):
+        """Analyze one BGR frame.
+
+        Returns a dict with ``face_found``, head pose (``yaw``, ``pitch``,
+        ``roll``, ``head_ok``), ``left_ear``/``right_ear``, eye states,
+        smoothed gazes (``gaze_found``), ``mobility``, per-eye and
+        ``total_attention`` scores, the UI status texts and, with
+        ``overlays``, the drawing data.
+        """
+        timer = self.timer
+        if self.start_time is None:
+            self.start_time = frame_time
+        h, w, _ = frame_bgr.shape
+        face_roi = self.face_roi
+
+        # Yüz bölgesi takibi: FaceMesh ve renk dönüşümleri önceki karenin yüz kutusunda yapılır
+        used_roi = face_roi.roi is not None
+        x0, y0, x1, y1 = face_roi.region(frame_bgr.shape)
+        frame_rgb = cv2.cvtColor(frame_bgr[y0:y1, x0:x1], cv2.COLOR_BGR2RGB)
+        timer.lap('color')
+
+        # MediaPipe Face Mesh ile yüz landmarkları
+        results = self.face_mesh.process(frame_rgb)
+        if not results.multi_face_landmarks and used_roi:
+            # Yüz kutuda kayboldu: aynı karede tüm görüntüde tekrar ara
+            face_roi.reset()
+            used_roi = False
+            x0, y0, x1, y1 = face_roi.region(frame_bgr.shape)
+            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+            results = self.face_mesh.process(frame_rgb)
+        # Kare, son seçilen bölgeye göre bir kez sayılır
+        face_roi.count(used_roi)
+        timer.lap('face_mesh')
+
+        if not results.multi_face_landmarks:
+            self.scheduler.invalidate()
+            self.last_preds = None
+            timer.lap('landmarks')
+            return {
+                'face_found': False,
+                'left_attention': 0.0,
+                'right_attention': 0.0,
+                'total_attention': 0.0,
+                'left_status': "Bakmıyor",
+                'right_status': "Bakmıyor",
+            }
+
+        # MediaPipe sonucu karede bir kez (n, 3) numpy dizisine çevrilir (tam kare piksel koordinatları),
+        # kafa pozu, EAR, göz segmentasyonu ve hareketlilik bu diziden okur
+        lm_xy = to_pixels(landmarks_to_array(results.multi_face_landmarks[0]), x1 - x0, y1 - y0,
+                          origin=(x0, y0))
+        face_roi.update(lm_xy, frame_bgr.shape)
+        # Hareketlilik metriği
+        mobility = landmark_mobility(self.prev_lm_xy, lm_xy) if self.prev_lm_xy is not None else 0.0
+        self.prev_lm_xy = lm_xy
+        timer.lap('landmarks')
+
+        # Gri dönüşüm sadece işlenen bölgede, tam boy tamponun içine yapılır (segment_eyes tam kare
+        # koordinatlarıyla çalışır). Göz kırpıntısı kenarda bölgenin dışına taşabilir; önceki karelerden
+        # kalan eski pikseller kullanılmasın diye bölge değiştiğinde tampon sıfırlanır, bölge dışı hep 0 kalır.
+        if self.gray is None or self.gray.shape != (h, w):
+            self.gray = np.zeros((h, w), dtype=np.uint8)
+            self.gray_region = (x0, y0, x1, y1)
+        elif self.gray_region != (x0, y0, x1, y1):
+            self.gray.fill(0)
+            self.gray_region = (x0, y0, x1, y1)
+        gray = self.gray
+        cv2.cvtColor(frame_bgr[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY, dst=gray[y0:y1, x0:x1])
+        timer.lap('gray')
+
+        yaw, pitch, roll, head_overlay = self._head_pose(lm_xy, w, h)
+        # Pitch offset kalibrasyonu (ilk calibration_sec saniye)
+        if not self.offset_calibrated:
+            self.pitch_samples.append(pitch)
+            if not self._calibrating(frame_time):
+                self.pitch_offset = np.mean(self.pitch_samples)
+                self.offset_calibrated = True
+        # Doğal kafa pozisyonu (pitch_offset) referans alınır
+        head_yaw_ok = abs(yaw) <= HEAD_YAW_TOL
+        pitch_delta = pitch - self.pitch_offset
+        head_pitch_ok = (-HEAD_PITCH_TOL_DOWN <= pitch_delta <= HEAD_PITCH_TOL_UP)
+        head_ok = head_yaw_ok and head_pitch_ok
+        timer.lap('head_pose')
+
+        # EAR ile göz açık/kapalı durumu
+        left_ear, right_ear = eye_aspect_ratios(lm_xy)
+        left_eye_open = left_ear > EAR_OPEN_THRESHOLD
+        right_eye_open = right_ear > EAR_OPEN_THRESHOLD
+        timer.lap('ear')
+
+        # Göz segmentasyonu ve gaze tahmini: sadece zamanlayıcı isterse, aksi halde son tahmin kullanılır
+        scheduler = self.scheduler
+        mp_landmarks = lm_xy[EYE_CORNER_IDX]
+        track_points = lm_xy[GAZE_TRACK_IDX]
+        eye_width = 0.5 * (np.linalg.norm(mp_landmarks[0] - mp_landmarks[1]) +
+                           np.linalg.norm(mp_landmarks[2] - mp_landmarks[3]))
+        head_pose = (yaw, pitch, roll)
+        if scheduler.should_run(track_points, eye_width, head_pose, frame_time):
+            eyes = segment_eyes(gray, mp_landmarks)
+            timer.lap('segment_eyes')
+            preds = self.run_eyenet(eyes) if len(eyes) == 2 else []
+            timer.lap('eyenet')
+            if preds:
+                scheduler.update(track_points, head_pose, frame_time)
+                self.last_preds = preds
+                self.last_eye_imgs = (eyes[0].img, eyes[1].img)
+            else:
+                scheduler.invalidate()
+                self.last_preds = None
+            eye_shift = (0.0, 0.0)
+            eyenet_ran = True
+        else:
+            preds = self.last_preds
+            # Eski tahminin çizimleri gözlerin o zamandan beri kayması kadar taşınır
+            displacement = scheduler.displacement(track_points)
+            eye_shift = (displacement[2:4].mean(axis=0), displacement[0:2].mean(axis=0))
+            eyenet_ran = False
+
+        result = {
+            'face_found': True,
+            'yaw': yaw,
+            'pitch': pitch,
+            'roll': roll,
+            'head_ok': head_ok,
+            'head_overlay': head_overlay,
+            'left_ear': left_ear,
+            'right_ear': right_ear,
+            'left_eye_open': left_eye_open,
+            'right_eye_open': right_eye_open,
+            'mobility': mobility,
+            'gaze_found': False,
+            'left_attention': 0.0,
+            'right_attention': 0.0,
+            'left_status': "Kapalı",
+            'right_status': "Kapalı",
+            'left_eye_img': None,
+            'right_eye_img': None,
+            'eye_overlays': [],
+        }
+        if preds:
+            left_gaze, right_gaze = self._calibrated_gaze(preds, eyenet_ran, frame_time)
+            result.update({
+                'gaze_found': True,
+                'left_gaze': left_gaze,
+                'right_gaze': right_gaze,
+                'left_attention': gaze_attention(left_gaze),
+                'right_attention': gaze_attention(right_gaze),
+                'left_status': "Açık" if left_eye_open else "Kapalı",
+                'right_status': "Açık" if right_eye_open else "Kapalı",
+                'left_eye_img': self.last_eye_imgs[0],
+                'right_eye_img': self.last_eye_imgs[1],
+            })
+            # Vektör ve landmark çizimi için veriler (çizim arayüz tarafında yapılır)
+            if self.overlays:
+                left_eye, right_eye = preds
+                left_gaze_draw = left_gaze.copy()
+                left_gaze_draw[1] = -left_gaze_draw[1]
+                result['eye_overlays'] = [
+                    {'landmarks': left_eye.landmarks[16:33] + eye_shift[0],
+                     'origin': left_eye.landmarks[-2] + eye_shift[0],
+                     'gaze': left_gaze_draw, 'color': (255, 0, 0)},
+                    {'landmarks': right_eye.landmarks[16:33] + eye_shift[1],
+                     'origin': right_eye.landmarks[-2] + eye_shift[1],
+                     'gaze': right_gaze.copy(), 'color': (0, 255, 0)},
+                ]
+
+        # Kümülatif dikkat skoru: head_ok, göz açık/kapalı, gaze vektörü, kafa hareketliliği
+        # Hareketlilik düşükse (sabit kafa) odak yüksek, hareketlilik yüksekse dikkat düşük
+        mobility_norm = np.clip(mobility / 10.0, 0, 1)  # 0-1 arası normalize
+        mobility_score = 1.0 - mobility_norm  # Sabitlik = odak
+        head_score = 1.0 if head_ok else 0.0
+        eye_score = 0.5 * float(left_eye_open) + 0.5 * float(right_eye_open)
+        gaze_score = 0.5 * result['left_attention'] + 0.5 * result['right_attention']
+        result['total_attention'] = float(ATTENTION_WEIGHTS[0] * head_score +
+                                          ATTENTION_WEIGHTS[1] * eye_score +
+                                          ATTENTION_WEIGHTS[2] * gaze_score +
+                                          ATTENTION_WEIGHTS[3] * mobility_score)
+        timer.lap('scoring')
+        return result
+
+    def _head_pose(self, lm_xy, w, h):
+        """solvePnP ile kafa pozu: (yaw, pitch, roll) derece ve çizim verisi."""
+        # 2D image points: burun ucu, çene, sol/sağ göz dış köşe, sol/sağ ağız köşe
+        image_points = lm_xy[POSE_IDX].astype("double")
+        focal_length = w
+        center = (w/2, h/2)
+        camera_matrix = np.array(
+            [[focal_length, 0, center[0]],
+             [0, focal_length, center[1]],
+             [0, 0, 1]], dtype = "double"
+        )
+        dist_coeffs = np.zeros((4,1))
+        success, rotation_vector, translation_vector = cv2.solvePnP(MODEL_POINTS, image_points, camera_matrix, dist_coeffs, flags=cv2.SOLVEPNP_ITERATIVE)
+        yaw, pitch, roll = 0, 0, 0
+        head_overlay = None
+        if success:
+            rmat, _ = cv2.Rodrigues(rotation_vector)
+            sy = math.sqrt(rmat[0,0] * rmat[0,0] + rmat[1,0] * rmat[1,0])
+            singular = sy < 1e-6
+            if not singular:
+                pitch = math.atan2(-rmat[2,0], sy)
+                yaw = math.atan2(rmat[1,0], rmat[0,0])
+                roll = math.atan2(rmat[2,1], rmat[2,2])
+            pitch = math.degrees(pitch)
+            yaw = math.degrees(yaw)
+            roll = math.degrees(roll)
+            if self.overlays:
+                # Kafa yönünü çiz (burun ucu referans)
+                nose_tip = tuple(np.round(image_points[0]).astype(int))
+                # Kafa yön vektörü (Z ekseni)
+                head_dir = np.array([0, 0, 100.0])  # 100px ileri
+                head_dir2d, _ = cv2.projectPoints(head_dir, rotation_vector, translation_vector, camera_matrix, dist_coeffs)
+                head_dir2d = head_dir2d[0][0]
+                end_point = (int(nose_tip[0] + (head_dir2d[0] - nose_tip[0])), int(nose_tip[1] + (head_dir2d[1] - nose_tip[1])))
+                head_overlay = {'nose_tip': nose_tip, 'end_point': end_point, 'yaw': yaw, 'pitch': pitch, 'roll': roll}
+        return yaw, pitch, roll, head_overlay
+
+    def _calibrated_gaze(self, preds, eyenet_ran, frame_time):
+        """Offset kalibrasyonu, dikey offset ve smoothing uygulanmış (sol, sağ) gaze vektörleri."""
+        left_gaze = preds[0].gaze.copy()
+        right_gaze = preds[1].gaze.copy()
+        # Gaze offset kalibrasyonu (ilk calibration_sec saniye)
+        if not self.gaze_offset_calibrated:
+            # Taşınan tahminler kalibrasyonu etkilemesin diye sadece yeni çıkarımlar eklenir
+            if eyenet_ran:
+                # Kopyalanır: aşağıdaki offset ve dikey düzeltme diziyi yerinde değiştirir
+                self.gaze_samples_left.append(left_gaze.copy())
+                self.gaze_samples_right.append(right_gaze.copy())
+            if not self._calibrating(frame_time):
+                self.gaze_offset_left = np.mean(self.gaze_samples_left, axis=0)
+                self.gaze_offset_right = np.mean(self.gaze_samples_right, axis=0)
+                self.gaze_offset_calibrated = True
+        # Offset uygula
+        if self.gaze_offset_calibrated:
+            left_gaze -= self.gaze_offset_left
+            right_gaze -= self.gaze_offset_right
+        left_gaze[1] += GAZE_VERTICAL_OFFSET_RAD
+        right_gaze[1] += GAZE_VERTICAL_OFFSET_RAD
+        # Gaze smoothing (hareketli ortalama)
+        smoothing = self.gaze_smoothing
+        if self.prev_left_gaze is not None:
+            left_gaze = smoothing * self.prev_left_gaze + (1 - smoothing) * left_gaze
+        if self.prev_right_gaze is not None:
+            right_gaze = smoothing * self.prev_right_gaze + (1 - smoothing) * right_gaze
+        self.prev_left_gaze = left_gaze.copy()
+        self.prev_right_gaze = right_gaze.copy()
+        return left_gaze, right_gaze
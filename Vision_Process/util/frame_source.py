@@ -0,0 +1,168 @@
+"""Frame sources for the attention pipeline: webcam, video file, image directory, synthetic.
+
+Every source has ``read() -> (ok, frame, timestamp)`` returning BGR frames
+and ``release()``. Recorded sources stamp frame ``i`` with
+``start_time + i / fps``. With ``realtime=True`` they are paced to that
+clock like a camera. Otherwise they are read as fast as the consumer asks,
+which makes runs reproducible. ``live`` sources deliver frames whether or
+not anyone reads them, so the pipeline should read them through
+:class:`util.capture.LatestFrameCapture`.
+
+    source = open_source('recording.mp4', realtime=False)
+    ok, frame, timestamp = source.read()
+"""
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class FrameSource:
+    """Base class of the recorded sources; subclasses implement ``_next_frame()``."""
+
+    live = False
+
+    def __init__(self, fps=30.0, realtime=False, start_time=None):
+        self.fps = float(fps)
+        self.realtime = realtime
+        self.live = realtime
+        self.start_time = start_time
+        self.frames_read = 0
+
+    def _next_frame(self):
+        raise NotImplementedError
+
+    def read(self):
+        frame = self._next_frame()
+        if frame is None:
+            return False, None, None
+        if self.start_time is None:
+            # Clock starts at the first read, not when the source was opened
+            self.start_time = time.time()
+        timestamp = self.start_time + self.frames_read / self.fps
+        self.frames_read += 1
+        if self.realtime:
+            delay = timestamp - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        return True, frame, timestamp
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class WebcamSource:
+    """Live camera, by default MJPG 960x480 at 60 fps."""
+
+    live = True
+
+    def __init__(self, index=0, width=960, height=480, fps=60, fourcc='MJPG'):
+        self.capture = cv2.VideoCapture(index)
+        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        self.capture.set(cv2.CAP_PROP_FPS, fps)
+        self.fps = fps
+
+    def read(self):
+        ok, frame = self.capture.read()
+        return ok, frame, time.time()
+
+    def release(self):
+        self.capture.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, realtime=False, fps=None, start_time=None):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise IOError(f'Could not open video {path}')
+        fps = fps or self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(fps=fps, realtime=realtime, start_time=start_time)
+
+    def _next_frame(self):
+        ok, frame = self.capture.read()
+        return frame if ok else None
+
+    def release(self):
+        self.capture.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Images of a directory in file name order."""
+
+    def __init__(self, directory, realtime=False, fps=30.0, start_time=None):
+        self.paths = sorted(p for p in glob.glob(os.path.join(directory, '*'))
+                            if p.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise IOError(f'No images found in {directory}')
+        super().__init__(fps=fps, realtime=realtime, start_time=start_time)
+
+    def _next_frame(self):
+        if self.frames_read >= len(self.paths):
+            return None
+        frame = cv2.imread(self.paths[self.frames_read])
+        if frame is None:
+            raise IOError(f'Could not read {self.paths[self.frames_read]}')
+        return frame
+
+    def __len__(self):
+        return len(self.paths)
+
+
+class SyntheticSource(FrameSource):
+    """Deterministic moving-noise frames, for running the pipeline without any input.
+
+    Args:
+        num_frames: number of frames, None for an endless stream.
+    """
+
+    def __init__(self, width=960, height=480, num_frames=None, realtime=False, fps=30.0, start_time=None,
+                 seed=0):
+        super().__init__(fps=fps, realtime=realtime, start_time=start_time)
+        self.num_frames = num_frames
+        rng = np.random.default_rng(seed)
+        # Twice as wide as a frame, so frame i is a shifted window without per-frame randomness
+        self._texture = rng.integers(0, 256, size=(height, 2 * width, 3), dtype=np.uint8)
+        self.width = width
+
+    def _next_frame(self):
+        if self.num_frames is not None and self.frames_read >= self.num_frames:
+            return None
+        shift = (self.frames_read * 4) % self.width
+        return np.ascontiguousarray(self._texture[:, shift:shift + self.width])
+
+
+def open_source(spec='webcam', realtime=False, fps=None):
+    """Open a frame source from a command line string.
+
+    ``spec`` is ``webcam`` or ``webcam:<index>``, ``synthetic`` or
+    ``synthetic:<frames>``, an image directory or a video file. ``realtime``
+    and ``fps`` apply to recorded sources.
+    """
+    kind, _, arg = spec.partition(':')
+    if kind == 'webcam':
+        return WebcamSource(int(arg) if arg else 0)
+    if kind == 'synthetic':
+        return SyntheticSource(num_frames=int(arg) if arg else None, realtime=realtime, fps=fps or 30.0)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, realtime=realtime, fps=fps or 30.0)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec, realtime=realtime, fps=fps)
+    raise ValueError(f'Unknown frame source {spec!r}')
@@ -54,6 +54,8 @@ def angular_error(a, b):
     b_norm = np.clip(b_norm, a_min=1e-7, a_max=None)
 
     similarity = np.divide(ab, np.multiply(a_norm, b_norm))
+    # Yuvarlama hatası 1'i aşarsa arccos NaN verir (ör. aynı vektörler)
+    similarity = np.clip(similarity, -1.0, 1.0)
 
     return np.arccos(similarity) * radians_to_degrees
 
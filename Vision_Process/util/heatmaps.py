@@ -0,0 +1,81 @@
+"""Gaussian landmark heatmaps for EyeNet training targets.
+
+All landmarks of a batch are rendered in one broadcasted operation. The 2D
+Gaussian is separable, ``exp(a*(dx^2 + dy^2)) = exp(a*dx^2) * exp(a*dy^2)``,
+so each landmark needs ``w + h`` exponentials and one outer product instead
+of a full ``h x w`` grid of them. The coordinate axes are cached per size
+and device.
+
+    heatmaps = render_heatmaps(landmarks)                          # numpy, (..., 34, 48, 80)
+    heatmaps = render_heatmaps_torch(batch['landmarks'].to(device))  # on the model device
+    loader = DataLoader(UnityEyesCache(heatmaps=False), collate_fn=HeatmapCollate())
+
+torch is only imported by the torch helpers, so :mod:`util.preprocess` and
+:func:`render_heatmaps` work without it.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+HEATMAP_W = 80
+HEATMAP_H = 48
+HEATMAP_SIGMA = 2.0
+
+
+@lru_cache(maxsize=None)
+def _axes(w, h):
+    # gaussian_2d ile aynı ızgara: linspace(0, n - 1, n), float32
+    return np.linspace(0, w - 1, w, dtype=np.float32), np.linspace(0, h - 1, h, dtype=np.float32)
+
+
+def render_heatmaps(landmarks, w=HEATMAP_W, h=HEATMAP_H, sigma=HEATMAP_SIGMA):
+    """``(..., n, 2)`` landmarks in heatmap ``(y, x)`` coordinates -> ``(..., n, h, w)`` float32 heatmaps.
+
+    Matches :func:`util.preprocess.gaussian_2d` per landmark.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    xs, ys = _axes(w, h)
+    alpha = np.float32(-0.5 / (sigma ** 2))
+    gx = np.exp(alpha * (xs - landmarks[..., 1:2]) ** 2)  # (..., n, w)
+    gy = np.exp(alpha * (ys - landmarks[..., 0:1]) ** 2)  # (..., n, h)
+    return gy[..., :, None] * gx[..., None, :]
+
+
+_torch_axes = {}
+
+
+def render_heatmaps_torch(landmarks, w=HEATMAP_W, h=HEATMAP_H, sigma=HEATMAP_SIGMA):
+    """Torch version of :func:`render_heatmaps`, runs on the device of ``landmarks``."""
+    import torch
+    key = (w, h, landmarks.device)
+    axes = _torch_axes.get(key)
+    if axes is None:
+        xs, ys = _axes(w, h)
+        axes = (torch.from_numpy(xs).to(landmarks.device), torch.from_numpy(ys).to(landmarks.device))
+        _torch_axes[key] = axes
+    xs, ys = axes
+    landmarks = landmarks.to(torch.float32)
+    alpha = -0.5 / (sigma ** 2)
+    gx = torch.exp(alpha * (xs - landmarks[..., 1:2]) ** 2)
+    gy = torch.exp(alpha * (ys - landmarks[..., 0:1]) ** 2)
+    return gy.unsqueeze(-1) * gx.unsqueeze(-2)
+
+
+class HeatmapCollate:
+    """DataLoader ``collate_fn`` that renders the ``heatmaps`` of a batch from its ``landmarks``.
+
+    Use with datasets created with ``heatmaps=False`` so the per-sample
+    workers skip the heatmaps. A class rather than a closure so it can be
+    pickled to worker processes.
+    """
+
+    def __init__(self, w=HEATMAP_W, h=HEATMAP_H, sigma=HEATMAP_SIGMA):
+        self.w = w
+        self.h = h
+        self.sigma = sigma
+
+    def __call__(self, samples):
+        from torch.utils.data import default_collate
+        batch = default_collate(samples)
+        batch['heatmaps'] = render_heatmaps_torch(batch['landmarks'], self.w, self.h, self.sigma)
+        return batch
@@ -1,5 +1,58 @@
 import numpy as np
 
+# solvePnP için 2D noktalar: burun ucu, çene, sol/sağ göz dış köşe, sol/sağ ağız köşe
+POSE_IDX = np.array([1, 152, 33, 263, 61, 291])
+# segment_eyes için göz köşeleri ve burun ucu
+EYE_CORNER_IDX = np.array([33, 133, 263, 362, 1])
+# İris merkezleri (refine_landmarks=True gerektirir)
+IRIS_IDX = np.array([473, 468])
+# EyeNet zamanlayıcısının izlediği noktalar: dört göz köşesi ve iki iris merkezi
+GAZE_TRACK_IDX = np.concatenate([EYE_CORNER_IDX[:4], IRIS_IDX])
+# EAR için göz landmark indeksleri
+LEFT_EYE_IDX = np.array([33, 160, 158, 133, 153, 144, 163, 7, 246, 161, 159, 27, 23, 130, 243, 112, 26, 22, 35, 11, 12, 13, 14, 15, 16, 17])
+RIGHT_EYE_IDX = np.array([263, 387, 385, 362, 380, 373, 390, 249, 466, 388, 386, 259, 255, 339, 463, 342, 260, 257, 288, 285, 295, 296, 334, 293, 300, 301])
+# EAR sadece ilk 6 noktayı kullanır: 2 x 6 (sol, sağ)
+EAR_IDX = np.stack([LEFT_EYE_IDX[:6], RIGHT_EYE_IDX[:6]])
+
+
+def landmarks_to_array(face_landmarks):
+    """Convert a MediaPipe ``NormalizedLandmarkList`` to a contiguous ``(n, 3)`` float32 array.
+
+    Coordinates stay normalized (x, y in [0, 1], z relative). This is the only
+    place that walks the protobuf landmarks; everything else indexes the array.
+    """
+    landmarks = face_landmarks.landmark
+    n = len(landmarks)
+    coords = np.fromiter((c for pt in landmarks for c in (pt.x, pt.y, pt.z)), dtype=np.float32, count=3 * n)
+    return coords.reshape(n, 3)
+
+
+def to_pixels(points, w, h, origin=None):
+    """Scale normalized ``(n, 3)`` landmarks to ``(n, 2)`` pixel coordinates.
+
+    ``w``, ``h`` are the size of the image the landmarks were detected on and
+    ``origin`` its ``(x, y)`` offset in the full frame, for crops.
+    """
+    pixels = points[:, :2] * np.array([w, h], dtype=np.float32)
+    if origin is not None:
+        pixels += np.array(origin, dtype=np.float32)
+    return pixels
+
+
+def eye_aspect_ratios(points_2d):
+    """EAR of the left and right eye from ``(n, 2)`` pixel landmarks."""
+    eye = points_2d[EAR_IDX]  # 2 x 6 x 2
+    A = np.linalg.norm(eye[:, 1] - eye[:, 5], axis=1)
+    B = np.linalg.norm(eye[:, 2] - eye[:, 4], axis=1)
+    C = np.linalg.norm(eye[:, 0] - eye[:, 3], axis=1)
+    return (A + B) / (2.0 * C)
+
+
+def landmark_mobility(prev_points, points):
+    """Mean per-landmark movement between two frames."""
+    return np.linalg.norm(points - prev_points, axis=1).mean()
+
+
 def compute_head_mobility(landmarks_sequence):
     """
     landmarks_sequence: List of np.array, each of shape (num_landmarks, 2) or (num_landmarks, 3)
@@ -7,7 +60,5 @@ def compute_head_mobility(landmarks_sequence):
     """
     mobility = []
     for i in range(1, len(landmarks_sequence)):
-        diff = landmarks_sequence[i] - landmarks_sequence[i-1]
-        norm = np.linalg.norm(diff, axis=1).mean()  # mean movement per landmark
-        mobility.append(norm)
+        mobility.append(landmark_mobility(landmarks_sequence[i-1], landmarks_sequence[i]))
     return mobility
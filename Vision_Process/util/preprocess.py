@@ -1,24 +1,30 @@
 import numpy as np
 import cv2
 import util.gaze
-from scipy.spatial.transform import Rotation as R
+from util.heatmaps import render_heatmaps
 
-def preprocess_unityeyes_image(img, json_data):
-    ow = 160
-    oh = 96
-    # Prepare to segment eye image
-    ih, iw = img.shape[:2]
-    ih_2, iw_2 = ih/2.0, iw/2.0
+# Rastgele kaydırma sınırı (piksel) ve bulanıklık sigması üst sınırı
+MAX_SHIFT = 10
+MAX_BLUR_SIGMA = 20
 
-    heatmap_w = int(ow/2)
-    heatmap_h = int(oh/2)
 
-    img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+def parse_vector(text):
+    """UnityEyes json değeri '(x, y, z)' -> float dizi (eval yerine)."""
+    return np.array(text.strip().strip('()').split(','), dtype=np.float64)
+
+
+def unityeyes_geometry(json_data, ih, iw, ow=160, oh=96):
+    """Deterministic part of the UnityEyes preprocessing.
 
+    Returns the eye-centred 3x3 transform without the random shift, the eye
+    middle, the 34 landmarks ``(x, y)`` in image coordinates and the gaze
+    ``(pitch, yaw)``. ``ih, iw`` is the image size (json ``y`` is bottom-up).
+    """
     def process_coords(coords_list):
-        coords = [eval(l) for l in coords_list]
-        return np.array([(x, ih-y, z) for (x, y, z) in coords])
-    
+        coords = np.array([parse_vector(l) for l in coords_list])
+        coords[:, 1] = ih - coords[:, 1]
+        return coords
+
     interior_landmarks = process_coords(json_data['interior_margin_2d'])
     caruncle_landmarks = process_coords(json_data['caruncle_2d'])
     iris_landmarks = process_coords(json_data['iris_2d'])
@@ -32,81 +38,117 @@ def preprocess_unityeyes_image(img, json_data):
     # Normalize to eye width.
     scale = ow/eye_width
 
-    translate = np.asmatrix(np.eye(3))
+    translate = np.eye(3)
     translate[0, 2] = -eye_middle[0] * scale
     translate[1, 2] = -eye_middle[1] * scale
 
-    rand_x = np.random.uniform(low=-10, high=10)
-    rand_y = np.random.uniform(low=-10, high=10)
-    recenter = np.asmatrix(np.eye(3))
-    recenter[0, 2] = ow/2 + rand_x
-    recenter[1, 2] = oh/2 + rand_y
+    recenter = np.eye(3)
+    recenter[0, 2] = ow/2
+    recenter[1, 2] = oh/2
 
-    scale_mat = np.asmatrix(np.eye(3))
+    scale_mat = np.eye(3)
     scale_mat[0, 0] = scale
     scale_mat[1, 1] = scale
 
-    angle = 0 #np.random.normal(0, 1) * 20 * np.pi/180
-    rotation = R.from_rotvec([0, 0, angle]).as_matrix()
-
-    transform = recenter * rotation * translate * scale_mat
-    transform_inv = np.linalg.inv(transform)
-    
-    # Apply transforms
-    eye = cv2.warpAffine(img, transform[:2], (ow, oh))
-
-    rand_blur = np.random.uniform(low=0, high=20)
-    eye = cv2.GaussianBlur(eye, (5, 5), rand_blur)
-
-    # Normalize eye image
-    eye = cv2.equalizeHist(eye)
-    eye = eye.astype(np.float32)
-    eye = eye / 255.0
+    # Döndürme artırımı kapalı (açı 0), dönüşüm sadece ölçek ve öteleme
+    transform = recenter @ translate @ scale_mat
 
     # Gaze
     # Convert look vector to gaze direction in polar angles
-    look_vec = np.array(eval(json_data['eye_details']['look_vec']))[:3].reshape((1, 3))
-    #look_vec = np.matmul(look_vec, rotation.T)
-
+    look_vec = parse_vector(json_data['eye_details']['look_vec'])[:3].reshape((1, 3))
     gaze = util.gaze.vector_to_pitchyaw(-look_vec).flatten()
     gaze = gaze.astype(np.float32)
 
     iris_center = np.mean(iris_landmarks[:, :2], axis=0)
+    ih_2, iw_2 = ih/2.0, iw/2.0
 
-    landmarks = np.concatenate([interior_landmarks[:, :2],  # 8
-                                iris_landmarks[::2, :2],  # 8
+    landmarks = np.concatenate([interior_landmarks[:, :2],  # 16
+                                iris_landmarks[::2, :2],  # 16
                                 iris_center.reshape((1, 2)),
                                 [[iw_2, ih_2]],  # Eyeball center
-                                ])  # 18 in total
+                                ])  # 34 in total
+    return transform, eye_middle, landmarks, gaze
+
+
+def shift_transform(transform, dx, dy):
+    shifted = transform.copy()
+    shifted[0, 2] += dx
+    shifted[1, 2] += dy
+    return shifted
+
 
-    landmarks = np.asmatrix(np.pad(landmarks, ((0, 0), (0, 1)), 'constant', constant_values=1))
-    landmarks = np.asarray(landmarks * transform[:2].T) * np.array([heatmap_w/ow, heatmap_h/oh])
+def heatmap_landmarks(landmarks, transform, ow=160, oh=96):
+    """Image ``(x, y)`` landmarks -> heatmap ``(y, x)`` coordinates of the crop made with ``transform``."""
+    heatmap_w = int(ow/2)
+    heatmap_h = int(oh/2)
+    landmarks = np.pad(landmarks, ((0, 0), (0, 1)), 'constant', constant_values=1)
+    landmarks = (landmarks @ transform[:2].T) * np.array([heatmap_w/ow, heatmap_h/oh])
     landmarks = landmarks.astype(np.float32)
 
     # Swap columns so that landmarks are in (y, x), not (x, y)
     # This is because the network outputs landmarks as (y, x) values.
-    temp = np.zeros((34, 2), dtype=np.float32)
-    temp[:, 0] = landmarks[:, 1]
-    temp[:, 1] = landmarks[:, 0]
-    landmarks = temp
+    return np.ascontiguousarray(landmarks[:, ::-1])
+
 
-    heatmaps = get_heatmaps(w=heatmap_w, h=heatmap_h, landmarks=landmarks)
+def training_sample(eye, transform, eye_middle, landmarks, gaze, blur_sigma=None, ow=160, oh=96, heatmaps=True):
+    """Training sample from a ``oh x ow`` grayscale crop and its geometry.
+
+    ``blur_sigma`` is the random blur augmentation (None: no blur). With
+    ``heatmaps=False`` the sample has no ``heatmaps``, render them per batch
+    with :class:`util.heatmaps.HeatmapCollate`.
+    """
+    if blur_sigma is not None:
+        eye = cv2.GaussianBlur(eye, (5, 5), blur_sigma)
+
+    # Normalize eye image
+    eye = cv2.equalizeHist(eye)
+    eye = eye.astype(np.float32)
+    eye = eye / 255.0
 
-    assert heatmaps.shape == (34, heatmap_h, heatmap_w)
+    landmarks = heatmap_landmarks(landmarks, transform, ow, oh)
 
-    return {
+    sample = {
         'img': eye,
         'transform': np.asarray(transform),
-        'transform_inv': np.asarray(transform_inv),
+        'transform_inv': np.linalg.inv(transform),
         'eye_middle': np.asarray(eye_middle),
-        'heatmaps': np.asarray(heatmaps),
         'landmarks': np.asarray(landmarks),
         'gaze': np.asarray(gaze)
     }
+    if heatmaps:
+        sample['heatmaps'] = get_heatmaps(w=int(ow/2), h=int(oh/2), landmarks=landmarks)
+        assert sample['heatmaps'].shape == (34, int(oh/2), int(ow/2))
+    return sample
+
+
+def preprocess_unityeyes_image(img, json_data, augment=True):
+    ow = 160
+    oh = 96
+    # Prepare to segment eye image
+    ih, iw = img.shape[:2]
+
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    transform, eye_middle, landmarks, gaze = unityeyes_geometry(json_data, ih, iw, ow, oh)
+
+    rand_x, rand_y, rand_blur = random_augmentation() if augment else (0.0, 0.0, None)
+    transform = shift_transform(transform, rand_x, rand_y)
+
+    # Apply transforms
+    eye = cv2.warpAffine(img, transform[:2], (ow, oh))
+    return training_sample(eye, transform, eye_middle, landmarks, gaze, blur_sigma=rand_blur, ow=ow, oh=oh)
+
+
+def random_augmentation():
+    """Random (dx, dy) shift of the crop and blur sigma."""
+    rand_x = np.random.uniform(low=-MAX_SHIFT, high=MAX_SHIFT)
+    rand_y = np.random.uniform(low=-MAX_SHIFT, high=MAX_SHIFT)
+    rand_blur = np.random.uniform(low=0, high=MAX_BLUR_SIGMA)
+    return rand_x, rand_y, rand_blur
 
 
 def gaussian_2d(w, h, cx, cy, sigma=1.0):
-    """Generate heatmap with single 2D gaussian."""
+    """Generate heatmap with single 2D gaussian (reference for util.heatmaps)."""
     xs, ys = np.meshgrid(
         np.linspace(0, w - 1, w, dtype=np.float32),
         np.linspace(0, h - 1, h, dtype=np.float32)
@@ -119,7 +161,5 @@ def gaussian_2d(w, h, cx, cy, sigma=1.0):
 
 
 def get_heatmaps(w, h, landmarks):
-    heatmaps = []
-    for (y, x) in landmarks:
-        heatmaps.append(gaussian_2d(w, h, cx=x, cy=y, sigma=2.0))
-    return np.array(heatmaps)
+    # Tüm landmarklar tek seferde, ayrılabilir Gauss ile (bkz. util.heatmaps)
+    return render_heatmaps(landmarks, w=w, h=h, sigma=2.0)
@@ -0,0 +1,216 @@
+"""Fixed-record binary log of per-frame vision signals.
+
+A session log is a small header followed by an array of :data:`SIGNAL_DTYPE`
+records, written append-only through a memory map. Records are written
+field by field straight into the mapped file, so logging a frame allocates
+no arrays. The header holds the number of committed records and is updated
+on every periodic flush. After a crash, at most the last flush interval is
+lost.
+
+Reading maps the file without parsing, and :func:`time_slice` finds a time
+range by binary search on the timestamps::
+
+    log = SessionLogReader('session.eclog')
+    last_minute = log.slice(log.end_time - 60, log.end_time)
+    last_minute['total_attention'].mean()
+"""
+import ast
+import os
+import struct
+import time
+
+import numpy as np
+
+SIGNAL_DTYPE = np.dtype([
+    ('timestamp', '<f8'),          # capture time, time.time()
+    ('face_found', '?'),
+    ('head_ok', '?'),
+    ('left_eye_open', '?'),
+    ('right_eye_open', '?'),
+    ('yaw', '<f4'),                # degrees
+    ('pitch', '<f4'),
+    ('roll', '<f4'),
+    ('left_ear', '<f4'),
+    ('right_ear', '<f4'),
+    ('left_gaze', '<f4', (2,)),    # radians, after offset and smoothing
+    ('right_gaze', '<f4', (2,)),
+    ('mobility', '<f4'),
+    ('left_attention', '<f4'),
+    ('right_attention', '<f4'),
+    ('total_attention', '<f4'),
+    ('latency_ms', '<f4'),
+])
+
+MAGIC = b'ECSLOG01'
+HEADER_SIZE = 4096
+_COUNT_OFFSET = len(MAGIC)
+_HEADER_FORMAT = '<8sQI'  # magic, record count, dtype descr length
+
+
+def _empty_record(dtype):
+    record = np.zeros(1, dtype=dtype)
+    for name in dtype.names:
+        if dtype[name].base.kind == 'f' and name != 'timestamp':
+            record[name] = np.nan
+    return record[0]
+
+
+class SessionLogWriter:
+    """Append-only writer of :data:`SIGNAL_DTYPE` records.
+
+    Usage per frame::
+
+        record = writer.next_record()
+        record['timestamp'] = frame_time
+        record['yaw'] = yaw
+        writer.commit()
+
+    Fields that are not set keep their defaults (NaN for floats, False for flags).
+    A record is a view into the mapped file and is only valid until
+    :meth:`commit`; do not keep it after that. The file is only ever extended
+    while mapped. :meth:`close` trims the unused tail, and if the OS refuses
+    because a view is still alive (Windows), the tail stays and readers skip
+    it using the record count in the header.
+
+    Args:
+        path: output file, created or truncated.
+        chunk_records: the file grows by this many records at a time.
+        flush_interval_sec: how often committed records are flushed to disk.
+    """
+
+    def __init__(self, path, dtype=SIGNAL_DTYPE, chunk_records=60 * 60 * 60, flush_interval_sec=5.0):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.chunk_records = chunk_records
+        self.flush_interval_sec = flush_interval_sec
+        self._empty = _empty_record(self.dtype)
+        self._count = 0
+        self._pending = None
+        self._last_flush = time.time()
+
+        descr = repr(self.dtype.descr).encode('utf-8')
+        header = struct.pack(_HEADER_FORMAT, MAGIC, 0, len(descr)) + descr
+        if len(header) > HEADER_SIZE:
+            raise ValueError('dtype description does not fit into the session log header')
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b'\0'))
+        self._file = open(path, 'r+b')
+        self._records = None
+        self._capacity = 0
+        self._grow()
+
+    def _grow(self):
+        if self._records is not None:
+            self._records.flush()
+            self._records = None
+        self._capacity += self.chunk_records
+        # Extend by writing the last byte: unlike truncate() this also works on Windows while an
+        # older mapping of the file is still referenced
+        self._file.seek(HEADER_SIZE + self._capacity * self.dtype.itemsize - 1)
+        self._file.write(b'\0')
+        self._file.flush()
+        self._records = np.memmap(self._file, dtype=self.dtype, mode='r+', offset=HEADER_SIZE,
+                                  shape=(self._capacity,))
+
+    def next_record(self):
+        """Reset and return the next record, a view into the mapped file that is valid until :meth:`commit`."""
+        if self._count >= self._capacity:
+            self._grow()
+        self._records[self._count] = self._empty
+        self._pending = self._records[self._count]
+        return self._pending
+
+    def commit(self):
+        """Mark the record returned by :meth:`next_record` as written."""
+        if self._pending is None:
+            return
+        self._pending = None
+        self._count += 1
+        now = time.time()
+        if now - self._last_flush >= self.flush_interval_sec:
+            self.flush()
+            self._last_flush = now
+
+    def flush(self):
+        self._records.flush()
+        self._file.seek(_COUNT_OFFSET)
+        self._file.write(struct.pack('<Q', self._count))
+        self._file.flush()
+
+    def close(self):
+        """Flush and trim the file to the committed records."""
+        if self._file.closed:
+            return
+        self.flush()
+        self._records = None
+        self._pending = None
+        try:
+            self._file.truncate(HEADER_SIZE + self._count * self.dtype.itemsize)
+        except OSError:
+            pass  # a record view is still mapped; the header count already excludes the tail
+        self._file.close()
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_header(path):
+    """Return ``(count, dtype)`` from a session log header."""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    magic, count, descr_len = struct.unpack_from(_HEADER_FORMAT, header)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a session log')
+    start = struct.calcsize(_HEADER_FORMAT)
+    descr = ast.literal_eval(header[start:start + descr_len].decode('utf-8'))
+    return count, np.dtype(descr)
+
+
+def load_session(path):
+    """Memory-map the committed records of a session log (read-only, no parsing)."""
+    count, dtype = read_header(path)
+    available = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    count = min(count, available)
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def time_slice(records, start=None, end=None):
+    """Records with ``start <= timestamp < end`` (binary search, returns a view)."""
+    timestamps = records['timestamp']
+    lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+    hi = len(records) if end is None else int(np.searchsorted(timestamps, end, side='left'))
+    return records[lo:hi]
+
+
+class SessionLogReader:
+    """Read-only view of a session log; ``records`` is a memory-mapped structured array."""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = load_session(path)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def start_time(self):
+        return float(self.records['timestamp'][0]) if len(self.records) else None
+
+    @property
+    def end_time(self):
+        return float(self.records['timestamp'][-1]) if len(self.records) else None
+
+    def slice(self, start=None, end=None):
+        return time_slice(self.records, start, end)
@@ -38,3 +38,23 @@ def softargmax1d(input, beta=100):
     result = torch.sum((n - 1) * input * indices, dim=-1)
     return result
 
+
+
+class SoftArgmax2d(nn.Module):
+    """Module version of :func:`softargmax2d` for a fixed heatmap size.
+
+    The row/column index grid is built once and kept as a buffer instead of
+    being rebuilt on every call, which also makes the module traceable.
+    """
+
+    def __init__(self, h, w, beta=100):
+        super(SoftArgmax2d, self).__init__()
+        self.beta = beta
+        rows = torch.arange(h, dtype=torch.float32).repeat_interleave(w)
+        cols = torch.arange(w, dtype=torch.float32).repeat(h)
+        self.register_buffer('grid', torch.stack([rows, cols], dim=1))  # h*w x 2
+
+    def forward(self, input):
+        input = input.flatten(start_dim=-2)
+        input = nn.functional.softmax(self.beta * input, dim=-1)
+        return torch.matmul(input, self.grid)
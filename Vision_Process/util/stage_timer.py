@@ -0,0 +1,97 @@
+"""Per-stage latency timers with rolling percentiles."""
+import threading
+import time
+
+import numpy as np
+
+
+class StageTimer:
+    """Rolling per-stage latency statistics for a frame loop.
+
+    The loop calls :meth:`begin` once per frame, :meth:`lap` after every
+    stage and :meth:`end` at the end of the frame. A lap records the time
+    since the previous lap (or since :meth:`begin`), so timing a stage costs
+    one ``perf_counter`` call and the loop body does not need to be
+    restructured. The last ``window`` samples of every stage are kept in a
+    ring buffer. :meth:`summary` computes the percentiles when it is
+    queried, e.g. from the HTTP thread.
+
+    Args:
+        window: number of samples kept per stage, None keeps every sample
+            (benchmarks).
+    """
+
+    FRAME = 'frame'
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._order = []
+        self._lock = threading.Lock()
+        self._frame_start = None
+        self._last = None
+
+    def begin(self):
+        self._frame_start = self._last = time.perf_counter()
+
+    def lap(self, stage):
+        """Record the time since the previous lap as ``stage``."""
+        now = time.perf_counter()
+        self.record(stage, (now - self._last) * 1000)
+        self._last = now
+
+    def end(self):
+        """Record the whole frame, from :meth:`begin`, as ``'frame'``."""
+        self.record(self.FRAME, (time.perf_counter() - self._frame_start) * 1000)
+
+    def record(self, stage, ms):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = np.zeros(self.window or 1024, dtype=np.float64)
+                self._counts[stage] = 0
+                self._order.append(stage)
+            count = self._counts[stage]
+            if self.window is None and count == len(samples):
+                samples = self._samples[stage] = np.concatenate([samples, np.zeros_like(samples)])
+            samples[count % len(samples)] = ms
+            self._counts[stage] = count + 1
+
+    def summary(self):
+        """``{stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}`` in first-seen stage order.
+
+        ``count`` is the total number of samples. The statistics cover the
+        last ``window`` of them.
+        """
+        with self._lock:
+            snapshot = [(stage, self._counts[stage],
+                         self._samples[stage][:min(self._counts[stage], len(self._samples[stage]))].copy())
+                        for stage in self._order]
+        result = {}
+        for stage, count, samples in snapshot:
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            result[stage] = {
+                'count': count,
+                'mean_ms': float(samples.mean()),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'max_ms': float(samples.max()),
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._order.clear()
+
+
+def format_summary(summary):
+    """Fixed-width table of a :meth:`StageTimer.summary`."""
+    lines = [f'{"stage":<14}{"count":>8}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}']
+    for stage, s in summary.items():
+        lines.append(f'{stage:<14}{s["count"]:>8}{s["mean_ms"]:>10.2f}{s["p50_ms"]:>10.2f}'
+                     f'{s["p95_ms"]:>10.2f}{s["p99_ms"]:>10.2f}{s["max_ms"]:>10.2f}')
+    return '\n'.join(lines)
@@ -0,0 +1,115 @@
+"""Startup phases and readiness of the vision service.
+
+The HTTP server comes up first. The slow parts (EyeNet model, MediaPipe
+FaceMesh, opening the camera) are loaded concurrently in threads by
+:meth:`Startup.run_parallel`, and the service reports ready once the
+first score is computed. Every phase is recorded relative to the launch
+time, i.e. the first import of this module, so the breakdown shows where
+the time to first score goes.
+
+    startup = Startup()
+    with startup.phase('server'):
+        start_server()
+    backend, face_mesh = startup.run_parallel({'eyenet': load_backend, 'face_mesh': create_face_mesh}).values()
+    ...
+    startup.mark('first_score')
+    startup.set_ready()
+    print(format_startup(startup.report()))
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Başlatma zamanı: bu modülün ilk import edildiği an (run_with_webcam.py bunu ilk satırlarda yapar)
+LAUNCH_TIME = time.time()
+
+
+class Startup:
+    """Records named startup phases and holds the readiness flag (thread-safe).
+
+    Args:
+        launch_time: ``time.time()`` the phases are relative to, defaults to
+            :data:`LAUNCH_TIME`.
+    """
+
+    def __init__(self, launch_time=None):
+        self.launch_time = LAUNCH_TIME if launch_time is None else launch_time
+        self._phases = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self.error = None
+
+    def record(self, name, start, end):
+        """Record phase ``name`` from ``start`` to ``end`` (``time.time()`` values)."""
+        with self._lock:
+            self._phases[name] = (start - self.launch_time, end - start)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.time())
+
+    def mark(self, name):
+        """Record an instant, e.g. ``first_score``."""
+        now = time.time()
+        self.record(name, now, now)
+
+    def run_parallel(self, tasks):
+        """Run ``{name: fn}`` concurrently, each as a phase, and return ``{name: fn()}``.
+
+        All tasks finish before the first exception (in ``tasks`` order) is
+        re-raised; it is also kept in :attr:`error`.
+        """
+        results = {}
+        errors = {}
+
+        def run(name, fn):
+            try:
+                with self.phase(name):
+                    results[name] = fn()
+            except BaseException as e:
+                errors[name] = e
+
+        threads = [threading.Thread(target=run, args=item, name=f'startup-{item[0]}', daemon=True)
+                   for item in tasks.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for name in tasks:
+            if name in errors:
+                self.error = f'{name}: {errors[name]}'
+                raise errors[name]
+        return {name: results[name] for name in tasks}
+
+    def set_ready(self):
+        self._ready.set()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def report(self):
+        """``{'ready', 'uptime_sec', 'error', 'phases': {name: {'start_sec', 'duration_sec'}}}`` in start order."""
+        with self._lock:
+            phases = sorted(self._phases.items(), key=lambda item: item[1][0])
+        return {
+            'ready': self.ready,
+            'uptime_sec': time.time() - self.launch_time,
+            'error': self.error,
+            'phases': {name: {'start_sec': start, 'duration_sec': duration} for name, (start, duration) in phases},
+        }
+
+
+def format_startup(report):
+    """Human readable startup breakdown, one phase per line."""
+    lines = [f'  {"phase":<14}{"start s":>10}{"duration s":>12}']
+    for name, phase in report['phases'].items():
+        lines.append(f'  {name:<14}{phase["start_sec"]:>10.3f}{phase["duration_sec"]:>12.3f}')
+    return '\n'.join(lines)
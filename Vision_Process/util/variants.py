@@ -0,0 +1,91 @@
+"""Speed/accuracy table of EyeNet variants and selection by latency budget.
+
+``distill_eyenet.py`` writes the table as JSON next to the variant
+checkpoints. ``run_with_webcam.py --latency-budget-ms`` reads it with
+:func:`load_variants` and picks the most accurate variant that fits with
+:func:`pick_variant`. Reading the table needs no torch.
+"""
+import json
+import os
+
+
+def variant_name(architecture):
+    """``s{nstack}f{nfeatures}d{hourglass_depth}w{stem_width}``, e.g. ``s3f32d4w128`` for the original EyeNet.
+
+    A factorized gaze layer adds ``r{gaze_rank}``, e.g. ``s3f32d4w128r32``.
+    """
+    name = (f"s{architecture['nstack']}f{architecture['nfeatures']}"
+            f"d{architecture.get('hourglass_depth', 4)}w{architecture.get('stem_width', 128)}")
+    if architecture.get('gaze_rank') is not None:
+        name += f"r{architecture['gaze_rank']}"
+    return name
+
+
+def parse_variant(name):
+    """Inverse of :func:`variant_name`."""
+    values = {'gaze_rank': None}
+    rest, sep, rank = name.rpartition('r')
+    if sep and rank.isdigit():
+        values['gaze_rank'] = int(rank)
+    else:
+        rest = name
+    for key, letter in (('stem_width', 'w'), ('hourglass_depth', 'd'), ('nfeatures', 'f'), ('nstack', 's')):
+        rest, sep, value = rest.rpartition(letter)
+        if not sep or not value.isdigit():
+            raise ValueError(f'invalid variant name {name!r}, expected e.g. s1f16d3w32')
+        values[key] = int(value)
+    if rest:
+        raise ValueError(f'invalid variant name {name!r}, expected e.g. s1f16d3w32')
+    return values
+
+
+def save_variants(path, variants, **info):
+    """Write the table; checkpoint paths are stored relative to the table file."""
+    base = os.path.dirname(os.path.abspath(path))
+    rows = [dict(row, path=os.path.relpath(os.path.abspath(row['path']), base)) for row in variants]
+    with open(path, 'w') as f:
+        json.dump(dict(info, variants=rows), f, indent=2)
+
+
+def load_variants(path):
+    with open(path) as f:
+        table = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    for row in table['variants']:
+        row['path'] = os.path.normpath(os.path.join(base, row['path']))
+    return table
+
+
+def _error(row):
+    # MPIIGaze hatası yoksa öğretmene açısal uzaklık kullanılır
+    error = row.get('mpii_error')
+    if error is None:
+        error = row.get('teacher_error')
+    return float('inf') if error is None else error
+
+
+def pick_variant(table, budget_ms):
+    """The most accurate variant with ``latency_ms <= budget_ms``, the fastest one if none fits.
+
+    Returns ``(row, fits)``.
+    """
+    variants = table['variants']
+    if not variants:
+        raise ValueError('the variant table is empty')
+    fitting = [row for row in variants if row['latency_ms'] <= budget_ms]
+    if not fitting:
+        return min(variants, key=lambda row: row['latency_ms']), False
+    return min(fitting, key=lambda row: (_error(row), row['latency_ms'])), True
+
+
+def format_variants(table):
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else '-'
+
+    lines = ["| variant | params (M) | load ms | latency ms | p95 ms | MPIIGaze error deg | teacher diff deg |",
+             "|---|---:|---:|---:|---:|---:|---:|"]
+    for row in sorted(table['variants'], key=lambda row: row['latency_ms']):
+        lines.append(f"| {row['name']} | {row['params'] / 1e6:.2f} | {fmt(row.get('load_ms'), '.0f')} | "
+                     f"{row['latency_ms']:.1f} | {row['p95_ms']:.1f} | "
+                     f"{fmt(row.get('mpii_error'), '.2f')} | {fmt(row.get('teacher_error'), '.2f')} |")
+    return '\n'.join(lines)